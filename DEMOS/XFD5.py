@@ -5,8 +5,6 @@
 
 # Import Libraries and Functions
 import os
-import numpy as np
-import matplotlib.pyplot as plt
 import subprocess
 import sys
 from termcolor import colored
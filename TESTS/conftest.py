@@ -0,0 +1,63 @@
+# ========================================================================
+"""           SHARED PYTEST FIXTURES FOR THE ARULE UTILITIES           """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+UTILS/ is put on sys.path (the utilities import each other by module name) and the
+fixtures give each test a scratch ARULE/ tree and a stand-in for UD_ARULE.exe that
+runs the native engine, so the runners can be tested without the Windows exe.
+"""
+### Import Libraries
+import os
+import shutil
+import stat
+import sys
+import pytest
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+UTILS = os.path.join(ROOT, 'UTILS')
+sys.path.insert(0, UTILS)
+
+### Test Settings
+DINP = os.path.join(ROOT, 'ARULE', 'DATA', 'DINP')
+DEMO2_NODE1 = (24.0, 0.0, 5.0, 10, 5, 1.265, 67.0, 220.0, 2, 'SP4000_1', '.txt', '.csv', -9)
+# Called as UD_ARULE: exe sysname 2 0 1 workspace. FAKE_EXE_RC sets the return code &
+# FAKE_EXE_SKIP lists NDNUMIDs whose DOUT file is not written.
+FAKE_EXE = '''#!{python}
+import os, sys
+sys.path.insert(0, {utils!r})
+from parseDEF import readDEFrecords
+from nativeARULE import runSystemARULE
+sysname, directory = sys.argv[1], os.path.join(sys.argv[5], 'ARULE')
+records = readDEFrecords(sysname, directory)
+runSystemARULE(sysname, records, directory)
+for ndnumid in filter(None, os.environ.get('FAKE_EXE_SKIP', '').split(',')):
+    for record in records:
+        if record.NDNUMID == int(ndnumid):
+            os.remove(os.path.join(directory, 'DATA', 'DOUT', f'ND_{{ndnumid}}_DW_{{sysname}}_{{record.INFILE}}_OUT{{record.OUTTYPE}}'))
+with open(os.path.join(directory, 'DATA', 'LOG', f'UD_ARULE_LOG_{{sysname}}.txt'), 'w') as file:
+    file.write(f'ND_1_DW_{{sysname}} RC = 0\\n')
+sys.exit(int(os.environ.get('FAKE_EXE_RC', '0')))
+'''
+
+### FIXTURES
+@pytest.fixture
+def arule_root(tmp_path):
+    """
+    @returns: Path to a scratch root holding an ARULE/ tree with the SP4000 inputs
+    """
+    from batchRunner import makeARULEDirs
+    root = str(tmp_path / 'root')
+    makeARULEDirs(root)
+    for filename in ('SP4000_1.txt', 'SP4000_2.csv'):
+        shutil.copy2(os.path.join(DINP, filename), os.path.join(root, 'ARULE', 'DATA', 'DINP', filename))
+    return root
+
+@pytest.fixture
+def fake_exe(tmp_path):
+    """
+    @returns: Path to an executable script standing in for UD_ARULE.exe
+    """
+    path = tmp_path / 'fake_exe.py'
+    path.write_text(FAKE_EXE.format(python=sys.executable, utils=UTILS))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
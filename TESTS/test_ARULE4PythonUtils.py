@@ -0,0 +1,32 @@
+# ========================================================================
+"""        TESTS OF THE BATCH BD/EOL TIME-INDEX LOOKUPS                """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import numpy as np
+import pandas as pd
+from ARULE4PythonUtils import findBDandEOL, findBDandEOLBatch, findTimeIndexes
+
+### FUNCTIONS
+def test_find_time_indexes():
+    dt = np.array([0.0, 1.0, 2.0, 10.0, 20.0, 5.0])
+    offsets = [0, 3, 3, 5, 6]
+    times = [2.0 + 1e-12, 1.0, 14.0, np.nan]
+    assert findTimeIndexes(dt, offsets, times).tolist() == [2, -1, -1, -1]
+    assert findTimeIndexes(dt, offsets, times, nearest=True).tolist() == [2, -1, 0, -1]
+    assert findTimeIndexes([], [0, 0], [1.0]).tolist() == [-1]
+
+def test_batch_matches_per_node():
+    nodes = [(np.arange(50.0), 10.0, 40.0), (np.arange(5.0, 30.0), 12.0, 29.0), (np.arange(3.0), 7.0, 8.0)]
+    dt, bd, eol, offsets = [], [], [], [0]
+    for node_dt, node_bd, node_eol in nodes:
+        dt.append(node_dt)
+        bd.append(np.full(len(node_dt), node_bd))
+        eol.append(np.full(len(node_dt), node_eol))
+        offsets.append(offsets[-1] + len(node_dt))
+    bd_index, eol_index = findBDandEOLBatch(np.concatenate(dt), np.concatenate(bd), np.concatenate(eol), offsets)
+    for k, (node_dt, node_bd, node_eol) in enumerate(nodes):
+        single_bd, single_eol = findBDandEOL(node_dt, pd.Series(np.full(len(node_dt), node_bd)),
+                                             pd.Series(np.full(len(node_dt), node_eol)))
+        assert bd_index[k] == (single_bd[0][0] if len(single_bd[0]) else -1)
+        assert eol_index[k] == (single_eol[0][0] if len(single_eol[0]) else -1)
@@ -0,0 +1,39 @@
+# ========================================================================
+"""            TESTS OF THE ASYNCIO PIPELINE RUNNER ERROR PATHS         """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import pytest
+from conftest import DEMO2_NODE1
+from asyncRunner import isTransient, runAsync
+
+### FUNCTIONS
+def test_transient_messages():
+    assert isTransient(None, '')
+    assert isTransient(3, 'Error: license server busy')
+    assert isTransient(3, 'connection timed out')
+    assert isTransient(7, 'failed', retry_codes=(7,))
+    assert not isTransient(3, 'Invalid license file')
+    assert not isTransient(3, 'DLM.dll loaded')
+
+def test_setup_error_fails_one_system(arule_root, fake_exe):
+    missing = DEMO2_NODE1[:9] + ('MISSING',) + DEMO2_NODE1[10:]
+    results = runAsync([('GOOD', ['N1'], [DEMO2_NODE1]), ('BAD', ['N1'], [missing])], max_runs=2, plot=False,
+                       root=arule_root, exe=fake_exe, retries=0)
+    assert [result['returncode'] for result in results] == [0, -1]
+    assert 'MISSING' in results[1]['error']
+    assert set(results[0]['data']['GOOD_N1'].columns) == {'DT', 'RUL', 'SOH'}
+
+def test_missing_dout_fails_in_read_stage(arule_root, fake_exe, monkeypatch):
+    monkeypatch.setenv('FAKE_EXE_SKIP', '2')
+    results = runAsync([('PAIR', ['N1', 'N2'], [DEMO2_NODE1, DEMO2_NODE1])], plot=False, root=arule_root, exe=fake_exe)
+    assert results[0]['returncode'] == -1
+    assert 'FileNotFoundError' in results[0]['error']
+
+def test_failed_run_not_retried(arule_root, fake_exe, monkeypatch):
+    monkeypatch.setenv('FAKE_EXE_RC', '2')
+    results = runAsync([('FAIL', ['N1'], [DEMO2_NODE1])], plot=False, root=arule_root, exe=fake_exe, backoff=0)
+    assert results[0]['returncode'] == 2
+    assert results[0]['attempts'] == 1
+    assert not os.path.exists(os.path.join(arule_root, 'ARULE', 'DATA', 'DOUT', 'ND_1_DW_FAIL_SP4000_1_OUT.csv'))
@@ -0,0 +1,55 @@
+# ========================================================================
+"""        TESTS OF THE PARALLEL UD_ARULE BATCH & COMPOSITE RUNNER      """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import pytest
+from conftest import DEMO2_NODE1
+from batchRunner import runBatch, runComposite, runSystem
+
+### Test Settings
+MISSING_NODE = DEMO2_NODE1[:9] + ('MISSING',) + DEMO2_NODE1[10:]
+
+### FUNCTIONS
+def doutPath(root, ndnumid, sysname):
+    return os.path.join(root, 'ARULE', 'DATA', 'DOUT', f'ND_{ndnumid}_DW_{sysname}_SP4000_1_OUT.csv')
+
+def test_missing_input_fails_one_system(arule_root, fake_exe):
+    results = runBatch([('GOOD', ['N1'], [DEMO2_NODE1]), ('BAD', ['N1'], [MISSING_NODE])], max_workers=2,
+                       root=arule_root, exe=fake_exe)
+    assert [result['returncode'] for result in results] == [0, -1]
+    assert 'MISSING' in results[1]['error']
+    assert os.path.exists(doutPath(arule_root, 1, 'GOOD'))
+
+def test_duplicate_system_names_rejected(arule_root, fake_exe):
+    with pytest.raises(ValueError, match='unique'):
+        runBatch([('S', ['N1'], [DEMO2_NODE1])] * 2, root=arule_root, exe=fake_exe)
+
+def test_failed_run_collects_nothing(arule_root, fake_exe, monkeypatch):
+    monkeypatch.setenv('FAKE_EXE_RC', '3')
+    result = runSystem(('FAIL', ['N1'], [DEMO2_NODE1]), arule_root, exe=fake_exe)
+    assert result['returncode'] == 3 and result['outputs'] == []
+    assert not os.path.exists(doutPath(arule_root, 1, 'FAIL'))
+
+def test_composite_splits_outputs_and_flags_missing(arule_root, fake_exe, monkeypatch):
+    # Composite NDNUMID 2 is node 1 of the second system
+    monkeypatch.setenv('FAKE_EXE_SKIP', '2')
+    systems = [('A', ['N1'], [DEMO2_NODE1]), ('B', ['N1', 'N2'], [DEMO2_NODE1, DEMO2_NODE1])]
+    first, second = runComposite(systems, 'COMPOSITE1', arule_root, exe=fake_exe)
+    assert first['returncode'] == 0 and first['missing'] == []
+    assert os.path.exists(doutPath(arule_root, 1, 'A'))
+    assert second['returncode'] == -1 and second['missing'] == ['ND_1_DW_B_SP4000_1_OUT.csv']
+    assert os.path.exists(doutPath(arule_root, 2, 'B'))
+    with open(os.path.join(arule_root, 'ARULE', 'DATA', 'LOG', 'UD_ARULE_LOG_A.txt')) as file:
+        assert 'ND_1_DW_A' in file.read()
+
+def test_run_cache_restores_unchanged_system(arule_root, fake_exe, monkeypatch):
+    system = ('CACHED', ['N1'], [DEMO2_NODE1])
+    assert runSystem(system, arule_root, exe=fake_exe, use_cache=True)['cached'] is False
+    os.remove(doutPath(arule_root, 1, 'CACHED'))
+    # A failing exe proves the second run is not executed
+    monkeypatch.setenv('FAKE_EXE_RC', '3')
+    result = runSystem(system, arule_root, exe=fake_exe, use_cache=True)
+    assert result['cached'] is True and result['returncode'] == 0
+    assert os.path.exists(doutPath(arule_root, 1, 'CACHED'))
@@ -0,0 +1,36 @@
+# ========================================================================
+"""         TESTS OF THE SDEF/NDEF CREATOR & ATOMIC DEF WRITES         """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import importlib
+import os
+import stat
+import createDEF
+from createDEF import newFileMode, writeDEFfile
+
+### FUNCTIONS
+def test_import_leaves_the_umask_alone(monkeypatch):
+    def umask(mask):
+        raise AssertionError('os.umask called at import time')
+    monkeypatch.setattr(os, 'umask', umask)
+    module = importlib.reload(createDEF)
+    assert module.NEW_FILE_MODE is None
+
+def test_new_file_gets_the_umask_mode(tmp_path):
+    umask = os.umask(0o027)
+    os.umask(umask)
+    path = str(tmp_path / 'N.txt')
+    assert writeDEFfile(path, 'FDC = 24.0;\n')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask == newFileMode()
+
+def test_rewrite_keeps_the_mode_and_skips_unchanged(tmp_path):
+    path = str(tmp_path / 'N.txt')
+    writeDEFfile(path, 'FDC = 24.0;\n')
+    os.chmod(path, 0o600)
+    assert not writeDEFfile(path, 'FDC = 24.0;\n')
+    assert writeDEFfile(path, 'FDC = 25.0;\n')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with open(path) as file:
+        assert file.read() == 'FDC = 25.0;\n'
+    assert os.listdir(tmp_path) == ['N.txt']
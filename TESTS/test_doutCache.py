@@ -0,0 +1,66 @@
+# ========================================================================
+"""        TESTS OF THE BINARY SIDECAR CACHE FOR DOUT OUTPUT FILES      """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from ARULE4PythonUtils import readARULEOutput
+from doutCache import readSidecar, sidecarDirectory, readMeta
+
+### Test Settings
+COLUMNS = ['FLAG', 'DT', 'DA', 'RUL', 'PH', 'SOH', 'BD', 'EOL', 'FDNOM', 'FD', 'FFP', 'DPS', 'FFS', 'FFIN', 'RC0', 'RS0']
+
+### FUNCTIONS
+def writeDOUT(filepath, rows, rul=100.0):
+    data = {column: np.arange(rows, dtype=np.float64) for column in COLUMNS}
+    data['RUL'] = np.full(rows, rul)
+    data['RS0'] = ['OK'] * rows
+    pd.DataFrame(data).to_csv(filepath, index=False)
+
+def test_sidecar_built_then_reused(tmp_path):
+    filepath = str(tmp_path / 'ND_1_DW_S_OUT.csv')
+    writeDOUT(filepath, 20)
+    assert readSidecar(filepath, build=False) is None
+    arrays = readSidecar(filepath, ['DT', 'RUL'])
+    assert arrays['DT'].tolist() == list(range(20))
+    meta = readMeta(sidecarDirectory(filepath))
+    assert readSidecar(filepath, ['RUL']) is not None
+    assert readMeta(sidecarDirectory(filepath))['files'] == meta['files']
+
+def test_rewrite_invalidates_sidecar(tmp_path):
+    filepath = str(tmp_path / 'ND_1_DW_S_OUT.csv')
+    writeDOUT(filepath, 20)
+    old = readSidecar(filepath, ['RUL'])['RUL']
+    writeDOUT(filepath, 30, rul=5.0)
+    os.utime(filepath, ns=(1, 1))
+    assert readSidecar(filepath, build=False) is None
+    new = readSidecar(filepath, ['RUL'])['RUL']
+    assert len(new) == 30 and new[0] == 5.0
+    # The array mapped before the rebuild still reads its own build
+    assert len(old) == 20 and old[0] == 100.0
+
+def test_readARULEOutput_cache_matches_csv(tmp_path):
+    filepath = str(tmp_path / 'ND_1_DW_S_OUT.csv')
+    writeDOUT(filepath, 20)
+    cached = readARULEOutput(filepath)
+    assert os.path.isdir(sidecarDirectory(filepath))
+    parsed = readARULEOutput(filepath, cache=False)
+    for a, b in zip(cached, parsed):
+        assert a.tolist() == b.tolist()
+
+def test_readARULEOutput_read_only_falls_back_to_csv(tmp_path):
+    directory = tmp_path / 'DOUT'
+    directory.mkdir()
+    filepath = str(directory / 'ND_1_DW_S_OUT.csv')
+    writeDOUT(filepath, 10)
+    directory.chmod(0o555)
+    try:
+        if os.access(str(directory), os.W_OK):
+            pytest.skip('the directory stays writable when running as root')
+        assert readARULEOutput(filepath)[3].tolist() == [100.0] * 10
+        assert not os.path.exists(sidecarDirectory(filepath))
+    finally:
+        directory.chmod(0o755)
@@ -0,0 +1,32 @@
+# ========================================================================
+"""        TESTS OF THE SHAPE-PRESERVING DOWNSAMPLING FOR PLOTS        """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import numpy as np
+import pytest
+from downsample import downsampleIndexes
+
+### FUNCTIONS
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_bounded_and_keeps_ends_and_requested(method):
+    x = np.arange(10000, dtype=np.float64)
+    y = np.sin(x / 300.0)
+    indexes = downsampleIndexes(x, y, 400, keep=[1234, -5, 20000], method=method)
+    assert len(indexes) <= 401
+    assert indexes[0] == 0 and indexes[-1] == len(x) - 1
+    assert 1234 in indexes
+    assert np.all(np.diff(indexes) > 0)
+
+def test_minmax_keeps_the_envelope():
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=5000)
+    y[[17, 4000]] = [np.nan, 9.0]
+    indexes = downsampleIndexes(np.arange(5000), y, 200)
+    assert np.nanmax(y[indexes]) == np.nanmax(y) and np.nanmin(y[indexes]) == np.nanmin(y)
+
+def test_short_series_returned_whole():
+    assert downsampleIndexes(np.arange(10), np.arange(10), 100).tolist() == list(range(10))
+    assert len(downsampleIndexes(np.arange(10), np.arange(10), 0)) == 10
+    with pytest.raises(ValueError):
+        downsampleIndexes(np.arange(10), np.arange(10), 5, method='every')
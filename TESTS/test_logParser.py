@@ -0,0 +1,45 @@
+# ========================================================================
+"""          TESTS OF THE STREAMING UD_ARULE LOG FILE PARSER           """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import pytest
+from logParser import parseLevel, parseLogLine, summarizeLog, failedNodes
+
+### FUNCTIONS
+@pytest.mark.parametrize('message, level', [
+    ('0 warnings, 1 error', 'ERROR'),
+    ('No errors found', 'INFO'),
+    ('Errors: none', 'INFO'),
+    ('Errors: none, see ND_1', 'INFO'),
+    ('Warning count: 0', 'INFO'),
+    ('Errors = 0', 'INFO'),
+    ('0 errors', 'INFO'),
+    ('Warnings: 0, errors: 2', 'ERROR'),
+    ('3 warnings', 'WARNING'),
+    ('ERROR: cannot open SP4000_1.txt', 'ERROR'),
+    ('ERROR, aborting', 'ERROR'),
+    ('2024-03-01 02:15:07 WARNING ND_3 FDNV clipped', 'WARNING'),
+    ('Run finished', 'INFO'),
+])
+def test_parse_level(message, level):
+    assert parseLevel(message) == level
+
+def test_parse_log_line_fields():
+    record = parseLogLine('2024-03-01 02:15:07 ND_3_DW_S RC = 2', 'S', 7)
+    assert (record.timestamp, record.node, record.rc, record.lineno) == ('2024-03-01 02:15:07', 3, 2, 7)
+    assert parseLogLine('   ') is None
+
+def test_summarize_log(tmp_path):
+    path = tmp_path / 'UD_ARULE_LOG_S.txt'
+    path.write_text('02:15:07 start, 0 warnings, 0 errors\n'
+                    '02:15:08 ND_1_DW_S RC = 0\n'
+                    '02:15:09 WARNING ND_2 FDNV clipped\n'
+                    '02:15:10 ND_2_DW_S RC = 2\n'
+                    '02:15:11 0 warnings, 1 error\n')
+    summary = summarizeLog(str(path))
+    assert summary.sdefname == 'S'
+    assert (summary.lines, summary.errors, summary.warnings, summary.rc) == (5, 1, 1, 2)
+    assert (summary.first, summary.last) == ('02:15:07', '02:15:11')
+    assert summary.nodes == {1: 0, 2: 2}
+    assert failedNodes([summary]) == [('S', 2, 2)]
@@ -0,0 +1,113 @@
+# ========================================================================
+"""     REGRESSION TESTS OF THE NATIVE ENGINE AGAINST PLOTS/ REFERENCES  """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Reference values are read off the UD_ARULE plots in PLOTS/ (DEMO1_NODE1, DEMO2_NODE1-3),
+so the tolerances are those of reading a plot. From the repository root:
+    python -m pytest -q TESTS
+"""
+### Import Libraries
+import os
+import sys
+import warnings
+import numpy as np
+import pytest
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'UTILS'))
+from inputData import readInput
+from nativeARULE import ARULE_COLUMNS, runARULE
+from onlineARULE import updateARULE
+
+### Test Settings
+DINP = os.path.join(ROOT, 'ARULE', 'DATA', 'DINP')
+DEMO_NODES = {
+    'DEMO1_NODE1': (24.0, 0.0, 5.0, 10, 5, 1.275, 70.0, 220.0, 2, 'SP4000_1', '.txt', '.csv', -9),
+    'DEMO2_NODE1': (24.0, 0.0, 5.0, 10, 5, 1.265, 67.0, 220.0, 2, 'SP4000_1', '.txt', '.csv', -9),
+    'DEMO2_NODE2': (24.0, 0.0, 5.0, 10, 5, 1.285, 73.0, 220.0, 2, 'SP4000_1', '.txt', '.csv', -9),
+    'DEMO2_NODE3': (24.0, 0.0, 5.0, 10, 5, 1.275, 70.0, 220.0, 2, 'SP4000_2', '.csv', '.csv', -9),
+}
+# (BD, EOL) of the reference plots
+REFERENCE_BD_EOL = {'DEMO1_NODE1': (66, 180), 'DEMO2_NODE1': (66, 175), 'DEMO2_NODE2': (66, 182)}
+
+### FUNCTIONS
+# runNode Function
+def runNode(name):
+    """
+    @returns: Dictionary of ARULE_COLUMNS to the native outputs of a DEMO node
+    """
+    params = DEMO_NODES[name]
+    dt, da = readInput(params[9], params[10], DINP)
+    return dict(zip(ARULE_COLUMNS, runARULE(dt, da, params)))
+
+# valueAt Function
+def valueAt(outputs, column, t):
+    """
+    @returns: Value of a column at the sample nearest to time t
+    """
+    return outputs[column][np.argmin(np.abs(outputs['DT'] - t))]
+
+@pytest.mark.parametrize('name', sorted(REFERENCE_BD_EOL))
+def test_bd_eol(name):
+    outputs = runNode(name)
+    bd, eol = REFERENCE_BD_EOL[name]
+    assert abs(outputs['BD'][-1] - bd) <= 1
+    assert abs(outputs['EOL'][-1] - eol) <= 2
+
+def test_signature_scaling():
+    outputs = runNode('DEMO2_NODE1')
+    # FFP is a fraction, negative (-FDNM/100) while healthy
+    assert outputs['FFP'][:60].max() < 0
+    assert abs(outputs['FFP'][0] + 0.05) < 0.01
+    assert abs(outputs['FFP'][-1] - 0.86) < 0.03
+    # FFS & FFIN run past 100 after failure
+    assert abs(outputs['FFIN'].max() - 122) < 5
+    assert np.array_equal(outputs['FFS'], outputs['FFIN'])
+
+def test_soh_starts_at_100():
+    outputs = runNode('DEMO2_NODE1')
+    bd = np.flatnonzero(outputs['FFIN'] > 0)[0]
+    assert np.all(outputs['SOH'][:bd] == 100)
+    assert outputs['SOH'][bd] > 97
+    assert np.abs(np.diff(outputs['SOH'])).max() < 5
+    assert outputs['SOH'][-1] == 0
+
+def test_rul_tracks_reference():
+    outputs = runNode('DEMO2_NODE1')
+    assert np.all(outputs['RUL'][outputs['DT'] < 66] == 220)
+    assert np.all(np.diff(outputs['RUL'][outputs['DT'] < 66]) == 0)
+    # No collapse after BD while the first fit points accumulate
+    assert valueAt(outputs, 'RUL', 70) > 100
+    for t, rul in ((100, 64), (125, 54), (150, 30)):
+        assert abs(valueAt(outputs, 'RUL', t) - rul) < 12
+    assert abs(outputs['PH'][-1] - 111) < 10
+
+def test_rul_held_while_ffin_is_zero():
+    outputs = runNode('DEMO2_NODE3')
+    gap = (outputs['DT'] >= 110) & (outputs['DT'] <= 125)
+    assert np.all(outputs['FFIN'][gap] == 0)
+    assert np.ptp(outputs['RUL'][gap]) == 0
+    assert abs(outputs['RUL'][gap][0] - 92) < 15
+    assert abs(outputs['RUL'][-1] - 10) < 10
+
+def test_zero_fd0():
+    dt = np.arange(50.0)
+    da = np.linspace(0.0, 1.0, 50)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        outputs = dict(zip(ARULE_COLUMNS, runARULE(dt, da, (0.0, 0.0, 5.0, 0, 5, 1.2, 70.0, 100.0, 2, 'X', '.csv', '.csv', -9))))
+    assert np.all(np.isfinite(outputs['FFP']))
+    assert np.all(outputs['SOH'] == 100)
+    assert np.all(np.isnan(outputs['BD']))
+
+@pytest.mark.parametrize('step', [1, 7, 64])
+def test_online_matches_batch(step):
+    params = DEMO_NODES['DEMO2_NODE3']
+    dt, da = readInput(params[9], params[10], DINP)
+    expected = runARULE(dt, da, params)
+    state, parts = None, []
+    for start in range(0, len(dt), step):
+        outputs, state = updateARULE(state, dt[start:start+step], da[start:start+step], params)
+        parts.append(outputs)
+    for column, values in zip(expected, zip(*parts)):
+        np.testing.assert_allclose(np.concatenate(values), column, equal_nan=True)
@@ -0,0 +1,46 @@
+# ========================================================================
+"""        TESTS OF THE STRUCTURE-OF-ARRAYS NODE PARAMETER REGISTRY     """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import numpy as np
+import pytest
+from conftest import DEMO2_NODE1
+from nodeRegistry import NodeRegistry
+from parseDEF import readDEFrecords
+
+### FUNCTIONS
+def test_out_of_range_values_reach_validate():
+    bad = DEMO2_NODE1[:3] + (40000,) + DEMO2_NODE1[4:8] + (200,) + DEMO2_NODE1[9:]
+    registry = NodeRegistry.fromNodeParams(['GOOD', 'BAD'], [DEMO2_NODE1, bad])
+    problems = registry.validate()
+    assert problems['FDCPTS must be 0-25'].tolist() == [1]
+    assert problems['PIFFSMOD must be 1-5'].tolist() == [1]
+    assert registry.nodeParams(1)[3] == 40000
+
+def test_fractional_integer_field_rejected():
+    with pytest.raises(ValueError, match='FDPTS'):
+        NodeRegistry.fromNodeParams(['N'], [DEMO2_NODE1[:4] + (2.5,) + DEMO2_NODE1[5:]])
+
+def test_lookups():
+    registry = NodeRegistry.fromNodeParams(['A', 'B', 'C'], [DEMO2_NODE1] * 3, ndnumids=[30, 10, 20])
+    assert registry.indexOfId(20) == 2
+    assert registry.indexOfId([10, 99]).tolist() == [1, -1]
+    assert registry.indexOfName('C') == 2
+    assert registry.indexOfName('D') == -1
+    assert registry.validate() == {}
+
+def test_def_round_trip(tmp_path):
+    node_params = [DEMO2_NODE1, DEMO2_NODE1[:5] + (1.285, 73.0) + DEMO2_NODE1[7:]]
+    registry = NodeRegistry.fromNodeParams(['R_N1', 'R_N2'], node_params)
+    directory = str(tmp_path / 'ARULE')
+    for subdir in ('SDEF', 'NDEF'):
+        os.makedirs(os.path.join(directory, 'DEFS', subdir))
+    assert registry.writeDEFs('R', directory) == (3, 0)
+    assert registry.writeDEFs('R', directory) == (0, 3)
+    records = readDEFrecords('R', directory)
+    assert [record.nodeParams() for record in records] == node_params
+    copy = NodeRegistry.fromRecords(records)
+    for name in ('NDNUMID', 'FDNV', 'FFPFAIL', 'INFILE', 'NDFNAME'):
+        np.testing.assert_array_equal(copy.column(name), registry.column(name))
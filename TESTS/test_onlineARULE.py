@@ -0,0 +1,71 @@
+# ========================================================================
+"""        TESTS OF THE INCREMENTAL (ONLINE) UPDATES & CPT CHECKPOINTS  """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import DEMO2_NODE1
+from inputData import readInput
+from nativeARULE import ARULE_COLUMNS, runARULE
+from onlineARULE import loadCheckpoint, updateARULE, updateNodeARULE
+
+### FUNCTIONS
+# demoInput Function
+def demoInput(arule_root):
+    """
+    @returns: dt, da of SP4000_1 in the scratch tree
+    """
+    return readInput('SP4000_1', '.txt', os.path.join(arule_root, 'ARULE', 'DATA', 'DINP'))
+
+# readDOUT Function
+def readDOUT(arule_root):
+    """
+    @returns: DataFrame of the DOUT file of node 1 of system S
+    """
+    return pd.read_csv(os.path.join(arule_root, 'ARULE', 'DATA', 'DOUT', 'ND_1_DW_S_SP4000_1_OUT.csv'))
+
+def test_empty_batch_keeps_state():
+    outputs, state = updateARULE(None, [], [], DEMO2_NODE1)
+    assert all(len(output) == 0 for output in outputs)
+    outputs, state = updateARULE(state, np.arange(20.0), np.full(20, 24.0), DEMO2_NODE1)
+    outputs, after = updateARULE(state, [], [], DEMO2_NODE1)
+    assert all(len(output) == 0 for output in outputs)
+    for key, value in state.items():
+        np.testing.assert_array_equal(after[key], value)
+    assert all(len(output) == 0 for output in runARULE([], [], DEMO2_NODE1))
+
+def test_other_params_rejected():
+    _, state = updateARULE(None, np.arange(20.0), np.full(20, 24.0), DEMO2_NODE1)
+    with pytest.raises(ValueError):
+        updateARULE(state, [20.0], [24.0], DEMO2_NODE1[:5] + (1.3,) + DEMO2_NODE1[6:])
+
+def test_node_updates_append_full_history(arule_root):
+    dt, da = demoInput(arule_root)
+    directory = os.path.join(arule_root, 'ARULE')
+    for start in range(0, len(dt), 50):
+        rows = updateNodeARULE('S', 'S_N1', 1, dt[start:start+50], da[start:start+50], DEMO2_NODE1, directory)
+        assert len(rows[0]) == len(dt[start:start+50])
+    expected = runARULE(dt, da, DEMO2_NODE1)
+    np.testing.assert_allclose(readDOUT(arule_root)['RUL'], expected[ARULE_COLUMNS.index('RUL')], rtol=1e-9)
+    state = loadCheckpoint('S', 'S_N1', os.path.join(directory, 'DATA', 'CPT'))
+    assert state['NSEEN'] == len(dt)
+
+@pytest.mark.parametrize('change', ['missing_dout', 'params'])
+def test_unusable_checkpoint_rebuilds_from_dinp(arule_root, change):
+    dt, da = demoInput(arule_root)
+    directory = os.path.join(arule_root, 'ARULE')
+    params = DEMO2_NODE1
+    updateNodeARULE('S', 'S_N1', 1, dt[:150], da[:150], params, directory)
+    if change == 'missing_dout':
+        os.remove(os.path.join(directory, 'DATA', 'DOUT', 'ND_1_DW_S_SP4000_1_OUT.csv'))
+    else:
+        params = params[:5] + (1.285, 73.0) + params[7:]
+    rows = updateNodeARULE('S', 'S_N1', 1, dt[150:], da[150:], params, directory)
+    expected = runARULE(dt, da, params)
+    table = readDOUT(arule_root)
+    assert len(table) == len(dt)
+    np.testing.assert_allclose(table['SOH'], expected[ARULE_COLUMNS.index('SOH')], rtol=1e-9)
+    np.testing.assert_allclose(rows[ARULE_COLUMNS.index('RUL')], expected[ARULE_COLUMNS.index('RUL')][150:])
@@ -0,0 +1,39 @@
+# ========================================================================
+"""         TESTS OF THE PROCESS-POOL PARALLEL PLOT RENDERING          """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import pytest
+from conftest import DEMO2_NODE1
+from batchRunner import runSystem
+from parallelPlot import initPlotWorker, plotJob
+
+### FIXTURES
+@pytest.fixture
+def plot_root(arule_root, fake_exe, monkeypatch):
+    """
+    @returns: Root with the DOUT of node 1 of system PAIR (the DOUT of node 2 is missing)
+    """
+    monkeypatch.setenv('FAKE_EXE_SKIP', '2')
+    runSystem(('PAIR', ['N1', 'N2'], [DEMO2_NODE1, DEMO2_NODE1]), arule_root, exe=fake_exe)
+    monkeypatch.chdir(arule_root)
+    initPlotWorker(arule_root)
+    return arule_root
+
+### FUNCTIONS
+def test_failure_stays_with_its_node(plot_root):
+    ndefparams = [[1, 'PAIR_N1', *DEMO2_NODE1], [2, 'PAIR_N2', *DEMO2_NODE1]]
+    first, second = plotJob('PAIR', ndefparams)
+    assert first['error'] == '' and os.path.exists(first['file'])
+    assert 'FileNotFoundError' in second['error'] and second['file'] is None
+    assert first['seconds'] > 0 and second['seconds'] > 0
+
+def test_force_reaches_every_node(plot_root):
+    ndefparams = [[1, 'PAIR_N1', *DEMO2_NODE1]]
+    path = plotJob('PAIR', ndefparams)[0]['file']
+    os.utime(path, ns=(1, 1))
+    plotJob('PAIR', ndefparams)
+    assert os.stat(path).st_mtime_ns == 1
+    plotJob('PAIR', ndefparams, force=True)
+    assert os.stat(path).st_mtime_ns != 1
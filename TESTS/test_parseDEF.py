@@ -0,0 +1,61 @@
+# ========================================================================
+"""          TESTS OF THE SINGLE-PASS SDEF/NDEF PARSER & CACHE         """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import dataclasses
+import os
+import pytest
+import parseDEF
+from conftest import DEMO2_NODE1
+from createDEF import writeDEFs
+from parseDEF import cachedParse, parseNDEFText, readDEFrecords, readSDEF, tokenizeDEF
+
+### FIXTURES
+@pytest.fixture
+def def_directory(tmp_path):
+    """
+    @returns: ARULE directory holding SDEF S with the nodes S_N1 & S_N2
+    """
+    directory = str(tmp_path / 'ARULE')
+    for subdir in ('SDEF', 'NDEF'):
+        os.makedirs(os.path.join(directory, 'DEFS', subdir))
+    node2 = DEMO2_NODE1[:5] + (1.285, 73.0) + DEMO2_NODE1[7:]
+    writeDEFs([(1, 'S_N1', -9), (2, 'S_N2', -9)], 'S', [('S_N1', DEMO2_NODE1), ('S_N2', node2)],
+              os.path.join(directory, 'DEFS'))
+    return directory
+
+### FUNCTIONS
+def test_tokenize_drops_comments():
+    assert tokenizeDEF("FDC = 24.0; % comment\nINFILE = 'SP4000_1';") == [('FDC', '24.0'), ('INFILE', 'SP4000_1')]
+
+def test_round_trip(def_directory):
+    assert readSDEF('S', def_directory).NODES == ((1, 'S_N1'), (2, 'S_N2'))
+    records = readDEFrecords('S', def_directory)
+    assert records[0].nodeParams() == DEMO2_NODE1
+    assert (records[1].NDNUMID, records[1].FDNV, records[1].FFPFAIL) == (2, 1.285, 73.0)
+
+def test_callers_cannot_change_the_cache(def_directory):
+    ndefpath = os.path.join(def_directory, 'DEFS', 'NDEF', 'S_N1.txt')
+    cachedParse(ndefpath, parseNDEFText)['FDNV'] = 99.0
+    assert cachedParse(ndefpath, parseNDEFText)['FDNV'] == 1.265
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        readSDEF('S', def_directory).ENDDEF = 0
+
+def test_replaced_file_with_same_size_and_mtime(def_directory):
+    ndefpath = os.path.join(def_directory, 'DEFS', 'NDEF', 'S_N1.txt')
+    before = os.stat(ndefpath)
+    assert cachedParse(ndefpath, parseNDEFText)['FDNV'] == 1.265
+    with open(ndefpath) as file:
+        text = file.read().replace('1.265', '1.275')
+    with open(ndefpath + '.new', 'w') as file:
+        file.write(text)
+    os.replace(ndefpath + '.new', ndefpath)
+    os.utime(ndefpath, ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert cachedParse(ndefpath, parseNDEFText)['FDNV'] == 1.275
+
+def test_cache_is_bounded(def_directory, monkeypatch):
+    monkeypatch.setattr(parseDEF, 'PARSE_CACHE_SIZE', 1)
+    parseDEF.PARSE_CACHE.clear()
+    readDEFrecords('S', def_directory)
+    assert list(parseDEF.PARSE_CACHE) == [(os.path.abspath(os.path.join(def_directory, 'DEFS', 'NDEF', 'S_N2.txt')), parseNDEFText)]
@@ -0,0 +1,28 @@
+# ========================================================================
+"""          TESTS OF THE SKIP-IF-FRESH ARULE PLOT RENDER CACHE        """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from plotCache import FINGERPRINT_KEY, isPlotFresh, plotFingerprint
+
+### FUNCTIONS
+def test_fingerprint_follows_contents_and_options(tmp_path):
+    dout = tmp_path / 'ND_1_DW_S_OUT.csv'
+    dout.write_text('DT,RUL\n1,2\n')
+    fingerprint = plotFingerprint(str(dout), {'max_points': None})
+    assert plotFingerprint(str(dout), {'max_points': None}) == fingerprint
+    assert plotFingerprint(str(dout), {'max_points': 100}) != fingerprint
+    dout.write_text('DT,RUL\n1,3\n')
+    assert plotFingerprint(str(dout), {'max_points': None}) != fingerprint
+
+def test_fresh_only_with_the_same_fingerprint(tmp_path):
+    png = str(tmp_path / 'S_N1_ARULEOut.png')
+    assert not isPlotFresh(png, 'abc')
+    figure = plt.figure()
+    figure.savefig(png, metadata={FINGERPRINT_KEY: 'abc'})
+    plt.close(figure)
+    assert isPlotFresh(png, 'abc')
+    assert not isPlotFresh(png, 'abd')
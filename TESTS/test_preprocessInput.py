@@ -0,0 +1,38 @@
+# ========================================================================
+"""      TESTS OF THE CONSTANT-MEMORY STREAMING INPUT REDUCTION        """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import numpy as np
+import pytest
+from preprocessInput import InputReducer, reduceNodeParams
+from conftest import DEMO2_NODE1
+
+### FUNCTIONS
+def reduceInChunks(dt, da, chunk_rows, **options):
+    reducer = InputReducer(**options)
+    parts = [reducer.process(dt[i:i+chunk_rows], da[i:i+chunk_rows]) for i in range(0, len(dt), chunk_rows)]
+    parts.append(reducer.finish())
+    return np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts]), reducer
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 64, 1000])
+def test_chunking_does_not_change_the_result(chunk_rows):
+    rng = np.random.default_rng(0)
+    dt = np.arange(1000, dtype=np.float64)
+    da = 5.0 + 0.01 * dt + rng.normal(0, 0.1, len(dt))
+    da[np.arange(20, 1000, 50)] += 50.0
+    options = {'decimate': 3, 'block': 4, 'fdnm': 5.0, 'outlier_factor': 3.0}
+    whole_dt, whole_da, whole = reduceInChunks(dt, da, len(dt), **options)
+    dt_out, da_out, reducer = reduceInChunks(dt, da, chunk_rows, **options)
+    assert np.array_equal(dt_out, whole_dt) and np.allclose(da_out, whole_da)
+    assert (reducer.rejected, reducer.rows_out) == (whole.rejected, whole.rows_out)
+    assert whole.rejected >= 20
+
+def test_ramp_near_zero_is_kept():
+    dt = np.arange(200, dtype=np.float64)
+    _, _, reducer = reduceInChunks(dt, 1e-3 * dt, 50, outlier_factor=3.0, fdnm=5.0)
+    assert reducer.rejected == 0
+
+def test_reduce_node_params():
+    params = reduceNodeParams(DEMO2_NODE1, 'SP4000_1_R5', block=5)
+    assert params[3:5] == (2, 1) and params[9] == 'SP4000_1_R5'
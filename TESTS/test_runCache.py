@@ -0,0 +1,40 @@
+# ========================================================================
+"""            TESTS OF THE CONTENT-HASH UD_ARULE RUN CACHE            """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+from conftest import DEMO2_NODE1
+from batchRunner import writeSystemDEFs
+from runCache import computeRunKey, restoreRun, storeRun
+
+### Test Settings
+ARGS = ['S', '2', '0', '1']
+
+### FUNCTIONS
+def test_key_follows_definitions_inputs_and_arguments(arule_root):
+    directory = os.path.join(arule_root, 'ARULE')
+    writeSystemDEFs(('S', ['N1'], [DEMO2_NODE1]), arule_root)
+    key = computeRunKey('S', ARGS, directory)
+    assert computeRunKey('S', ARGS, directory) == key
+    assert computeRunKey('S', ARGS[:-1] + ['2'], directory) != key
+    with open(os.path.join(directory, 'DATA', 'DINP', 'SP4000_1.txt'), 'a') as file:
+        file.write('\n')
+    changed_input = computeRunKey('S', ARGS, directory)
+    assert changed_input != key
+    writeSystemDEFs(('S', ['N1'], [DEMO2_NODE1[:5] + (1.285,) + DEMO2_NODE1[6:]]), arule_root)
+    assert computeRunKey('S', ARGS, directory) not in (key, changed_input)
+
+def test_store_and_restore(tmp_path):
+    source = tmp_path / 'source'
+    for subdir, filename in (('DOUT', 'ND_1_DW_S_OUT.csv'), ('LOG', 'UD_ARULE_LOG_S.txt')):
+        (source / 'DATA' / subdir).mkdir(parents=True)
+        (source / 'DATA' / subdir / filename).write_text(subdir)
+    cache_dir = str(tmp_path / 'CACHE')
+    target = str(tmp_path / 'target')
+    assert restoreRun('KEY', target, cache_dir) is None
+    storeRun('KEY', str(source), cache_dir)
+    restored = restoreRun('KEY', target, cache_dir)
+    assert sorted(os.path.basename(path) for path in restored) == ['ND_1_DW_S_OUT.csv', 'UD_ARULE_LOG_S.txt']
+    with open(os.path.join(target, 'DATA', 'DOUT', 'ND_1_DW_S_OUT.csv')) as file:
+        assert file.read() == 'DOUT'
@@ -0,0 +1,36 @@
+# ========================================================================
+"""          TESTS OF THE NDEF PARAMETER SWEEPS & SENSITIVITY          """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import numpy as np
+import pytest
+from conftest import DEMO2_NODE1
+from sweep import expandGrid, runSweep
+
+### Test Settings
+DEMO2_GRID = {'FDNV': [1.265, 1.285, 1.275], 'FFPFAIL': [67, 73, 70]}
+
+### FUNCTIONS
+def test_expand_grid_and_zip():
+    points, node_params = expandGrid(DEMO2_NODE1, DEMO2_GRID)
+    assert len(points) == 9 and points[1] == {'FDNV': 1.265, 'FFPFAIL': 73.0}
+    points, node_params = expandGrid(DEMO2_NODE1, DEMO2_GRID, mode='zip')
+    assert [params[5:7] for params in node_params] == [(1.265, 67.0), (1.285, 73.0), (1.275, 70.0)]
+    assert node_params[0] == DEMO2_NODE1
+    with pytest.raises(ValueError, match='Unknown NDEF fields'):
+        expandGrid(DEMO2_NODE1, {'FDNX': [1]})
+    with pytest.raises(ValueError, match='same number'):
+        expandGrid(DEMO2_NODE1, {'FDNV': [1, 2], 'FFPFAIL': [3]}, mode='zip')
+
+def test_native_sweep(arule_root):
+    table = runSweep(DEMO2_NODE1, DEMO2_GRID, mode='zip', engine='native', max_workers=1, root=arule_root)
+    assert table['POINT'].tolist() == [0, 1, 2]
+    assert np.isfinite(table['SOH']).all()
+
+def test_exe_sweep_missing_dout_fails_one_point(arule_root, fake_exe, monkeypatch):
+    monkeypatch.setenv('FAKE_EXE_SKIP', '2')
+    table = runSweep(DEMO2_NODE1, DEMO2_GRID, mode='zip', max_workers=1, root=arule_root, exe=fake_exe)
+    assert table['RC'].tolist() == [0, -1, 0]
+    assert 'FileNotFoundError' in table['ERROR'][1] and table['ERROR'][0] == ''
+    assert np.isnan(table['SOH'][1]) and np.isfinite(table['SOH'][[0, 2]]).all()
@@ -0,0 +1,54 @@
+# ========================================================================
+"""          TESTS OF THE LIVE TAILING READER FOR DOUT FILES           """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+from tailARULE import DOUTTail
+
+### FUNCTIONS
+def test_partial_rows_wait_for_their_newline(tmp_path):
+    path = tmp_path / 'DOUT.csv'
+    path.write_text('DT,RUL,SOH\n1,10,100\n2,9,9')
+    tail = DOUTTail(str(path))
+    assert tail.poll()['DT'].tolist() == [1.0]
+    with open(path, 'a') as file:
+        file.write('0\n3,8,80\n')
+    batch = tail.poll()
+    assert batch['SOH'].tolist() == [90.0, 80.0]
+    assert tail.poll() is None and tail.rows == 3
+
+def test_rewrite_starts_over(tmp_path):
+    path = tmp_path / 'DOUT.csv'
+    path.write_text('DT,RUL,SOH\n1,10,100\n2,9,90\n')
+    tail = DOUTTail(str(path))
+    assert len(tail.poll()['DT']) == 2
+    # A new run replaces the file (new inode) with fewer rows
+    (tmp_path / 'new.csv').write_text('DT,RUL,SOH\n5,1,10\n')
+    os.replace(tmp_path / 'new.csv', path)
+    assert tail.poll()['DT'].tolist() == [5.0]
+
+def test_truncated_in_place_starts_over(tmp_path):
+    path = tmp_path / 'DOUT.csv'
+    path.write_text('DT,RUL,SOH\n1,10,100\n2,9,90\n')
+    tail = DOUTTail(str(path))
+    tail.poll()
+    with open(path, 'w') as file:
+        file.write('DT,RUL,SOH\n7,1,1\n')
+    assert tail.poll()['DT'].tolist() == [7.0]
+
+def test_skip_existing_until_rewritten(tmp_path):
+    path = tmp_path / 'DOUT.csv'
+    path.write_text('DT,RUL,SOH\n1,10,100\n')
+    tail = DOUTTail(str(path), skip_existing=True)
+    assert tail.poll() is None
+    (tmp_path / 'new.csv').write_text('DT,RUL,SOH\n2,9,90\n')
+    os.replace(tmp_path / 'new.csv', path)
+    assert tail.poll()['DT'].tolist() == [2.0]
+
+def test_final_poll_reads_unterminated_row(tmp_path):
+    path = tmp_path / 'DOUT.csv'
+    path.write_text('DT,RUL,SOH\n1,10,100')
+    tail = DOUTTail(str(path))
+    assert tail.poll() is None
+    assert tail.poll(final=True)['RUL'].tolist() == [10.0]
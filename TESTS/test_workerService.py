@@ -0,0 +1,38 @@
+# ========================================================================
+"""          TESTS OF THE PERSISTENT LOCAL ARULE JOB SERVICE           """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import time
+import pytest
+from conftest import DEMO2_NODE1
+from workerService import ARULEService, validateSystem
+
+### FUNCTIONS
+def waitJobs(service, job_ids, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs = [service.status(job_id) for job_id in job_ids]
+        if all(job['state'] in ('done', 'failed') for job in jobs):
+            return jobs
+        time.sleep(0.05)
+    raise TimeoutError(f'Jobs {job_ids} did not finish.')
+
+def test_invalid_names_rejected():
+    with pytest.raises(ValueError, match='Invalid names'):
+        validateSystem(('../S', ['N1'], [DEMO2_NODE1]))
+    with pytest.raises(ValueError):
+        validateSystem(('S', ['N1', 'N2'], [DEMO2_NODE1]))
+
+def test_jobs_of_one_system_do_not_overlap(arule_root):
+    service = ARULEService(arule_root, max_workers=2)
+    try:
+        system = ('SAME', ['N1', 'N2'], [DEMO2_NODE1, DEMO2_NODE1])
+        first, second = waitJobs(service, [service.submit(system, 'native') for _ in range(2)])
+        other = waitJobs(service, [service.submit(('OTHER', ['N1'], [DEMO2_NODE1]), 'native')])[0]
+    finally:
+        service.executor.shutdown(wait=True, cancel_futures=True)
+    assert [first['state'], second['state'], other['state']] == ['done'] * 3
+    assert second['started'] >= first['finished']
+    assert set(second['result']['nodes']) == {'SAME_N1', 'SAME_N2'}
+    assert service.running == set() and service.parked == {}
@@ -0,0 +1,181 @@
+# ========================================================================
+"""            PLOTTING UTILITIES FOR ARULE IN PYTHON DEMO             """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+
+# Import Libraries and Functions
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.ticker import AutoMinorLocator
+import matplotlib.font_manager as font_manager
+from ARULE4PythonUtils import readARULEOutput, findBDandEOL
+from downsample import downsampleIndexes
+from plotCache import FINGERPRINT_KEY, isPlotFresh, plotFingerprint
+from metrics import report, stage
+
+### CLASSES
+# ARULEFigure Class
+class ARULEFigure:
+    """
+    Styled 4x2 ARULE output figure whose artists are created once and updated per node.
+
+    Building the figure, fonts, legends, tick styling & layout is most of the cost of a
+    plot; update() only swaps the data of the existing lines, markers & BD/EOL lines.
+    Long series are downsampled to max_points (4 per pixel column of an axes by default)
+    and the lines are rasterized, so plot time is bounded by the figure resolution.
+    """
+    def __init__(self):
+        self.figure, self.ax = plt.subplots(4,2, figsize=(25,12), sharex=True)
+        f, ax = self.figure, self.ax
+        title_font = font_manager.FontProperties(family= 'Sans Serif', weight='bold', style='normal', size=20)
+        label_font = font_manager.FontProperties(family= 'Sans Serif', weight='bold', style='normal', size=16)
+        self.legend_font = font_manager.FontProperties(family= 'Sans Serif', weight='bold', style='normal', size=12)
+        self.titletext = f.suptitle('', fontproperties=title_font)
+        self.titletext.set_color('blue')
+        marker = lambda a, color: a.scatter([], [], s=100, lw=2, color=color, edgecolor=color, facecolors='none')
+        # Plot FD
+        self.da_line, = ax[0,0].plot([], [], 'k-', lw = 2, label=f'Feature Data', rasterized=True)
+        self.bd_vline = ax[0,0].vlines([0], 0, 1, linestyle='--', lw=3, color='green', label='Beginning of Degradation')
+        self.eol_vline = ax[0,0].vlines([0], 0, 1, linestyle='--', lw=3, color='red', label='End of Life')
+        ax[0,0].set_ylabel(r'FD [AU]', fontproperties=label_font)
+        # Plot SoH, RUL/PH, FFP, DPS, FFS & FFIN with BD/EOL markers
+        self.lines = {}
+        self.markers = []
+        for key, a, style, label, ylabel in [('SOH', ax[1,0], 'k-', 'State-of-Health', r'SoH [%]'),
+                                             ('RUL', ax[2,0], 'm-', 'Remaining Useful Life', r'RUL/PH [AU]'),
+                                             ('PH', ax[2,0], 'c-', 'Prognostic Horizon', r'RUL/PH [AU]'),
+                                             ('FFP', ax[0,1], 'k-', 'FFP Signature', r'FFP [AU]'),
+                                             ('DPS', ax[1,1], 'k-', 'DPS Signature', r'DPS [AU]'),
+                                             ('FFS', ax[2,1], 'k-', 'FFS Signature', r'FFS [AU]'),
+                                             ('FFIN', ax[3,1], 'k-', 'Functional Failure Input', r'FFIN [AU]')]:
+            self.lines[key], = a.plot([], [], style, lw = 2, label=label, rasterized=True)
+            a.set_ylabel(ylabel, fontproperties=label_font)
+            if key != 'PH':
+                self.markers.append((key, 'BD', marker(a, 'green')))
+            self.markers.append((key, 'EOL', marker(a, 'red')))
+        ax[2,0].set_xlabel(r'Time [AU]', fontproperties=label_font)
+        ax[2,0].xaxis.set_tick_params(which='both', labelbottom=True)
+        ax[3,0].axis('off')
+        ax[3,1].set_xlabel(r'Time [AU]', fontproperties=label_font)
+        for a in ax.flat:
+            a.grid("on")
+            if a.get_legend_handles_labels()[0]:
+                a.legend(loc='best', prop=self.legend_font)
+            a.xaxis.set_minor_locator(AutoMinorLocator())
+            a.yaxis.set_minor_locator(AutoMinorLocator())
+        self.max_points = 4 * int(np.ceil(ax[0,0].bbox.width))
+        self.laid_out = False
+
+    def layout(self):
+        """
+        Run tight_layout & the tick label styling (once per template, or per node without reuse).
+        """
+        self.figure.tight_layout(h_pad=1, w_pad=3)
+        self.figure.subplots_adjust(hspace=0.1)
+        for a in self.ax.flat:
+            plt.setp(a.xaxis.get_majorticklabels(), size='large')
+            plt.setp(a.yaxis.get_majorticklabels(), size='large')
+            plt.setp(a.xaxis.get_minorticklabels(), size='large')
+            plt.setp(a.yaxis.get_minorticklabels(), size='large')
+        self.laid_out = True
+
+    def update(self, ndefname, dt, da, soh, rul, ph, ffp, dps, ffs, ffin, bd_time_index, eol_time_index, max_points=None, method='minmax'):
+        """
+        Replace the plotted data with the results of one node & rescale the axes.
+
+        ndefname: Name of the NDEF (used in the title)
+        dt, da, soh, rul, ph, ffp, dps, ffs, ffin: Columns returned by readARULEOutput
+        bd_time_index, eol_time_index: Indexes returned by findBDandEOL
+        max_points: Maximum number of samples drawn per line (None = derived from the figure size, 0 = all samples)
+        method: Downsampling method, 'minmax' or 'lttb' (see downsample.py)
+        """
+        dt, da = np.asarray(dt), np.asarray(da)
+        series = {'SOH': np.asarray(soh), 'RUL': np.asarray(rul), 'PH': np.asarray(ph), 'FFP': np.asarray(ffp),
+                  'DPS': np.asarray(dps), 'FFS': np.asarray(ffs), 'FFIN': np.asarray(ffin)}
+        index = {'BD': bd_time_index, 'EOL': eol_time_index}
+        max_points = self.max_points if max_points is None else max_points
+        keep = np.concatenate((np.ravel(bd_time_index), np.ravel(eol_time_index)))
+        self.titletext.set_text(f"{ndefname} ARULE Output")
+        drawn = downsampleIndexes(dt, da, max_points, keep, method)
+        self.da_line.set_data(dt[drawn], da[drawn])
+        da_min, da_max = np.amin(da), np.amax(da)
+        self.bd_vline.set_segments([[(x, da_min), (x, da_max)] for x in dt[bd_time_index]])
+        self.eol_vline.set_segments([[(x, da_min), (x, da_max)] for x in dt[eol_time_index]])
+        for key, values in series.items():
+            drawn = downsampleIndexes(dt, values, max_points, keep, method)
+            self.lines[key].set_data(dt[drawn], values[drawn])
+        for key, event, collection in self.markers:
+            collection.set_offsets(np.column_stack((dt[index[event]], series[key][index[event]])))
+        for a in self.ax.flat:
+            a.relim()
+            a.autoscale_view()
+        self.ax[0,0].set_ylim(da_min, da_max)
+        return None
+
+    def save(self, filepath, fingerprint=None):
+        """
+        Save the figure, laying it out first if that has not happened yet.
+
+        filepath: Path to the PNG
+        fingerprint: Render cache fingerprint stored in the PNG (see plotCache.py)
+        """
+        if not self.laid_out:
+            self.layout()
+        metadata = {FINGERPRINT_KEY: fingerprint} if fingerprint is not None else None
+        self.figure.savefig(filepath, metadata=metadata)
+        return None
+
+### FUNCTIONS
+# plotARULEOutput Function
+def plotARULEOutput(sdefname, ndefparams, show=True, reuse_figure=False, max_points=None, force=False, cache=True, template=None):
+    """
+    Plot contents of the ARULE .csv output for a particular run.
+
+    sdefname: Name of the SDEF
+    ndefparams: A list of the contents in the NDEF for all nodes (readDEFcontents lists or parseDEF NDEFRecords)
+    show: Show plots (True/False)
+    reuse_figure: Build the styled figure & layout once and only update the data per node (True/False, needs show=False)
+    max_points: Maximum number of samples drawn per line (None = derived from the figure size, 0 = all samples)
+    force: Re-render plots that are up to date with their DOUT file & options (True/False)
+    cache: Read the DOUT files through their binary sidecars (True/False, see readARULEOutput)
+    template: ARULEFigure to draw every node into, owned & closed by the caller (None = see reuse_figure)
+    @returns: A plot of DA, RUL, PH, SOH, FD, FFP, DPS, FFS, FFIN in the PLOTS/ directory
+    """
+    shared = template is not None
+    save_directory = 'PLOTS'
+    for params in ndefparams:
+        if hasattr(params, 'NDFNAME'):
+            ndefid, ndefname, infile, outtype = params.NDNUMID, params.NDFNAME, params.INFILE, params.OUTTYPE
+        else:
+            ndefid, ndefname, infile, outtype = params[0], params[1], params[11], params[13]
+        output_folder = os.path.join('ARULE', 'DATA', 'DOUT')
+        output_filename = f'ND_{ndefid}_DW_{sdefname}_{infile}_OUT{outtype}'
+        output_filepath = os.path.join(output_folder, output_filename)
+        plot_filename = f"{ndefname}_ARULEOut.png"
+        fingerprint = plotFingerprint(output_filepath, {'sdefname': sdefname, 'ndefname': ndefname, 'max_points': max_points})
+        if not force and not show and isPlotFresh(os.path.join(save_directory, plot_filename), fingerprint):
+            report(f'{plot_filename} is up to date, skipping {ndefname}.', 'yellow')
+            continue
+        report(f'Reading ARULE Results for {ndefname} ...', 'green')
+        flag, dt, da, rul, ph, soh, bd, eol, fdnom, fd, ffp, dps, ffs, ffin, rc0, rs0, rs1 = readARULEOutput(output_filepath, cache)
+        report(f'Finished Reading ARULE Results for {ndefname}!', 'green')
+        report(f'Plotting ARULE Results for {ndefname} ...', 'green')
+        with stage('plotARULEOutput', ndefname):
+            bd_time_index, eol_time_index = findBDandEOL(dt,bd,eol)
+            if reuse_figure and not show and template is None:
+                template = ARULEFigure()
+            figure = template if template is not None else ARULEFigure()
+            figure.update(ndefname, dt, da, soh, rul, ph, ffp, dps, ffs, ffin, bd_time_index[0], eol_time_index[0], max_points)
+            if not os.path.exists(save_directory):
+                os.makedirs(save_directory)
+            figure.save(os.path.join(save_directory, plot_filename), fingerprint)
+        if show == True:
+            plt.show()
+        if template is None:
+            plt.close(figure.figure)
+        report(f'Finished Plotting ARULE Results for {ndefname}!', 'green')
+        report(f'{plot_filename} can be located in ARULE4Python/{save_directory}.', 'yellow')
+    if template is not None and not shared:
+        plt.close(template.figure)
+    return None
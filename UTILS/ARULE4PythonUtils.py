@@ -7,14 +7,13 @@
 import re
 import os
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.ticker import AutoMinorLocator
-import matplotlib.dates as mdates
-import matplotlib.font_manager as font_manager
-import matplotlib.patches as patches
-from matplotlib.transforms import Bbox
 from termcolor import colored
+from doutCache import readSidecar
+from metrics import instrument
+
+# The plotting stack (matplotlib) lives in ARULE4PythonPlot & pandas is imported on
+# first use, so definition parsing & output reading start without either of them
+PLOT_NAMES = ('ARULEFigure',)
 
 ### FUNCTIONS
 # readlog Function
@@ -25,16 +24,16 @@ def readlog(sdefname):
     sdefname: Name of the SDEF
     @returns: None
     """
-    log_file_path = f"ARULE\\DATA\\LOG\\UD_ARULE_LOG_{sdefname}.txt"  # Update this with the actual path to your log file
-    with open(log_file_path, 'r') as file:
-        # Read the contents of the file
-        log_contents = file.read()
-        # Print the contents of the log file
+    log_file_path = os.path.join('ARULE', 'DATA', 'LOG', f"UD_ARULE_LOG_{sdefname}.txt")  # Update this with the actual path to your log file
     print("##### ARULEinPython:", colored(f'UD_ARULE_LOG_{sdefname}:', 'green'))
-    print(colored(f'{log_contents}', 'magenta'))
+    with open(log_file_path, 'r') as file:
+        # Stream the contents of the log file (see logParser.py for structured records)
+        for line in file:
+            print(colored(line.rstrip('\n'), 'magenta'))
     return None
 
 # readDEFcontents Function
+@instrument('readDEFcontents', node=lambda sdefname: sdefname)
 def readDEFcontents(sdefname):
     """
     Read contents of the SDEF & NDEF files for a particular ARULE Run.
@@ -43,7 +42,7 @@ def readDEFcontents(sdefname):
     @returns: A list of the contents in the NDEF for all nodes
     """
     # Read the contents from SDEF
-    sdefpath = f'ARULE\\DEFS\\SDEF\\{sdefname}.txt'  
+    sdefpath = os.path.join('ARULE', 'DEFS', 'SDEF', f'{sdefname}.txt')  
     with open(sdefpath, 'r') as sdeffile:
         sdeftext = sdeffile.read()
     ndefnames = re.findall(r"NDFNAME\s*=\s*'([^']+)", sdeftext)
@@ -51,7 +50,7 @@ def readDEFcontents(sdefname):
     ndefparams = []
     for ndefname, ndefid in zip(ndefnames, ndefids):
         # Read the contents from NDEF
-        ndefpath = f'ARULE\\DEFS\\NDEF\\{ndefname}.txt'
+        ndefpath = os.path.join('ARULE', 'DEFS', 'NDEF', f'{ndefname}.txt')
         with open(ndefpath, 'r') as ndeffile:
             ndeftext = ndeffile.read()
         parameters = []
@@ -64,14 +63,22 @@ def readDEFcontents(sdefname):
     return ndefparams
 
 # readARULEOutput Function 
-def readARULEOutput(filepath):
+@instrument('readARULEOutput', node=lambda filepath, cache=True: os.path.basename(filepath))
+def readARULEOutput(filepath, cache=True):
     """
     Read contents of the ARULE .csv output for a particular run.
 
     filepath: Path to the ARULE .csv output file
+    cache: Read through the memory-mapped binary sidecar of the file, (re)built when missing or stale;
+           falls back to the .csv when no sidecar can be written (True/False, see doutCache)
     @returns: FLAG, DT, DA, RUL, PH, SOH, BD, EOL, FDNOM, FD, FFP, DPS, FFS, FFIN, RC0, RS0, RS0
     """
-    output_data = pd.read_csv(filepath)
+    import pandas as pd
+    sidecar = readSidecar(filepath) if cache else None
+    if sidecar is not None:
+        output_data = {column: pd.Series(values, name=column, copy=False) for column, values in sidecar.items()}
+    else:
+        output_data = pd.read_csv(filepath)
     flag = output_data['FLAG']    # Flag for internal program operation
     dt = output_data['DT']        # Data Time
     da = output_data['DA']        # Data Amplitude
@@ -91,6 +98,63 @@ def readARULEOutput(filepath):
     rs1 = output_data['RS0']      # Reason for indicated RC
     return flag, dt, da, rul, ph, soh, bd, eol, fdnom, fd, ffp, dps, ffs, ffin, rc0, rs0, rs1
 
+# ARULEColumns Class
+class ARULEColumns:
+    """
+    Lightweight record of ARULE output columns.
+
+    Each column is a NumPy view into one contiguous (columns x rows) block and can be
+    accessed as an attribute or item, e.g. record.RUL or record['SOH'].
+    """
+    __slots__ = ('block', 'columns')
+
+    def __init__(self, block, columns):
+        self.block = block
+        self.columns = tuple(columns)
+
+    def __getitem__(self, column):
+        return self.block[self.columns.index(column)]
+
+    def __getattr__(self, column):
+        if column.startswith('_') or column in ARULEColumns.__slots__:
+            raise AttributeError(column)
+        try:
+            return self.block[self.columns.index(column.upper())]
+        except ValueError:
+            raise AttributeError(column) from None
+
+    def __len__(self):
+        return self.block.shape[1]
+
+    def __repr__(self):
+        return f"ARULEColumns({', '.join(self.columns)}; {len(self)} rows, {self.block.dtype})"
+
+# readARULEColumns Function
+def readARULEColumns(filepath, columns=('RUL', 'SOH'), dtype=np.float64, engine='c', cache=False):
+    """
+    Read selected numeric columns of the ARULE .csv output with an explicit dtype.
+
+    filepath: Path to the ARULE .csv output file
+    columns: Names of the columns to read, e.g. ('DT', 'RUL', 'SOH')
+    dtype: NumPy dtype of the columns, e.g. np.float32 for the signal columns
+    engine: pandas parser engine ('c', or 'pyarrow' if pyarrow is installed)
+    cache: Read the columns from the memory-mapped binary sidecar of the file (True/False, see doutCache)
+    @returns: ARULEColumns record of the selected columns
+    """
+    import pandas as pd
+    columns = [column.upper() for column in columns]
+    sidecar = readSidecar(filepath, columns) if cache else None
+    if sidecar is not None:
+        block = np.empty((len(columns), len(sidecar[columns[0]])), dtype=dtype)
+        for i, column in enumerate(columns):
+            block[i] = sidecar[column]
+        return ARULEColumns(block, columns)
+    output_data = pd.read_csv(filepath, usecols=columns, dtype={column: dtype for column in columns}, engine=engine)
+    block = np.empty((len(columns), len(output_data)), dtype=dtype)
+    for i, column in enumerate(columns):
+        block[i] = output_data[column].to_numpy()
+    return ARULEColumns(block, columns)
+
 # findBDandEOL Function
 def findBDandEOL(dt,bd,eol):
     """
@@ -107,112 +171,88 @@ def findBDandEOL(dt,bd,eol):
     eol_time_index = np.where(dt == est_eol_time)
     return bd_time_index, eol_time_index
 
+# findTimeIndexes Function
+def findTimeIndexes(dt, offsets, times, atol=1e-9, nearest=False):
+    """
+    Find the sample index of one time value per node over concatenated, sorted DT arrays.
+
+    A vectorised binary search runs for all nodes at once, so the cost is O(log n) per node
+    and a time that is off from a sample by float rounding is still matched.
+
+    dt: Concatenated array of Data Time values of all nodes (sorted within each node)
+    offsets: Array of node start offsets into dt, with len(dt) appended (len = nodes + 1)
+    times: Array of one time value per node to look up (NaN = none)
+    atol: Absolute tolerance for a match
+    nearest: Return the nearest sample regardless of atol (True/False)
+    @returns: Array of sample indexes relative to each node's start, -1 where no sample matches
+    """
+    dt = np.asarray(dt, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    times = np.asarray(times, dtype=np.float64)
+    start, end = offsets[:-1], offsets[1:]
+    if len(dt) == 0:
+        return np.full(len(times), -1)
+    lo, hi = start.copy(), end.copy()
+    # Lower-bound binary search within every node's segment
+    active = lo < hi
+    while active.any():
+        mid = (lo + hi) // 2
+        right = dt[np.minimum(mid, len(dt) - 1)] < times
+        lo = np.where(active & right, mid + 1, lo)
+        hi = np.where(active & ~right, mid, hi)
+        active = lo < hi
+    after = np.minimum(lo, end - 1)
+    before = np.maximum(lo - 1, start)
+    empty = end <= start
+    distance_after = np.where(empty, np.inf, np.abs(dt[np.clip(after, 0, len(dt) - 1)] - times))
+    distance_before = np.where(empty, np.inf, np.abs(dt[np.clip(before, 0, len(dt) - 1)] - times))
+    index = np.where(distance_before < distance_after, before, after)
+    distance = np.minimum(distance_before, distance_after)
+    found = ~empty & ~np.isnan(times) & (nearest | (distance <= atol))
+    return np.where(found, index - start, -1)
+
+# findBDandEOLBatch Function
+def findBDandEOLBatch(dt, bd, eol, offsets, atol=1e-9, nearest=False):
+    """
+    Find the time-indexes of BD and EOL for many nodes at once (the batch form of findBDandEOL).
+
+    dt: Concatenated array of Time values of all nodes
+    bd: Concatenated array of BD values output by ARULE
+    eol: Concatenated array of EOL values output by ARULE
+    offsets: Array of node start offsets into dt, with len(dt) appended (len = nodes + 1)
+    atol: Absolute tolerance for a match
+    nearest: Return the nearest sample regardless of atol (True/False)
+    @returns: bd_time_index, eol_time_index (per node, relative to each node's start, -1 if not found)
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    bd = np.asarray(bd, dtype=np.float64)
+    eol = np.asarray(eol, dtype=np.float64)
+    last = offsets[1:] - 1
+    has_rows = offsets[1:] > offsets[:-1]
+    if len(bd) == 0:
+        return np.full(len(last), -1), np.full(len(last), -1)
+    est_bd_time = np.where(has_rows, bd[np.maximum(last, 0)], np.nan)
+    est_eol_time = np.where(has_rows, eol[np.maximum(last, 0)], np.nan)
+    bd_time_index = findTimeIndexes(dt, offsets, est_bd_time, atol, nearest)
+    eol_time_index = findTimeIndexes(dt, offsets, est_eol_time, atol, nearest)
+    return bd_time_index, eol_time_index
+
 # plotARULEOutput Function
-def plotARULEOutput(sdefname, ndefparams, show=True):
+def plotARULEOutput(sdefname, ndefparams, show=True, reuse_figure=False, max_points=None, force=False):
     """
-    Plot contents of the ARULE .csv output for a particular run.
+    Plot contents of the ARULE .csv output for a particular run (see ARULE4PythonPlot.plotARULEOutput).
 
-    sdefname: Name of the SDEF
-    ndefparams: A list of the contents in the NDEF for all nodes
-    show: Show plots (True/False)
-    @returns: A plot of DA, RUL, PH, SOH, FD, FFP, DPS, FFS, FFIN in the PLOTS/ directory
-    """
-    for params in ndefparams:
-        ndefid = params[0]
-        ndefname = params[1]
-        fdc = params[2]
-        fdz = params[3]
-        fdnm = params[4]
-        fdcpts = params[5]
-        fdpts = params[6]
-        fdnv = params[7]
-        ffpfail = params[8]
-        pittff = params[9]
-        piffsmod = params[10]
-        infile = params[11]
-        intype = params[12]
-        outtype = params[13]
-        output_folder = 'ARULE\\DATA\\DOUT'
-        output_filename = f'ND_{ndefid}_DW_{sdefname}_{infile}_OUT{outtype}'
-        output_filepath = os.path.join(output_folder, output_filename)
-        print("##### ARULEinPython:", colored(f'Reading ARULE Results for {ndefname} ...', 'green'))
-        flag, dt, da, rul, ph, soh, bd, eol, fdnom, fd, ffp, dps, ffs, ffin, rc0, rs0, rs1 = readARULEOutput(output_filepath)
-        print("##### ARULEinPython:", colored(f'Finished Reading ARULE Results for {ndefname}!', 'green'))
-        print("##### ARULEinPython:", colored(f'Plotting ARULE Results for {ndefname} ...', 'green'))
-        # Plot Columns
-        f, ax = plt.subplots(4,2, figsize=(25,12), sharex=True)
-        title_font = font_manager.FontProperties(family= 'Sans Serif', weight='bold', style='normal', size=20)
-        label_font = font_manager.FontProperties(family= 'Sans Serif', weight='bold', style='normal', size=16)
-        legend_font = font_manager.FontProperties(family= 'Sans Serif', weight='bold', style='normal', size=12)
-        title = f"{ndefname} ARULE Output"
-        titletext = plt.suptitle(title, fontproperties=title_font)
-        titletext.set_color('blue')
-        bd_time_index, eol_time_index = findBDandEOL(dt,bd,eol)
-        # Plot FD
-        ax[0,0].plot(dt, da, 'k-', lw = 2, label=f'Feature Data')
-        ax[0,0].vlines(dt.iloc[bd_time_index], np.amin(da), np.amax(da), linestyle='--', lw=3, color='green', label='Beginning of Degradation')
-        ax[0,0].vlines(dt.iloc[eol_time_index], np.amin(da), np.amax(da), linestyle='--', lw=3, color='red', label='End of Life')
-        ax[0,0].set_ylim(np.amin(da), np.amax(da))
-        ax[0,0].set_ylabel(r'FD [AU]', fontproperties=label_font)
-        #Plot SoH
-        ax[1,0].plot(dt, soh, 'k-', lw = 2, label=f'State-of-Health')
-        ax[1,0].scatter(dt.iloc[bd_time_index], soh.iloc[bd_time_index], s=100, lw=2, color='green', edgecolor='green', facecolors='none')
-        ax[1,0].scatter(dt.iloc[eol_time_index], soh.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[1,0].set_ylabel(r'SoH [%]', fontproperties=label_font)
-        # Plot RUL/PH
-        ax[2,0].plot(dt, rul, 'm-', lw = 2, label=f'Remaining Useful Life')
-        ax[2,0].plot(dt, ph, 'c-', lw = 2, label=f'Prognostic Horizon')
-        ax[2,0].scatter(dt.iloc[bd_time_index], rul.iloc[bd_time_index], s=100, lw=2, color='green', edgecolor='green', facecolors='none')
-        ax[2,0].scatter(dt.iloc[eol_time_index], rul.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[2,0].scatter(dt.iloc[eol_time_index], ph.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[2,0].set_ylabel(r'RUL/PH [AU]', fontproperties=label_font)
-        ax[2,0].set_xlabel(r'Time [AU]', fontproperties=label_font)
-        ax[2,0].xaxis.set_tick_params(which='both', labelbottom=True)
-        ax[3,0].axis('off')
-        # Plot FFP
-        ax[0,1].plot(dt, ffp, 'k-', lw = 2, label=f'FFP Signature')
-        ax[0,1].scatter(dt.iloc[bd_time_index], ffp.iloc[bd_time_index], s=100, lw=2, color='green', edgecolor='green', facecolors='none')
-        ax[0,1].scatter(dt.iloc[eol_time_index], ffp.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[0,1].set_ylabel(r'FFP [AU]', fontproperties=label_font)
-        #Plot DPS
-        ax[1,1].plot(dt, dps, 'k-', lw = 2, label=f'DPS Signature')
-        ax[1,1].scatter(dt.iloc[bd_time_index], dps.iloc[bd_time_index], s=100, lw=2, color='green', edgecolor='green', facecolors='none')
-        ax[1,1].scatter(dt.iloc[eol_time_index], dps.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[1,1].set_ylabel(r'DPS [AU]', fontproperties=label_font)
-        # Plot FFS
-        ax[2,1].plot(dt, ffs, 'k-', lw = 2, label=f'FFS Signature')
-        ax[2,1].scatter(dt.iloc[bd_time_index], ffs.iloc[bd_time_index], s=100, lw=2, color='green', edgecolor='green', facecolors='none')
-        ax[2,1].scatter(dt.iloc[eol_time_index], ffs.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[2,1].set_ylabel(r'FFS [AU]', fontproperties=label_font)
-        # Plot FFIN
-        ax[3,1].plot(dt, ffin, 'k-', lw = 2, label=f'Functional Failure Input')
-        ax[3,1].scatter(dt.iloc[bd_time_index], ffin.iloc[bd_time_index], s=100, lw=2, color='green', edgecolor='green', facecolors='none')
-        ax[3,1].scatter(dt.iloc[eol_time_index], ffin.iloc[eol_time_index], s=100, lw=2, color='red', edgecolor='red', facecolors='none')
-        ax[3,1].set_ylabel(r'FFIN [AU]', fontproperties=label_font)
-        ax[3,1].set_xlabel(r'Time [AU]', fontproperties=label_font)
-        #ax.fill_between(fft_data.index, fft_data[col], alpha=0.2, label='')
-        for a in ax.flat:
-            a.grid("on")
-            a.legend(loc='best', prop=legend_font)
-            a.xaxis.set_minor_locator(AutoMinorLocator())
-            a.yaxis.set_minor_locator(AutoMinorLocator())
-        f.tight_layout(h_pad=1, w_pad=3)
-        plt.subplots_adjust(hspace=0.1)
-        for a in ax.flat:
-            plt.setp(a.xaxis.get_majorticklabels(), size='large')
-            plt.setp(a.yaxis.get_majorticklabels(), size='large')
-            plt.setp(a.xaxis.get_minorticklabels(), size='large')
-            plt.setp(a.yaxis.get_minorticklabels(), size='large')
-        output_filename = f"{ndefname}_ARULEOut.png"
-        save_directory = 'PLOTS'
-        if not os.path.exists(save_directory):
-            os.makedirs(save_directory)
-        f.savefig(os.path.join(save_directory, output_filename))
-        if show == True:
-            plt.show()
-            plt.close()
-        else:
-            plt.close()
-        print("##### ARULEinPython:", colored(f'Finished Plotting ARULE Results for {ndefname}!', 'green'))
-        print("##### ARULEinPython:", colored(f'{output_filename} can be located in ARULE4Python/{save_directory}.', 'yellow'))
-    return None
\ No newline at end of file
+    matplotlib is only imported when a plot is requested.
+    """
+    from ARULE4PythonPlot import plotARULEOutput
+    return plotARULEOutput(sdefname, ndefparams, show, reuse_figure, max_points, force)
+
+# Module __getattr__ Function
+def __getattr__(name):
+    """
+    Load the plotting classes from ARULE4PythonPlot on first access.
+    """
+    if name in PLOT_NAMES:
+        import ARULE4PythonPlot
+        return getattr(ARULE4PythonPlot, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
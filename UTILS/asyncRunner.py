@@ -0,0 +1,233 @@
+# ========================================================================
+"""      ASYNCIO PIPELINE RUNNER: UD_ARULE RUNS + READ/PLOT STAGES      """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Each system goes through run -> read -> plot as its own task:
+  run:  UD_ARULE in an isolated workspace (see batchRunner), at most max_runs at a
+        time, with a per-run timeout, kill on timeout/cancellation and retries with
+        exponential backoff for license & transient failures
+  read: selected DOUT columns of every node, in a thread pool
+  plot: the node PNGs, in a process pool with the headless backend (see parallelPlot)
+so the exe runs of later systems overlap with the post-processing of earlier ones.
+"""
+### Import Libraries
+import asyncio
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from batchRunner import ARULE_ROOT, makeWorkspace, collectWorkspace
+from metrics import report
+from parallelPlot import initPlotWorker, plotJob
+
+### Retry Settings
+# stderr/stdout messages of a failed run that mark it as worth retrying: a busy or unreachable
+# license (DLM) server & timeouts, not any mention of the license (e.g. an invalid license file)
+TRANSIENT_RE = re.compile(
+    r'licen[cs]e (?:server )?(?:is )?(?:busy|unavailable|not available|in use|not responding|timed? ?out)'
+    r'|no (?:free )?licen[cs]es? (?:available|left)'
+    r'|DLM (?:server )?(?:is )?(?:busy|unavailable|not responding|timed? ?out|timeout)'
+    r'|(?:connection|operation|request) timed out'
+    r'|resource temporarily unavailable', re.IGNORECASE)
+
+### FUNCTIONS
+# isTransient Function
+def isTransient(returncode, output, retry_codes=()):
+    """
+    Decide whether a failed UD_ARULE run is worth retrying.
+
+    returncode: Return code of the run (None = killed after a timeout)
+    output: Captured stdout & stderr of the run
+    retry_codes: Return codes that are always retried
+    @returns: True/False
+    """
+    return returncode is None or returncode in retry_codes or bool(TRANSIENT_RE.search(output))
+
+# runSystemAsync Function
+async def runSystemAsync(system, semaphore, root=ARULE_ROOT, exe=None, scratch_dir=None, keep_workspace=False,
+                         timeout=None, retries=2, backoff=5.0, retry_codes=()):
+    """
+    Run UD_ARULE for one system inside its own workspace without blocking the event loop.
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    semaphore: asyncio.Semaphore bounding the number of concurrent UD_ARULE runs
+    root: Directory that holds the shared ARULE/ tree, UD_ARULE.exe & configs.ini
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in root)
+    scratch_dir: Directory in which the workspace is created (None = system temp directory)
+    keep_workspace: Keep the workspace after the run (True/False)
+    timeout: Seconds before a run is killed (None = no limit)
+    retries: Number of retries of a transient failure (see isTransient)
+    backoff: Seconds before the first retry, doubled for every further retry
+    retry_codes: Return codes that are always retried
+    @returns: Dictionary with sysname, returncode, walltime [s], outputs, workspace, error & attempts of the run
+    """
+    sysname = system[0]
+    if exe is None:
+        exe = os.path.join(root, 'UD_ARULE.exe')
+    start = time.perf_counter()
+    workspace = None
+    attempts = 0
+    outputs = []
+    try:
+        while True:
+            attempts += 1
+            async with semaphore:
+                # Built once a run slot is free, so queued systems do not all copy their inputs up front
+                if workspace is None:
+                    workspace = await asyncio.to_thread(makeWorkspace, system, root, scratch_dir)
+                command = [exe, f'{sysname}', '2', '0', '1', f'{workspace}']
+                returncode, output = await runCommand(command, root, timeout)
+            error = '' if returncode == 0 else (output.strip() or f'timed out after {timeout} s')
+            if returncode == 0 or attempts > retries or not isTransient(returncode, output, retry_codes):
+                break
+            reason = f'RC {returncode}' if returncode is not None else f'timed out after {timeout} s'
+            report(f'{sysname} failed ({reason}), retrying in {backoff * 2 ** (attempts - 1):.1f} s ...', 'yellow')
+            await asyncio.sleep(backoff * 2 ** (attempts - 1))
+        outputs = await asyncio.to_thread(collectWorkspace, workspace, root) if returncode == 0 else []
+    except Exception as exc:
+        # A broken system (missing input, unwritable DEFS, ...) fails on its own, not the whole batch
+        returncode = -1
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        if workspace is not None and not keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+    return {'sysname': sysname, 'returncode': returncode if returncode is not None else -1,
+            'walltime': time.perf_counter() - start, 'outputs': outputs,
+            'workspace': workspace if keep_workspace else None, 'error': error, 'attempts': attempts}
+
+# runCommand Function
+async def runCommand(command, cwd, timeout=None):
+    """
+    Run a command, killing it on timeout or when the calling task is cancelled.
+
+    command: Command list
+    cwd: Working directory
+    timeout: Seconds before the process is killed (None = no limit)
+    @returns: Return code (None after a timeout, -1 if it could not be started), captured stdout & stderr text
+    """
+    try:
+        # The exe is started from root so that it finds configs.ini and the license
+        process = await asyncio.create_subprocess_exec(*command, cwd=cwd, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.STDOUT)
+    except OSError as exc:
+        return -1, str(exc)
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None, ''
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, output.decode(errors='replace')
+
+# nodeOutputs Function
+def nodeOutputs(system, root=ARULE_ROOT):
+    """
+    @returns: List of (ndefname, DOUT path) of the nodes of a system, as written by UD_ARULE
+    """
+    sysname, nodenames, node_params = system
+    directory = os.path.join(root, 'ARULE', 'DATA', 'DOUT')
+    return [(f'{sysname}_{node}', os.path.join(directory, f'ND_{i+1}_DW_{sysname}_{params[9]}_OUT{params[11]}'))
+            for i, (node, params) in enumerate(zip(nodenames, node_params))]
+
+# readSystemOutputs Function
+def readSystemOutputs(system, columns, root=ARULE_ROOT):
+    """
+    Read selected DOUT columns of every node of a system (runs in the read thread pool).
+
+    @returns: Dictionary of ndefname to ARULEColumns (see ARULE4PythonUtils.readARULEColumns)
+    """
+    from ARULE4PythonUtils import readARULEColumns
+    return {ndefname: readARULEColumns(filepath, columns, cache=True) for ndefname, filepath in nodeOutputs(system, root)}
+
+# processSystem Function
+async def processSystem(system, semaphore, read_pool, plot_pool, columns=('DT', 'RUL', 'SOH'), plot=True, root=ARULE_ROOT, **run_options):
+    """
+    Run one system and feed a successful run straight into the read & plot stages.
+
+    system: Tuple of (sysname, nodenames, node_params)
+    semaphore: asyncio.Semaphore bounding the number of concurrent UD_ARULE runs
+    read_pool: Executor of the read stage (None = skip reading)
+    plot_pool: Executor of the plot stage (None = skip plotting)
+    columns: DOUT columns to read
+    plot: Render the node plots (True/False)
+    root: Directory that holds the shared ARULE/ tree
+    run_options: Keyword arguments of runSystemAsync
+    @returns: Run result dictionary with the extra keys data (see readSystemOutputs) & plots (see parallelPlot.plotJob)
+    """
+    loop = asyncio.get_running_loop()
+    result = await runSystemAsync(system, semaphore, root, **run_options)
+    result['data'], result['plots'] = None, None
+    if result['returncode'] != 0:
+        report(f"{result['sysname']} failed (RC {result['returncode']}) after {result['attempts']} attempt(s): {result['error']}", 'red')
+        return result
+    report(f"{result['sysname']} finished in {result['walltime']:.2f} s", 'green')
+    stages = []
+    if read_pool is not None:
+        stages.append(loop.run_in_executor(read_pool, readSystemOutputs, system, columns, root))
+    if plot and plot_pool is not None:
+        ndefparams = [[i+1, ndefname, *params] for i, (ndefname, params) in
+                      enumerate(zip([name for name, _ in nodeOutputs(system, root)], system[2]))]
+        stages.append(loop.run_in_executor(plot_pool, plotJob, system[0], ndefparams))
+    outcomes = await asyncio.gather(*stages, return_exceptions=True)
+    errors = []
+    for key in [key for key, used in (('data', read_pool is not None), ('plots', plot and plot_pool is not None)) if used]:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            # e.g. a node whose DOUT file UD_ARULE did not write
+            errors.append(f'{key}: {type(outcome).__name__}: {outcome}')
+        else:
+            result[key] = outcome
+    if errors:
+        result['returncode'], result['error'] = -1, '; '.join(errors)
+        report(f"{result['sysname']} post-processing failed: {result['error']}", 'red')
+    return result
+
+# runBatchAsync Function
+async def runBatchAsync(systems, max_runs=None, read_workers=4, plot_workers=None, columns=('DT', 'RUL', 'SOH'),
+                        plot=True, root=ARULE_ROOT, **run_options):
+    """
+    Run many systems with overlapping UD_ARULE runs, output reading & plotting.
+
+    systems: List of (sysname, nodenames, node_params) tuples as used in the DEMOS scripts
+    max_runs: Maximum number of concurrent UD_ARULE runs (None = number of CPU cores)
+    read_workers: Threads of the read stage (0 = skip reading)
+    plot_workers: Processes of the plot stage (None = number of CPU cores)
+    columns: DOUT columns to read
+    plot: Render the node plots (True/False)
+    root: Directory that holds the shared ARULE/ tree
+    run_options: Keyword arguments of runSystemAsync (exe, timeout, retries, backoff, ...)
+    @returns: List of result dictionaries (see processSystem), in the order of systems
+    """
+    sysnames = [system[0] for system in systems]
+    if len(set(sysnames)) != len(sysnames):
+        raise ValueError("System names in a batch must be unique, their DOUT/LOG files would collide.")
+    semaphore = asyncio.Semaphore(max_runs or os.cpu_count() or 1)
+    read_pool = ThreadPoolExecutor(max_workers=read_workers) if read_workers else None
+    # Spawned, not forked: forking while the read & to_thread threads hold locks can deadlock the workers
+    plot_pool = ProcessPoolExecutor(max_workers=plot_workers, mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=initPlotWorker, initargs=(root,)) if plot else None
+    start = time.perf_counter()
+    try:
+        # Cancelling this coroutine cancels every system task, which kills its running exe
+        results = await asyncio.gather(*[processSystem(system, semaphore, read_pool, plot_pool, columns, plot, root, **run_options)
+                                         for system in systems])
+    finally:
+        for pool in (read_pool, plot_pool):
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+    report(f'Batch of {len(systems)} systems completed in {time.perf_counter() - start:.2f} s!', 'green')
+    return results
+
+# runAsync Function
+def runAsync(systems, **options):
+    """
+    Blocking entry point for scripts: asyncio.run(runBatchAsync(systems, **options)).
+    """
+    return asyncio.run(runBatchAsync(systems, **options))
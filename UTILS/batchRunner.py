@@ -0,0 +1,372 @@
+# ========================================================================
+"""           PARALLEL MULTI-SYSTEM BATCH RUNNER FOR ARULE             """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from createDEF import createSDEF, createNDEF
+from logParser import NODE_RE
+from runCache import computeRunKey, storeRun, restoreRun
+from metrics import addRecords, report, runChild, stage
+
+### Directory Structure
+ARULE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ARULE_SUBDIRS = [
+    os.path.join('ARULE', 'DATA', 'CPT'),
+    os.path.join('ARULE', 'DATA', 'DINP'),
+    os.path.join('ARULE', 'DATA', 'DOUT'),
+    os.path.join('ARULE', 'DATA', 'LOG'),
+    os.path.join('ARULE', 'DEFS', 'SDEF'),
+    os.path.join('ARULE', 'DEFS', 'NDEF'),
+]
+
+### FUNCTIONS
+# makeARULEDirs Function
+def makeARULEDirs(root):
+    """
+    Create the ARULE/DATA & ARULE/DEFS directory tree under a root directory.
+
+    root: Directory that holds (or will hold) the ARULE/ tree
+    @returns: None
+    """
+    for subdir in ARULE_SUBDIRS:
+        os.makedirs(os.path.join(root, subdir), exist_ok=True)
+    return None
+
+# writeSystemDEFs Function
+def writeSystemDEFs(system, root):
+    """
+    Write the SDEF & NDEF files of a system the same way the DEMOS scripts do, as one 'writeSystemDEFs' metrics stage.
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    root: Directory that holds the ARULE/ tree
+    @returns: None
+    """
+    sysname, nodenames, node_params = system
+    system_node_list = [(i+1, f'{sysname}_{node}', -9) for i, node in enumerate(nodenames)]
+    sdefdirectory = os.path.join(root, 'ARULE', 'DEFS', 'SDEF')
+    ndefdirectory = os.path.join(root, 'ARULE', 'DEFS', 'NDEF')
+    with stage('writeSystemDEFs', sysname, files=len(nodenames) + 1):
+        createSDEF(system_node_list, sdefdirectory, f"{sysname}.txt", sysname)
+        for node, params in zip(nodenames, node_params):
+            ndefname = f'{sysname}_{node}'
+            createNDEF(params, ndefdirectory, f"{ndefname}.txt", ndefname)
+    return None
+
+# makeWorkspace Function
+def makeWorkspace(system, root=ARULE_ROOT, scratch_dir=None):
+    """
+    Create an isolated scratch copy of the ARULE/DATA & ARULE/DEFS tree for one run.
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    root: Directory that holds the shared ARULE/ tree (input files are copied from here)
+    scratch_dir: Directory in which the workspace is created (None = system temp directory)
+    @returns: Path to the workspace directory
+    """
+    sysname, nodenames, node_params = system
+    workspace = tempfile.mkdtemp(prefix=f'ARULE_{sysname}_', dir=scratch_dir)
+    try:
+        makeARULEDirs(workspace)
+        copyInputs(node_params, workspace, root)
+        writeSystemDEFs(system, workspace)
+    except BaseException:
+        # e.g. a missing DINP file: do not leave a half-built workspace behind
+        shutil.rmtree(workspace, ignore_errors=True)
+        raise
+    return workspace
+
+# copyInputs Function
+def copyInputs(node_params, workspace, root=ARULE_ROOT):
+    """
+    Copy the DINP input files referenced by a list of nodes into a workspace.
+
+    node_params: List of (FDC, FDZ, ..., INFILE, INTYPE, OUTTYPE, ENDDEF) for the nodes
+    workspace: Path to the workspace directory
+    root: Directory that holds the shared ARULE/ tree
+    @returns: None
+    """
+    # Only the input files referenced by the nodes are copied to keep workspaces cheap
+    for params in node_params:
+        infile, intype = params[9], params[10]
+        source = os.path.join(root, 'ARULE', 'DATA', 'DINP', f'{infile}{intype}')
+        target = os.path.join(workspace, 'ARULE', 'DATA', 'DINP', f'{infile}{intype}')
+        if not os.path.exists(target):
+            shutil.copy2(source, target)
+    return None
+
+# collectWorkspace Function
+def collectWorkspace(workspace, root=ARULE_ROOT):
+    """
+    Copy the DEFS, DOUT & LOG files of a finished run back into the shared ARULE/ tree.
+
+    workspace: Path to the workspace directory of the run
+    root: Directory that holds the shared ARULE/ tree
+    @returns: List of paths of the files copied into the shared tree
+    """
+    copied = []
+    for subdir in ARULE_SUBDIRS:
+        if subdir.endswith('DINP') or subdir.endswith('CPT'):
+            continue
+        source_dir = os.path.join(workspace, subdir)
+        target_dir = os.path.join(root, subdir)
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in os.listdir(source_dir):
+            target = os.path.join(target_dir, filename)
+            shutil.copy2(os.path.join(source_dir, filename), target)
+            copied.append(target)
+    return copied
+
+# runSystem Function
+def runSystem(system, root=ARULE_ROOT, exe=None, scratch_dir=None, keep_workspace=False, use_cache=False):
+    """
+    Run UD_ARULE for one system inside its own isolated workspace.
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    root: Directory that holds the shared ARULE/ tree, UD_ARULE.exe & configs.ini
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in root)
+    scratch_dir: Directory in which the workspace is created (None = system temp directory)
+    keep_workspace: Keep the workspace after the run (True/False)
+    use_cache: Restore the outputs from the run cache in ARULE/DATA/CACHE instead of re-running unchanged systems (True/False)
+    @returns: Dictionary with sysname, returncode, walltime [s], outputs, workspace, cached flag & metrics records of the run
+    """
+    sysname = system[0]
+    if exe is None:
+        exe = os.path.join(root, 'UD_ARULE.exe')
+    start = time.perf_counter()
+    workspace = None
+    cached = False
+    error = ''
+    records = []
+    outputs = []
+    try:
+        workspace = makeWorkspace(system, root, scratch_dir)
+        command = [exe, f'{sysname}', '2', '0', '1', f'{workspace}']
+        workspace_arule = os.path.join(workspace, 'ARULE')
+        cache_dir = os.path.join(root, 'ARULE', 'DATA', 'CACHE')
+        if use_cache:
+            key = computeRunKey(sysname, command[1:-1], workspace_arule, exe)
+            cached = restoreRun(key, workspace_arule, cache_dir) is not None
+        if cached:
+            returncode = 0
+        else:
+            with stage('UD_ARULE', sysname) as record:
+                try:
+                    # The exe is started from root so that it finds configs.ini and the license
+                    completed, record['child_maxrss_kb'] = runChild(command, root)
+                    returncode = completed.returncode
+                    error = completed.stderr.strip() if returncode != 0 else ''
+                except OSError as exc:
+                    returncode = -1
+                    error = str(exc)
+                record['returncode'] = returncode
+            records.append(record)
+            if use_cache and returncode == 0:
+                os.makedirs(cache_dir, exist_ok=True)
+                storeRun(key, workspace_arule, cache_dir)
+        outputs = collectWorkspace(workspace, root) if returncode == 0 else []
+    except Exception as exc:
+        # A broken system (missing input, unwritable DEFS, ...) fails on its own, not the whole batch
+        returncode = -1
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        if workspace is not None and not keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+            workspace = None
+    walltime = time.perf_counter() - start
+    return {'sysname': sysname, 'returncode': returncode, 'walltime': walltime,
+            'outputs': outputs, 'workspace': workspace, 'error': error, 'cached': cached, 'metrics': records}
+
+# runComposite Function
+def runComposite(systems, compositename, root=ARULE_ROOT, exe=None, scratch_dir=None, keep_workspace=False):
+    """
+    Run many small systems with a single UD_ARULE call through one composite SDEF.
+
+    The nodes of all systems are listed in one composite SDEF with renumbered NDNUMIDs,
+    so the DLM license check and process start-up are paid once for the whole group.
+    The per-node outputs are renamed back to ND_{NDNUMID}_DW_{sysname}_... afterwards,
+    so readDEFcontents/plotARULEOutput work on the original system names.
+
+    systems: List of (sysname, nodenames, node_params) tuples as used in the DEMOS scripts
+    compositename: Name of the composite SDEF (must differ from all system names)
+    root: Directory that holds the shared ARULE/ tree, UD_ARULE.exe & configs.ini
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in root)
+    scratch_dir: Directory in which the workspace is created (None = system temp directory)
+    keep_workspace: Keep the workspace after the run (True/False)
+    @returns: List of run result dictionaries (see runSystem, plus the DOUT files the run did not write), one per system
+    """
+    if compositename in [system[0] for system in systems]:
+        raise ValueError(f"Composite SDEF name {compositename} clashes with a system name.")
+    if exe is None:
+        exe = os.path.join(root, 'UD_ARULE.exe')
+    start = time.perf_counter()
+    workspace = tempfile.mkdtemp(prefix=f'ARULE_{compositename}_', dir=scratch_dir)
+    composite_node_list = []
+    renames = []
+    expected = {}
+    node_ids = {}
+    missing = {system[0]: [] for system in systems}
+    record = {}
+    copied = []
+    try:
+        makeARULEDirs(workspace)
+        for system in systems:
+            sysname, nodenames, node_params = system
+            copyInputs(node_params, workspace, root)
+            writeSystemDEFs(system, workspace)
+            expected[sysname] = {f'{sysname}.txt', f'UD_ARULE_LOG_{sysname}.txt'}
+            for i, (node, params) in enumerate(zip(nodenames, node_params)):
+                ndnumid = len(composite_node_list) + 1
+                composite_node_list.append((ndnumid, f'{sysname}_{node}', -9))
+                node_ids[ndnumid] = (sysname, i+1)
+                infile, outtype = params[9], params[11]
+                system_filename = f'ND_{i+1}_DW_{sysname}_{infile}_OUT{outtype}'
+                renames.append((sysname, f'ND_{ndnumid}_DW_{compositename}_{infile}_OUT{outtype}', system_filename))
+                expected[sysname].update({system_filename, f'{sysname}_{node}.txt'})
+        sdefdirectory = os.path.join(workspace, 'ARULE', 'DEFS', 'SDEF')
+        createSDEF(composite_node_list, sdefdirectory, f"{compositename}.txt", compositename)
+        command = [exe, f'{compositename}', '2', '0', '1', f'{workspace}']
+        with stage('UD_ARULE', compositename, systems=[system[0] for system in systems]) as record:
+            try:
+                # The exe is started from root so that it finds configs.ini and the license
+                completed, record['child_maxrss_kb'] = runChild(command, root)
+                returncode = completed.returncode
+                error = completed.stderr.strip() if returncode != 0 else ''
+            except OSError as exc:
+                returncode = -1
+                error = str(exc)
+            record['returncode'] = returncode
+        if returncode == 0:
+            # Split the composite outputs back to their original system/node names
+            dout_dir = os.path.join(workspace, 'ARULE', 'DATA', 'DOUT')
+            log_dir = os.path.join(workspace, 'ARULE', 'DATA', 'LOG')
+            for sysname, composite_filename, system_filename in renames:
+                if os.path.exists(os.path.join(dout_dir, composite_filename)):
+                    os.replace(os.path.join(dout_dir, composite_filename), os.path.join(dout_dir, system_filename))
+                else:
+                    missing[sysname].append(system_filename)
+            composite_log = os.path.join(log_dir, f'UD_ARULE_LOG_{compositename}.txt')
+            if os.path.exists(composite_log):
+                splitCompositeLog(composite_log, log_dir, compositename, [system[0] for system in systems], node_ids)
+            os.remove(os.path.join(sdefdirectory, f"{compositename}.txt"))
+            copied = collectWorkspace(workspace, root)
+    except Exception as exc:
+        returncode = -1
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        if not keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+            workspace = None
+    walltime = time.perf_counter() - start
+    results = []
+    for i, system in enumerate(systems):
+        sysname = system[0]
+        result = {'sysname': sysname, 'returncode': returncode, 'walltime': walltime,
+                  'outputs': [path for path in copied if os.path.basename(path) in expected.get(sysname, ())],
+                  'workspace': workspace, 'error': error, 'missing': missing[sysname],
+                  'composite': compositename, 'metrics': [record] if i == 0 and record else []}
+        if returncode == 0 and missing[sysname]:
+            # The exe returned 0 but wrote no DOUT for some nodes: the system did not complete
+            result['returncode'] = -1
+            result['error'] = f"UD_ARULE wrote no DOUT file for {', '.join(missing[sysname])}"
+        results.append(result)
+    return results
+
+# systemNodeID Function
+def systemNodeID(match, node_ids):
+    """
+    @returns: Text of a NODE_RE match with the composite NDNUMID replaced by the system's own
+    """
+    if int(match.group(1)) not in node_ids:
+        return match.group(0)
+    return match.group(0)[:match.start(1) - match.start(0)] + str(node_ids[int(match.group(1))][1])
+
+# splitCompositeLog Function
+def splitCompositeLog(composite_log, log_dir, compositename, sysnames, node_ids):
+    """
+    Split the UD_ARULE log of a composite run into one log per system.
+
+    Lines naming a node (see logParser.NODE_RE) go to the log of that node's system with the
+    composite NDNUMID mapped back to the system's own; lines naming no node go to every log.
+
+    composite_log: Path to UD_ARULE_LOG_{compositename}.txt
+    log_dir: Directory in which the per-system logs are written
+    compositename: Name of the composite SDEF
+    sysnames: Names of the systems in the composite
+    node_ids: Dictionary of composite NDNUMID to (sysname, NDNUMID in the system)
+    @returns: None
+    """
+    logs = {sysname: open(os.path.join(log_dir, f'UD_ARULE_LOG_{sysname}.txt'), 'w') for sysname in sysnames}
+    try:
+        with open(composite_log, 'r', errors='replace') as file:
+            for line in file:
+                owners = [node_ids[int(match.group(1))][0] for match in NODE_RE.finditer(line)
+                          if int(match.group(1)) in node_ids]
+                line = NODE_RE.sub(lambda match: systemNodeID(match, node_ids), line)
+                for sysname in (owners[:1] or sysnames):
+                    logs[sysname].write(line.replace(compositename, sysname))
+    finally:
+        for log in logs.values():
+            log.close()
+    return None
+
+# runBatch Function
+def runBatch(systems, max_workers=None, root=ARULE_ROOT, exe=None, scratch_dir=None, keep_workspace=False,
+             composite_size=None, use_cache=False):
+    """
+    Run UD_ARULE for many systems in parallel across a process pool.
+
+    systems: List of (sysname, nodenames, node_params) tuples as used in the DEMOS scripts
+    max_workers: Maximum number of concurrent runs (None = number of CPU cores)
+    root: Directory that holds the shared ARULE/ tree, UD_ARULE.exe & configs.ini
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in root)
+    scratch_dir: Directory in which the workspaces are created (None = system temp directory)
+    keep_workspace: Keep the workspaces after the runs (True/False)
+    composite_size: Merge up to this many systems into one composite SDEF per UD_ARULE call (None = one call per system)
+    use_cache: Skip systems whose definitions, inputs & arguments are unchanged (see runSystem, per-system runs only)
+    @returns: List of run result dictionaries (see runSystem), in the order of systems
+    """
+    sysnames = [system[0] for system in systems]
+    if len(set(sysnames)) != len(sysnames):
+        raise ValueError("System names in a batch must be unique, their DOUT/LOG files would collide.")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    report(f'Running {len(systems)} systems with up to {max_workers} concurrent UD_ARULE runs ...', 'green')
+    start = time.perf_counter()
+    results = [None] * len(systems)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if composite_size is None:
+            futures = {executor.submit(runSystem, system, root, exe, scratch_dir, keep_workspace, use_cache): [i]
+                       for i, system in enumerate(systems)}
+        else:
+            futures = {}
+            for first in range(0, len(systems), composite_size):
+                group = systems[first:first+composite_size]
+                compositename = f'COMPOSITE{first // composite_size + 1}'
+                future = executor.submit(runComposite, group, compositename, root, exe, scratch_dir, keep_workspace)
+                futures[future] = list(range(first, first + len(group)))
+        for future in as_completed(futures):
+            try:
+                group_results = future.result()
+            except Exception as exc:
+                # e.g. a crashed worker process: fail its systems & keep the results of the others
+                group_results = [{'sysname': systems[i][0], 'returncode': -1, 'walltime': 0.0, 'outputs': [],
+                                  'workspace': None, 'error': f'{type(exc).__name__}: {exc}', 'metrics': []}
+                                 for i in futures[future]]
+            if isinstance(group_results, dict):
+                group_results = [group_results]
+            for i, result in zip(futures[future], group_results):
+                results[i] = result
+                addRecords(result.get('metrics', []))
+                if result.get('cached'):
+                    report(f"{result['sysname']} unchanged, restored from run cache in {result['walltime']:.2f} s", 'green')
+                elif result['returncode'] == 0:
+                    report(f"{result['sysname']} finished in {result['walltime']:.2f} s", 'green')
+                else:
+                    report(f"{result['sysname']} failed (RC {result['returncode']}) after {result['walltime']:.2f} s: {result['error']}", 'red')
+    walltime = time.perf_counter() - start
+    report(f'Batch of {len(systems)} systems completed in {walltime:.2f} s!', 'green')
+    return results
@@ -0,0 +1,88 @@
+# ========================================================================
+"""          IMPORT-TIME BENCHMARK FOR THE ARULE IN PYTHON UTILS       """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Times `import <module>` in fresh interpreters & checks which heavy libraries each
+import pulls in. Run from the repository root or UTILS/:
+    python UTILS/benchmarkImports.py [--repeat 5] [--budget 0.5]
+The exit code is 1 if a module loads a library it must not load, or is slower than the budget.
+"""
+### Import Libraries
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+### Benchmark Settings
+UTILS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ('pandas', 'matplotlib', 'matplotlib.pyplot')
+# Modules and the heavy libraries they must not load at import time
+IMPORT_RULES = {
+    'ARULE4PythonUtils': HEAVY_MODULES,
+    'parseDEF': HEAVY_MODULES,
+    'createDEF': HEAVY_MODULES,
+    'doutCache': HEAVY_MODULES,
+    'nativeARULE': HEAVY_MODULES,
+    'batchRunner': HEAVY_MODULES,
+    'ARULE4PythonPlot': (),
+}
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+### FUNCTIONS
+# timeImport Function
+def timeImport(module, repeat=5):
+    """
+    Time the import of a module in fresh interpreters.
+
+    module: Name of the module in UTILS/
+    repeat: Number of interpreters to start
+    @returns: Median import time in seconds, list of heavy libraries loaded by the import
+    """
+    seconds = []
+    loaded = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=UTILS_DIRECTORY, capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        seconds.append(probe['seconds'])
+        loaded = probe['loaded']
+    return statistics.median(seconds), loaded
+
+# benchmarkImports Function
+def benchmarkImports(repeat=5, budget=None):
+    """
+    Benchmark the imports of IMPORT_RULES and print a report.
+
+    repeat: Number of interpreters to start per module
+    budget: Maximum median import time in seconds for modules that must stay light (None = no limit)
+    @returns: List of problems found (empty when every module passes)
+    """
+    problems = []
+    for module, forbidden in IMPORT_RULES.items():
+        seconds, loaded = timeImport(module, repeat)
+        print(f'{module:<20} {seconds * 1000:8.1f} ms   loads: {", ".join(loaded) or "-"}')
+        bad = [name for name in loaded if name in forbidden]
+        if bad:
+            problems.append(f'{module} imports {", ".join(bad)} at import time')
+        if forbidden and budget is not None and seconds > budget:
+            problems.append(f'{module} takes {seconds:.3f} s to import (budget {budget:.3f} s)')
+    return problems
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import-time benchmark for the ARULE in Python utils.')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--budget', type=float, default=None, help='maximum import time in seconds of the light modules')
+    args = parser.parse_args()
+    problems = benchmarkImports(args.repeat, args.budget)
+    for problem in problems:
+        print('FAIL:', problem)
+    sys.exit(1 if problems else 0)
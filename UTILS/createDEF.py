@@ -4,6 +4,53 @@
 # ========================================================================
 ### Import Libraries
 import os
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrics import stage
+
+### Mode of New Definition Files (as open() creates them; computed on first use, see newFileMode)
+NEW_FILE_MODE = None
+NEW_FILE_MODE_LOCK = threading.Lock()
+
+### Precompiled SDEF/NDEF Templates
+SDEF_HEADER = (
+    "%**************************************************************************\n"
+    "% {} System Definition (SDEF)\n"
+    "% Each line is a maximum of eighty (80) characters!\n"
+    "%**************************************************************************\n"
+)
+SDEF_NODE = (
+    "NDNUMID = {};\t\t\t % Node Definition Number\n"
+    "NDFNAME = '{}';\t % Node Definition Filename\n"
+)
+SDEF_FOOTER = (
+    "%**************************************************************************\n"
+    "ENDDEF = {};\t\t\t\t % End of Node Definition\n"
+)
+NDEF_TEMPLATE = (
+    "%********************************************************************************************************\n"
+    "% {} Node Definition (NDEF)\n"
+    "%********************************************************************************************************\n"
+    "%**Feature Data: FD = FDZ*(dP/P)^FDNV + DC + NOISE\n"
+    "FDC = {};\t\t\t % Feature Data, DC\n"
+    "FDZ = {};\t\t\t % Nominal FD0 value for AC coefficient: 0=use FDC\n"
+    "FDNM = {};\t\t\t % Percent Noise Margin\n"
+    "FDCPTS = {};\t\t\t % Data points to average for FDC: up to 25\n"
+    "FDPTS = {};\t\t\t % Data points to average for FD: up to 5\n"
+    "FDNV = {};\t\t\t % Degradation Power n\n"
+    "FFPFAIL = {};\t\t\t % Functional Failure Margin - percent above nominal\n"
+    "%**Prognostic Modeling\n"
+    "PITTFF = {};\t\t\t % Default RUL = TTFF value\n"
+    "PIFFSMOD = {};\t\t\t % Model (1=Convex, 2=Linear, 3=Concave, 4=Convex-Concave, 5=Concave-Convex)\n"
+    "%**File Dependent Parameters\n"
+    "INFILE = {};\t\t % Input Filename (_OUT appended for Output)\n"
+    "INTYPE = {};\t\t\t % Input File Type (.csv/.txt)\n"
+    "OUTTYPE = {};\t\t\t % Output File Type (.csv/.txt)\n"
+    "%********************************************************************************************************\n"
+    "ENDDEF = {};\t\t\t % End of Node Definition\n"
+).format
 
 ### createSDEF Function
 def createSDEF(system_node_list, directory, filename, sdefname):
@@ -17,17 +64,7 @@ def createSDEF(system_node_list, directory, filename, sdefname):
     @returns: A .txt SDEF File in a "SDEF" subdirectory within the central directory
     """
     filepath = os.path.join(directory, f"{filename}")
-    content = "%**************************************************************************\n"
-    content += "% {} System Definition (SDEF)\n".format(sdefname)
-    content += "% Each line is a maximum of eighty (80) characters!\n"
-    content += "%**************************************************************************\n"
-    for NDNUMID, NDFNAME, ENDDEF in system_node_list:
-        content += "NDNUMID = {};\t\t\t % Node Definition Number\n".format(NDNUMID)
-        content += "NDFNAME = '{}';\t % Node Definition Filename\n".format(NDFNAME)
-    content += "%**************************************************************************\n"
-    content += "ENDDEF = {};\t\t\t\t % End of Node Definition\n".format(ENDDEF)
-    with open(filepath, 'w') as file:
-        file.write(content)
+    writeDEFfile(filepath, renderSDEF(system_node_list, sdefname))
     return None
 
 ### createNDEF Function
@@ -41,28 +78,121 @@ def createNDEF(node_params, directory, filename, ndefname):
     ndefname: Name of the NDEF
     @returns: A .txt SDEF File in a "SDEF" subdirectory within the central directory
     """
-    FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF = node_params
     filepath = os.path.join(directory, f"{filename}")
-    content = "%********************************************************************************************************\n"
-    content += "% {} Node Definition (NDEF)\n".format(ndefname)
-    content += "%********************************************************************************************************\n"
-    content += "%**Feature Data: FD = FDZ*(dP/P)^FDNV + DC + NOISE\n"
-    content += "FDC = {};\t\t\t % Feature Data, DC\n".format(FDC)
-    content += "FDZ = {};\t\t\t % Nominal FD0 value for AC coefficient: 0=use FDC\n".format(FDZ)
-    content += "FDNM = {};\t\t\t % Percent Noise Margin\n".format(FDNM)
-    content += "FDCPTS = {};\t\t\t % Data points to average for FDC: up to 25\n".format(FDCPTS)
-    content += "FDPTS = {};\t\t\t % Data points to average for FD: up to 5\n".format(FDPTS)
-    content += "FDNV = {};\t\t\t % Degradation Power n\n".format(FDNV)
-    content += "FFPFAIL = {};\t\t\t % Functional Failure Margin - percent above nominal\n".format(FFPFAIL)
-    content += "%**Prognostic Modeling\n"
-    content += "PITTFF = {};\t\t\t % Default RUL = TTFF value\n".format(PITTFF)
-    content += "PIFFSMOD = {};\t\t\t % Model (1=Convex, 2=Linear, 3=Concave, 4=Convex-Concave, 5=Concave-Convex)\n".format(PIFFSMOD)
-    content += "%**File Dependent Parameters\n"
-    content += "INFILE = {};\t\t % Input Filename (_OUT appended for Output)\n".format(INFILE)
-    content += "INTYPE = {};\t\t\t % Input File Type (.csv/.txt)\n".format(INTYPE)
-    content += "OUTTYPE = {};\t\t\t % Output File Type (.csv/.txt)\n".format(OUTTYPE)
-    content += "%********************************************************************************************************\n"
-    content += "ENDDEF = {};\t\t\t % End of Node Definition\n".format(ENDDEF)
-    with open(filepath, 'w') as file:
-        file.write(content)
-    return None
\ No newline at end of file
+    writeDEFfile(filepath, renderNDEF(node_params, ndefname))
+    return None
+
+### renderSDEF Function
+def renderSDEF(system_node_list, sdefname):
+    """
+    Render the text of a SDEF File.
+
+    system_node_list: List of (NDNUMID, NDFNAME, ENDDEF)
+    sdefname: Name of the SDEF
+    @returns: SDEF text
+    """
+    ENDDEF = system_node_list[-1][2] if system_node_list else -9
+    nodes = ''.join([SDEF_NODE.format(NDNUMID, NDFNAME) for NDNUMID, NDFNAME, _ in system_node_list])
+    return SDEF_HEADER.format(sdefname) + nodes + SDEF_FOOTER.format(ENDDEF)
+
+### renderNDEF Function
+def renderNDEF(node_params, ndefname):
+    """
+    Render the text of a NDEF File from the precompiled NDEF template.
+
+    node_params: List of (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF) for a given node
+    ndefname: Name of the NDEF
+    @returns: NDEF text
+    """
+    return NDEF_TEMPLATE(ndefname, *node_params)
+
+### newFileMode Function
+def newFileMode():
+    """
+    Mode that open() gives a new file under the process umask, computed once.
+
+    The umask is read from /proc/self/status where available; otherwise it is read by
+    setting & restoring it, which briefly changes it for every thread of the process,
+    so that is done at most once, under a lock.
+
+    @returns: Permission bits of a new definition file, e.g. 0o644
+    """
+    global NEW_FILE_MODE
+    with NEW_FILE_MODE_LOCK:
+        if NEW_FILE_MODE is None:
+            umask = None
+            try:
+                with open('/proc/self/status', 'r') as status:
+                    for line in status:
+                        if line.startswith('Umask:'):
+                            umask = int(line.split()[1], 8)
+                            break
+            except (OSError, ValueError, IndexError):
+                pass
+            if umask is None:
+                umask = os.umask(0o022)
+                os.umask(umask)
+            NEW_FILE_MODE = 0o666 & ~umask
+        return NEW_FILE_MODE
+
+### writeDEFfile Function
+def writeDEFfile(filepath, content):
+    """
+    Write a definition file atomically, skipping the write if the file already holds the content.
+
+    The content goes to a temporary file in the same directory that is then renamed over
+    the target, so a concurrent UD_ARULE run never sees a half-written definition. The
+    file keeps the mode of the target it replaces (newFileMode for a new file).
+
+    filepath: Path to the definition file
+    content: Text of the definition file
+    @returns: True if the file was written, False if it was already up to date
+    """
+    mode = None
+    try:
+        with open(filepath, 'r') as file:
+            if file.read(len(content) + 1) == content:
+                return False
+            mode = stat.S_IMODE(os.fstat(file.fileno()).st_mode)
+    except OSError:
+        pass
+    if mode is None:
+        mode = newFileMode()
+    directory = os.path.dirname(filepath) or '.'
+    descriptor, temppath = tempfile.mkstemp(prefix='.tmp', suffix='.txt', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(content)
+        # mkstemp creates the file with mode 0600
+        os.chmod(temppath, mode)
+        os.replace(temppath, filepath)
+    except BaseException:
+        os.unlink(temppath)
+        raise
+    return True
+
+### writeDEFs Function
+def writeDEFs(system_node_list, sdefname, ndefs, directory, max_workers=None):
+    """
+    Bulk-write a SDEF and its NDEFs, touching only the files whose content changed.
+    The whole call is recorded as one 'writeDEFs' metrics stage.
+
+    system_node_list: List of (NDNUMID, NDFNAME, ENDDEF) for the SDEF (None = no SDEF)
+    sdefname: Name of the SDEF
+    ndefs: List of (NDFNAME, node_params) for the NDEFs
+    directory: Path to the ARULE/DEFS directory (holding the SDEF/ & NDEF/ subdirectories)
+    max_workers: Number of I/O threads (None = write from the calling thread)
+    @returns: Number of files written, number of files skipped as unchanged
+    """
+    with stage('writeDEFs', sdefname) as record:
+        jobs = [(os.path.join(directory, 'NDEF', f'{ndefname}.txt'), renderNDEF(node_params, ndefname))
+                for ndefname, node_params in ndefs]
+        if system_node_list is not None:
+            jobs.append((os.path.join(directory, 'SDEF', f'{sdefname}.txt'), renderSDEF(system_node_list, sdefname)))
+        if max_workers is None:
+            written = [writeDEFfile(filepath, content) for filepath, content in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                written = list(executor.map(lambda job: writeDEFfile(*job), jobs))
+        record['files'], record['written'] = len(written), sum(written)
+    return sum(written), len(written) - sum(written)
@@ -0,0 +1,122 @@
+# ========================================================================
+"""         BINARY SIDECAR CACHE FOR ARULE DOUT OUTPUT FILES           """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+The first read of a DOUT .csv file converts it into a sidecar directory
+DOUT/.sidecar/{filename}/ holding one .npy file per column and a meta.json that
+records the size & modification time of the source and the column files. Later reads
+memory-map only the requested columns; a changed source file invalidates its sidecar.
+Every build writes new column file names ({column}.{build}.npy) and then swaps meta.json
+atomically, so a rebuild never overwrites an array another reader has memory-mapped.
+"""
+### Import Libraries
+import json
+import os
+import uuid
+import numpy as np
+
+### FUNCTIONS
+# sidecarDirectory Function
+def sidecarDirectory(filepath):
+    """
+    Directory of the binary sidecar of a DOUT file.
+
+    filepath: Path to the ARULE .csv output file
+    @returns: Path to the sidecar directory
+    """
+    return os.path.join(os.path.dirname(filepath), '.sidecar', os.path.basename(filepath))
+
+# sourceStamp Function
+def sourceStamp(filepath):
+    """
+    Size & modification time of a DOUT file, used to invalidate its sidecar.
+
+    filepath: Path to the ARULE .csv output file
+    @returns: Dictionary with size & mtime_ns
+    """
+    stat = os.stat(filepath)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+# readMeta Function
+def readMeta(directory):
+    """
+    @returns: meta.json of a sidecar directory, or None if it is missing or unreadable
+    """
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+# buildSidecar Function
+def buildSidecar(filepath):
+    """
+    Convert a DOUT .csv file into its binary columnar sidecar.
+
+    filepath: Path to the ARULE .csv output file
+    @returns: Dictionary of the sidecar meta data (size, mtime_ns, columns in file order & column files)
+    """
+    import pandas as pd
+    stamp = sourceStamp(filepath)
+    output_data = pd.read_csv(filepath)
+    directory = sidecarDirectory(filepath)
+    os.makedirs(directory, exist_ok=True)
+    previous = readMeta(directory)
+    build = uuid.uuid4().hex[:12]
+    columns = list(output_data.columns)
+    files = {}
+    for column in columns:
+        values = output_data[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        files[column] = f'{column}.{build}.npy'
+        np.save(os.path.join(directory, files[column]), values)
+    # meta.json is swapped in last, so a sidecar is only used once all its columns are written
+    meta = dict(stamp, columns=columns, files=files)
+    temppath = os.path.join(directory, f'meta.json.tmp{build}')
+    with open(temppath, 'w') as file:
+        json.dump(meta, file)
+    os.replace(temppath, os.path.join(directory, 'meta.json'))
+    # Arrays of the previous build stay valid for readers that already mapped them (POSIX)
+    for filename in (previous or {}).get('files', {}).values():
+        try:
+            os.remove(os.path.join(directory, filename))
+        except OSError:
+            pass
+    return meta
+
+# readSidecar Function
+def readSidecar(filepath, columns=None, build=True):
+    """
+    Memory-map columns of a DOUT file from its sidecar, (re)building the sidecar when needed.
+
+    filepath: Path to the ARULE .csv output file
+    columns: Names of the columns to map (None = all columns)
+    build: Build a missing or stale sidecar (True), or return None instead (False)
+    @returns: Dictionary of column name to read-only memory-mapped array, or None if no sidecar is available
+    """
+    directory = sidecarDirectory(filepath)
+    meta = readMeta(directory)
+    stamp = sourceStamp(filepath)
+    # Sidecars of older versions have no 'files' & are rebuilt
+    if meta is None or 'files' not in meta or meta['size'] != stamp['size'] or meta['mtime_ns'] != stamp['mtime_ns']:
+        if not build:
+            return None
+        try:
+            meta = buildSidecar(filepath)
+        except OSError:
+            # e.g. a read-only DOUT directory: callers fall back to parsing the .csv
+            return None
+    if columns is None:
+        columns = meta['columns']
+    arrays = {}
+    for column in columns:
+        if column not in meta['columns']:
+            raise KeyError(f"Column {column} not found in {filepath}.")
+        try:
+            arrays[column] = np.load(os.path.join(directory, meta['files'][column]), mmap_mode='r')
+        except FileNotFoundError:
+            # Removed by a concurrent rebuild after meta.json was read: parse the .csv instead
+            return None
+    return arrays
@@ -0,0 +1,105 @@
+# ========================================================================
+"""       SHAPE-PRESERVING DOWNSAMPLING OF ARULE SERIES FOR PLOTTING    """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+A plot can only show as many distinct x positions as its axes have pixels, so long
+series are reduced to a few points per pixel column before they are drawn:
+  minmax: the first, minimum, maximum & last sample of each bucket (exact envelope)
+  lttb:   Largest-Triangle-Three-Buckets, one visually most significant sample per bucket
+The first & last samples and any requested indexes (e.g. BD/EOL) are always kept.
+"""
+### Import Libraries
+import numpy as np
+
+### FUNCTIONS
+# bucketEdges Function
+def bucketEdges(n, buckets):
+    """
+    Split n samples into contiguous buckets of (nearly) equal size.
+
+    n: Number of samples
+    buckets: Number of buckets
+    @returns: Array of buckets+1 sample offsets, starting at 0 & ending at n
+    """
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+# minMaxIndexes Function
+def minMaxIndexes(y, buckets):
+    """
+    Pick the first, minimum, maximum & last sample of every bucket (NaNs are skipped).
+
+    y: Series values
+    buckets: Number of buckets (about the pixel width of the axes)
+    @returns: Sorted array of sample indexes
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    starts = bucketEdges(n, buckets)[:-1]
+    starts = starts[np.diff(np.append(starts, n)) > 0]
+    sizes = np.diff(np.append(starts, n))
+    bucket = np.repeat(np.arange(len(starts)), sizes)
+    picked = [starts, np.append(starts[1:], n) - 1]
+    with np.errstate(invalid='ignore'):
+        for reduce in (np.fmin, np.fmax):
+            extreme = np.repeat(reduce.reduceat(y, starts), sizes)
+            hits = np.flatnonzero(y == extreme)
+            # First hit of each bucket (buckets that are all NaN have none)
+            picked.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(picked))
+
+# lttbIndexes Function
+def lttbIndexes(x, y, points):
+    """
+    Pick samples with Largest-Triangle-Three-Buckets.
+
+    x: Sample times
+    y: Series values
+    points: Number of samples to keep (at least 3)
+    @returns: Sorted array of sample indexes
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    # The first & last samples are their own buckets; the rest is split evenly
+    edges = 1 + bucketEdges(n - 2, points - 2)
+    picked = np.empty(points, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = np.nanmean(x[edges[i + 1]:edges[i + 2]])
+            next_y = np.nanmean(y[edges[i + 1]:edges[i + 2]])
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + (int(np.nanargmax(area)) if np.isfinite(area).any() else 0)
+        picked[i + 1] = a
+    return picked
+
+# downsampleIndexes Function
+def downsampleIndexes(x, y, max_points, keep=(), method='minmax'):
+    """
+    Indexes of the samples of one series to draw so it fits within max_points.
+
+    x: Sample times
+    y: Series values
+    max_points: Maximum number of samples to draw (series this short are returned whole)
+    keep: Indexes that are always kept (e.g. the BD/EOL samples)
+    method: 'minmax' or 'lttb'
+    @returns: Sorted array of sample indexes
+    """
+    n = len(y)
+    keep = np.asarray(keep, dtype=np.int64).ravel()
+    if not max_points or n <= max_points:
+        return np.arange(n)
+    if method == 'minmax':
+        indexes = minMaxIndexes(y, max(max_points // 4, 1))
+    elif method == 'lttb':
+        indexes = lttbIndexes(x, y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}', expected 'minmax' or 'lttb'.")
+    return np.union1d(indexes, keep[(keep >= 0) & (keep < n)])
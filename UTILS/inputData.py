@@ -0,0 +1,130 @@
+# ========================================================================
+"""        FAST LOADER & VALIDATOR FOR ARULE DINP INPUT FILES          """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+DINP files hold two columns, time (DT) & amplitude (DA), separated by tabs (.txt),
+commas (.csv) or other whitespace; the delimiter & an optional header line are sniffed
+from the start of the file rather than trusted from INTYPE. The numbers are parsed by
+NumPy's C reader, checked for non-finite values & non-increasing time, and can be
+cached as a binary .npy copy in DINP/.cache/ that is reused while the source is unchanged.
+"""
+### Import Libraries
+import glob
+import os
+import numpy as np
+
+### Input Settings
+DINP_DIRECTORY = os.path.join('ARULE', 'DATA', 'DINP')
+# Tab separated files are read as whitespace separated: some mix tabs & spaces (e.g. SP4000_1.txt)
+DELIMITERS = (',', ';')
+
+### FUNCTIONS
+# sniffInput Function
+def sniffInput(filepath, sample_bytes=4096):
+    """
+    Detect the delimiter & header of a DINP file from its first non-blank line.
+
+    filepath: Path to the input file
+    sample_bytes: Number of bytes inspected
+    @returns: Delimiter (None = tabs/whitespace), True if the first line is a header
+    """
+    with open(filepath, 'r', errors='replace') as file:
+        sample = file.read(sample_bytes)
+    first = next((line for line in sample.splitlines() if line.strip()), '')
+    delimiter = next((candidate for candidate in DELIMITERS if candidate in first), None)
+    fields = first.split(delimiter)
+    try:
+        [float(value) for value in fields]
+        header = False
+    except ValueError:
+        header = True
+    return delimiter, header
+
+# parseInput Function
+def parseInput(filepath, delimiter=None, header=False):
+    """
+    Parse a two-column DINP file into a (rows x 2) float64 array.
+
+    filepath: Path to the input file
+    delimiter: Column delimiter (None = whitespace)
+    header: Skip the first line (True/False)
+    @returns: NumPy array of shape (rows, 2)
+    """
+    # loadtxt parses in C (NumPy >= 1.23) and reports the offending line of ragged or non-numeric rows
+    return np.loadtxt(filepath, delimiter=delimiter, skiprows=int(header), ndmin=2, dtype=np.float64)
+
+# validateInput Function
+def validateInput(dt, da, filepath=''):
+    """
+    Check a time/amplitude series for non-finite values & non-increasing time.
+
+    dt: Time column
+    da: Amplitude column
+    filepath: Path of the file, used in the error message
+    @returns: None (raises ValueError naming the first bad row, 1-based)
+    """
+    bad = np.flatnonzero(~(np.isfinite(dt) & np.isfinite(da)))
+    if bad.size:
+        raise ValueError(f"{filepath}: non-finite DT/DA in row {bad[0] + 1} ({bad.size} rows).")
+    bad = np.flatnonzero(np.diff(dt) <= 0)
+    if bad.size:
+        raise ValueError(f"{filepath}: DT is not increasing at row {bad[0] + 2} "
+                         f"({dt[bad[0]]} -> {dt[bad[0] + 1]}, {bad.size} rows).")
+    return None
+
+# cachePath Function
+def cachePath(filepath):
+    """
+    @returns: Path of the binary copy of an input file, keyed by the size & mtime of the source
+    """
+    stat = os.stat(filepath)
+    directory, filename = os.path.split(filepath)
+    return os.path.join(directory, '.cache', f'{filename}.{stat.st_size}.{stat.st_mtime_ns}.npy')
+
+# loadInput Function
+def loadInput(filepath, validate=True, cache=False, mmap=False):
+    """
+    Load a two-column DINP file.
+
+    filepath: Path to the input file
+    validate: Check for non-finite values & non-increasing time (True/False, always done before a binary copy is written)
+    cache: Reuse/write a binary .npy copy in the .cache/ directory next to the file (True/False)
+    mmap: Memory-map the cached copy instead of reading it (True/False, needs cache=True)
+    @returns: dt, da
+    """
+    if cache:
+        cachepath = cachePath(filepath)
+        if os.path.exists(cachepath):
+            data = np.load(cachepath, mmap_mode='r' if mmap else None)
+            # The cached copy was validated when it was written
+            return data[:, 0], data[:, 1]
+    data = parseInput(filepath, *sniffInput(filepath))
+    if data.shape[1] != 2:
+        raise ValueError(f"{filepath}: expected 2 columns (DT, DA), found {data.shape[1]}.")
+    if validate or cache:
+        validateInput(data[:, 0], data[:, 1], filepath)
+    if cache:
+        try:
+            os.makedirs(os.path.dirname(cachepath), exist_ok=True)
+            for stale in glob.glob(os.path.join(os.path.dirname(cachepath), f'{glob.escape(os.path.basename(filepath))}.*.npy')):
+                os.remove(stale)
+            temppath = f'{cachepath}.tmp{os.getpid()}.npy'
+            np.save(temppath, data)
+            os.replace(temppath, cachepath)
+        except OSError:
+            # e.g. a read-only DINP directory: the parsed data are still returned
+            pass
+    return data[:, 0], data[:, 1]
+
+# readInput Function
+def readInput(infile, intype, directory=DINP_DIRECTORY, validate=True, cache=False, mmap=False):
+    """
+    Load the DINP file of a node from its NDEF INFILE & INTYPE.
+
+    infile: Input Filename (without extension)
+    intype: Input File Type (.csv/.txt)
+    directory: Directory holding the input files
+    @returns: dt, da (see loadInput)
+    """
+    return loadInput(os.path.join(directory, f'{infile}{intype}'), validate, cache, mmap)
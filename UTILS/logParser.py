@@ -0,0 +1,213 @@
+# ========================================================================
+"""        STREAMING PARSER & BATCH TRIAGE FOR UD_ARULE LOG FILES      """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+UD_ARULE_LOG_{sdefname}.txt files are read line by line (never whole) and every
+non-blank line becomes a LogRecord with the fields found on it:
+  timestamp  e.g. 2024-03-01 02:15:07, 03/01/2024 02:15:07 or 02:15:07
+  level      FATAL, ERROR, WARNING, INFO or DEBUG: the first level keyword with a nonzero
+             count of its own ("1 error") or followed by a message (INFO when there is none,
+             so "Warning count: 0", "Errors = 0", "0 errors", "No errors found", "Errors: none"
+             and the warnings of "0 warnings, 1 error" are not problems)
+  node       NDNUMID of the node the line refers to (ND_3, NODE 3, NDNUMID = 3)
+  rc         Return code on the line (RC = 2, RC0: 2, Return Code 2)
+Per-log LogSummary records are aggregated over many runs with scanLogs, e.g.
+failedNodes(scanLogs(since=time.time() - 86400)) for all nodes with RC > 0 last night.
+"""
+### Import Libraries
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+### Log Line Patterns
+TIMESTAMP_RE = re.compile(r'\d{4}[-/]\d{2}[-/]\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?|\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}:\d{2}|\b\d{2}:\d{2}:\d{2}\b')
+LEVEL_RE = re.compile(r'\b(FATAL|ERROR|ERR|WARNING|WARN|INFO|DEBUG)S?\b', re.IGNORECASE)
+# Count written right before a level keyword, e.g. "0 warnings", "1 error", "No errors"
+COUNT_BEFORE_RE = re.compile(r'\b(\d+|no|zero)\s+$', re.IGNORECASE)
+# Text after a level keyword that only reports a zero count, e.g. "Warning count: 0", "Errors: none"
+ZERO_AFTER_RE = re.compile(r'^\W*(?:counts?|total|found)?\W*(?:0+|none|no|zero)(?:\W+found)?\W*$', re.IGNORECASE)
+# A zero count after a level keyword ends at the next list separator ("Errors: none, see ...")
+SEPARATOR_RE = re.compile(r'[,;|]')
+# (?!\d) rather than \b, as in file names the node number is followed by '_' (ND_3_DW_...)
+NODE_RE = re.compile(r'\b(?:NDNUMID|NODE|ND)[\s_#:=]*(\d+)(?!\d)', re.IGNORECASE)
+RC_RE = re.compile(r'\b(?:RC\d?|RETURN\s*CODE)\s*[=:]?\s*(-?\d+)\b', re.IGNORECASE)
+LEVELS = {'ERR': 'ERROR', 'WARN': 'WARNING'}
+LOG_DIRECTORY = os.path.join('ARULE', 'DATA', 'LOG')
+
+### CLASSES
+# LogRecord Class
+@dataclass(slots=True)
+class LogRecord:
+    """
+    Structured contents of one UD_ARULE log line.
+    """
+    sdefname: str
+    lineno: int
+    timestamp: str
+    level: str
+    node: int
+    rc: int
+    message: str
+
+# LogSummary Class
+@dataclass(slots=True)
+class LogSummary:
+    """
+    Aggregate of one UD_ARULE log: highest return code, counts & per-node return codes.
+    """
+    sdefname: str
+    path: str
+    mtime: float
+    lines: int = 0
+    rc: int = None
+    errors: int = 0
+    warnings: int = 0
+    first: str = None
+    last: str = None
+    nodes: dict = field(default_factory=dict)
+    problems: list = field(default_factory=list)
+
+### FUNCTIONS
+# logPath Function
+def logPath(sdefname, directory=LOG_DIRECTORY):
+    """
+    @returns: Path to the UD_ARULE log of an SDEF
+    """
+    return os.path.join(directory, f'UD_ARULE_LOG_{sdefname}.txt')
+
+# logSDEFName Function
+def logSDEFName(path):
+    """
+    @returns: SDEF name of a UD_ARULE_LOG_{sdefname}.txt path
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[len('UD_ARULE_LOG_'):] if name.startswith('UD_ARULE_LOG_') else name
+
+# parseLevel Function
+def parseLevel(message):
+    """
+    Level of a log line: its first level keyword with a nonzero count or a message of its own.
+
+    Each keyword is judged by the count right before it ("0 warnings", "1 error", "No errors")
+    and otherwise by its own text after it, up to the next keyword or separator.
+
+    message: Text of the line
+    @returns: FATAL, ERROR, WARNING, INFO or DEBUG
+    """
+    matches = list(LEVEL_RE.finditer(message))
+    for i, match in enumerate(matches):
+        before = COUNT_BEFORE_RE.search(message[:match.start()])
+        if before is not None:
+            count = before.group(1).lower()
+            if count in ('no', 'zero') or int(count) == 0:
+                continue
+        else:
+            rest = message[match.end():matches[i+1].start() if i + 1 < len(matches) else len(message)]
+            if not re.sub(r'\W', '', rest) or ZERO_AFTER_RE.match(SEPARATOR_RE.split(rest, 1)[0]):
+                continue
+        level = match.group(1).upper()
+        return LEVELS.get(level, level)
+    return 'INFO'
+
+# parseLogLine Function
+def parseLogLine(line, sdefname=None, lineno=0):
+    """
+    Extract the structured fields of one log line.
+
+    line: Text of the line
+    sdefname: Name of the SDEF the log belongs to
+    lineno: Line number in the log (1-based)
+    @returns: LogRecord, or None for a blank line
+    """
+    message = line.strip()
+    if not message:
+        return None
+    timestamp = TIMESTAMP_RE.search(message)
+    node = NODE_RE.search(message)
+    rc = RC_RE.search(message)
+    return LogRecord(sdefname, lineno, timestamp.group(0) if timestamp else None, parseLevel(message),
+                     int(node.group(1)) if node else None, int(rc.group(1)) if rc else None, message)
+
+# iterLog Function
+def iterLog(path):
+    """
+    Stream the records of a UD_ARULE log without reading the whole file.
+
+    path: Path to the log (see logPath)
+    @returns: Generator of LogRecord
+    """
+    sdefname = logSDEFName(path)
+    with open(path, 'r', errors='replace') as file:
+        for lineno, line in enumerate(file, 1):
+            record = parseLogLine(line, sdefname, lineno)
+            if record is not None:
+                yield record
+
+# summarizeLog Function
+def summarizeLog(path, max_problems=20):
+    """
+    Aggregate one UD_ARULE log in a single streaming pass.
+
+    path: Path to the log (see logPath)
+    max_problems: Number of warning/error records kept in the summary
+    @returns: LogSummary
+    """
+    summary = LogSummary(logSDEFName(path), path, os.path.getmtime(path))
+    for record in iterLog(path):
+        summary.lines += 1
+        if record.timestamp is not None:
+            summary.first = summary.first or record.timestamp
+            summary.last = record.timestamp
+        if record.rc is not None:
+            summary.rc = record.rc if summary.rc is None else max(summary.rc, record.rc)
+            if record.node is not None:
+                summary.nodes[record.node] = max(summary.nodes.get(record.node, record.rc), record.rc)
+        problem = record.level in ('FATAL', 'ERROR', 'WARNING') or (record.rc or 0) > 0
+        if record.level in ('FATAL', 'ERROR'):
+            summary.errors += 1
+        elif record.level == 'WARNING':
+            summary.warnings += 1
+        if problem and len(summary.problems) < max_problems:
+            summary.problems.append(record)
+    return summary
+
+# scanLogs Function
+def scanLogs(directory=LOG_DIRECTORY, sdefnames=None, since=None, max_workers=None):
+    """
+    Summarize the UD_ARULE logs of many runs.
+
+    directory: Path to the LOG directory
+    sdefnames: Names of the SDEFs to scan (None = every UD_ARULE_LOG_*.txt in directory)
+    since: Only scan logs modified at or after this time.time() value (None = all)
+    max_workers: Number of worker processes (None = parse in the calling process)
+    @returns: List of LogSummary, sorted by SDEF name
+    """
+    if sdefnames is None:
+        paths = glob.glob(os.path.join(directory, 'UD_ARULE_LOG_*.txt'))
+    else:
+        paths = [logPath(sdefname, directory) for sdefname in sdefnames]
+    paths = sorted(path for path in paths if os.path.exists(path) and (since is None or os.path.getmtime(path) >= since))
+    if max_workers is None:
+        return [summarizeLog(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(summarizeLog, paths, chunksize=64))
+
+# failedNodes Function
+def failedNodes(summaries, min_rc=1):
+    """
+    List the nodes whose return code reached min_rc, e.g. all nodes with RC0 > 0.
+
+    summaries: List of LogSummary (see scanLogs)
+    min_rc: Lowest return code counted as a failure
+    @returns: List of (sdefname, NDNUMID, rc), with NDNUMID None for a run-level return code
+    """
+    failed = []
+    for summary in summaries:
+        nodes = [(summary.sdefname, node, rc) for node, rc in sorted(summary.nodes.items()) if rc >= min_rc]
+        if not nodes and summary.rc is not None and summary.rc >= min_rc:
+            nodes = [(summary.sdefname, None, summary.rc)]
+        failed.extend(nodes)
+    return failed
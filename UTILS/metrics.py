@@ -0,0 +1,196 @@
+# ========================================================================
+"""        STAGE TIMING & RESOURCE METRICS FOR THE ARULE PIPELINE      """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Every instrumented stage (DEF generation, the UD_ARULE run, DEF & output reading,
+plotting) records one metrics dictionary:
+  stage, node, start (epoch s), wall_s, cpu_s, read_bytes, write_bytes
+read/write bytes come from /proc/self/io (0 where it is not available). UD_ARULE stages
+also record child_maxrss_kb, the peak resident memory of that exe run alone (runChild,
+0 where os.wait4 is not available). The last MAX_RECORDS records are kept in memory
+and exported as JSON lines or summed per stage in a snapshot. The colored console messages of the utilities go through
+report(), which does nothing in quiet mode (ARULE_QUIET=1 or configure(quiet=True)).
+"""
+### Import Libraries
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+from termcolor import colored
+
+### Metrics Settings & Recorded Stages
+SETTINGS = {'quiet': os.environ.get('ARULE_QUIET', '0') not in ('', '0'), 'enabled': True}
+# Oldest records are dropped beyond this, so a long-lived process does not grow without bound
+MAX_RECORDS = 100000
+RECORDS = deque(maxlen=MAX_RECORDS)
+
+### FUNCTIONS
+# configure Function
+def configure(quiet=None, enabled=None):
+    """
+    Switch the console messages and the metrics recording on or off.
+
+    quiet: Suppress the colored console messages (True/False, None = unchanged)
+    enabled: Record stage metrics (True/False, None = unchanged)
+    @returns: None
+    """
+    if quiet is not None:
+        SETTINGS['quiet'] = quiet
+    if enabled is not None:
+        SETTINGS['enabled'] = enabled
+    return None
+
+# report Function
+def report(message, color='green'):
+    """
+    Print a colored "##### ARULEinPython:" console message unless in quiet mode.
+    """
+    if not SETTINGS['quiet']:
+        print("##### ARULEinPython:", colored(message, color))
+    return None
+
+# ioCounters Function
+def ioCounters():
+    """
+    @returns: Bytes read & written by this process so far (0, 0 if /proc/self/io is unavailable)
+    """
+    try:
+        with open('/proc/self/io', 'rb') as file:
+            counters = dict(line.split(b':') for line in file.read().splitlines())
+        return int(counters[b'rchar']), int(counters[b'wchar'])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+# runChild Function
+def runChild(command, cwd=None):
+    """
+    Run a command to completion, capturing its output & the peak resident memory of that process.
+
+    command: Command list
+    cwd: Working directory
+    @returns: subprocess.CompletedProcess (text stdout & stderr), peak RSS of the child in kB (0 if unknown)
+    """
+    if not hasattr(os, 'wait4'):  # Windows
+        return subprocess.run(command, cwd=cwd, capture_output=True, text=True), 0
+    # Output goes to files rather than pipes, as the child is reaped by os.wait4 instead of communicate()
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, cwd=cwd, stdout=stdout, stderr=stderr)
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stdout.seek(0)
+        stderr.seek(0)
+        completed = subprocess.CompletedProcess(command, process.returncode, stdout.read().decode(errors='replace'),
+                                                stderr.read().decode(errors='replace'))
+    # ru_maxrss is in bytes on macOS, kB elsewhere
+    maxrss = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return completed, maxrss
+
+# stage Function
+@contextmanager
+def stage(name, node=None, **fields):
+    """
+    Record the wall time, CPU time & I/O bytes of a block of code.
+
+    name: Name of the stage, e.g. 'readARULEOutput'
+    node: Name of the node (or system) the stage works on
+    fields: Extra fields stored in the record
+    @returns: Context manager yielding the record, which is filled in when the block exits
+    """
+    record = dict(stage=name, node=node, **fields)
+    if not SETTINGS['enabled']:
+        yield record
+        return
+    read_bytes, write_bytes = ioCounters()
+    record['start'] = time.time()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_s'] = time.perf_counter() - wall
+        record['cpu_s'] = time.process_time() - cpu
+        read_after, write_after = ioCounters()
+        record['read_bytes'] = read_after - read_bytes
+        record['write_bytes'] = write_after - write_bytes
+        RECORDS.append(record)
+
+# instrument Function
+def instrument(name, node=None):
+    """
+    Decorator recording every call of a function as a stage.
+
+    name: Name of the stage
+    node: Optional callable mapping the call arguments to the node name
+    @returns: Decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not SETTINGS['enabled']:
+                return function(*args, **kwargs)
+            with stage(name, node(*args, **kwargs) if node is not None else None):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# addRecords Function
+def addRecords(records):
+    """
+    Add records measured elsewhere (e.g. returned by batch worker processes).
+    """
+    if SETTINGS['enabled']:
+        RECORDS.extend(records)
+    return None
+
+# resetMetrics Function
+def resetMetrics():
+    """
+    Drop all recorded stages.
+    """
+    RECORDS.clear()
+    return None
+
+# exportMetrics Function
+def exportMetrics(filepath, reset=True):
+    """
+    Append the recorded stages to a JSON-lines file.
+
+    filepath: Path to the .jsonl file
+    reset: Drop the exported records from memory (True/False)
+    @returns: Number of records written
+    """
+    records = list(RECORDS)
+    with open(filepath, 'a') as file:
+        for record in records:
+            file.write(json.dumps(record) + '\n')
+    if reset:
+        for _ in range(min(len(records), len(RECORDS))):
+            RECORDS.popleft()
+    return len(records)
+
+# metricsSnapshot Function
+def metricsSnapshot():
+    """
+    Sum the recorded stages per stage name.
+
+    @returns: Dictionary of stage name to count, wall_s, cpu_s, read_bytes, write_bytes & max child_maxrss_kb
+    """
+    snapshot = {}
+    for record in RECORDS:
+        total = snapshot.setdefault(record['stage'], {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'read_bytes': 0,
+                                                      'write_bytes': 0, 'child_maxrss_kb': 0})
+        total['count'] += 1
+        for key in ('wall_s', 'cpu_s', 'read_bytes', 'write_bytes'):
+            total[key] += record.get(key, 0)
+        total['child_maxrss_kb'] = max(total['child_maxrss_kb'], record.get('child_maxrss_kb', 0))
+    return snapshot
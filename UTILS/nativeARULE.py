@@ -0,0 +1,391 @@
+# ========================================================================
+"""        NATIVE NUMPY PROGNOSTIC ENGINE FOR ARULE IN PYTHON          """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+In-process alternative to UD_ARULE.exe implementing the NDEF node model:
+
+    FD = FDZ*(dP/P)^FDNV + DC + NOISE
+
+  - DA is averaged over FDPTS points to give FD.
+  - DC is FDC, or the running average of FD over the first FDCPTS points when FDCPTS > 0.
+  - FDNOM (FD0) is FDZ, or DC when FDZ = 0 (no degradation is reported while FD0 = 0).
+  - FFP = (FD - DC)/FD0 - FDNM/100, the fractional rise above the noise margin (negative while healthy).
+  - DPS = FFP^(1/FDNV) while FFP > 0 (0 otherwise), the linearised degradation dP/P.
+  - FFS = 100*DPS/DPS(FFPFAIL/100), 100 at functional failure & above it past failure.
+  - FFIN = FFS, SOH = 100 - FFIN clipped to [0, 100].
+  - BD is the first sample with FFIN > 0, EOL the first with FFIN >= 100. Every run of
+    samples with FFIN > 0 fits x = tau/T through the origin (x = PIFFSMOD curve inverse
+    of FFIN, tau = time since the start of the run) by least squares, T = sum(tau^2)/sum(tau*x).
+    RUL = T - tau is blended in from the prior RUL (PITTFF at BD) over the first
+    MIN_FIT_POINTS samples of a run and held while FFIN falls back to 0.
+  - PH is the prognostic horizon RUL + tau (PITTFF until BD, EOL - BD after EOL).
+This follows the reference UD_ARULE outputs in PLOTS/ closely but not exactly (see
+TESTS/test_nativeARULE.py), so native results are an approximation of the exe.
+"""
+### Import Libraries
+import os
+import numpy as np
+from inputData import readInput
+
+### Output Columns (in the order returned by readARULEOutput)
+ARULE_COLUMNS = ['FLAG', 'DT', 'DA', 'RUL', 'PH', 'SOH', 'BD', 'EOL', 'FDNOM', 'FD', 'FFP', 'DPS', 'FFS', 'FFIN', 'RC0', 'RS0']
+# Samples of a degradation run over which the fitted RUL replaces the prior RUL
+MIN_FIT_POINTS = 10
+
+### FUNCTIONS
+# ffsModel Function
+def ffsModel(x, piffsmod):
+    """
+    Evaluate a PIFFSMOD curve shape, mapping normalised time to normalised FFIN.
+
+    x: Normalised time since BD, 0 at BD and 1 at EOL
+    piffsmod: Model (1=Convex, 2=Linear, 3=Concave, 4=Convex-Concave, 5=Concave-Convex)
+    @returns: Normalised FFIN (0 to 1)
+    """
+    x = np.clip(x, 0.0, 1.0)
+    if piffsmod == 1:
+        return x**2
+    if piffsmod == 2:
+        return x
+    if piffsmod == 3:
+        return 1.0 - (1.0 - x)**2
+    if piffsmod == 4:
+        return 3.0*x**2 - 2.0*x**3
+    if piffsmod == 5:
+        return 0.5 + 4.0*(x - 0.5)**3
+    raise ValueError(f"PIFFSMOD must be 1-5, got {piffsmod}.")
+
+# ffsModelInverse Function
+def ffsModelInverse(y, piffsmod):
+    """
+    Invert a PIFFSMOD curve shape, mapping normalised FFIN to normalised time.
+
+    y: Normalised FFIN (0 to 1)
+    piffsmod: Model (1=Convex, 2=Linear, 3=Concave, 4=Convex-Concave, 5=Concave-Convex)
+    @returns: Normalised time since BD, 0 at BD and 1 at EOL
+    """
+    y = np.clip(y, 0.0, 1.0)
+    if piffsmod == 1:
+        return np.sqrt(y)
+    if piffsmod == 2:
+        return y
+    if piffsmod == 3:
+        return 1.0 - np.sqrt(1.0 - y)
+    if piffsmod == 4:
+        return 0.5 - np.sin(np.arcsin(1.0 - 2.0*y)/3.0)
+    if piffsmod == 5:
+        return 0.5 + np.cbrt((y - 0.5)/4.0)
+    raise ValueError(f"PIFFSMOD must be 1-5, got {piffsmod}.")
+
+# movingAverage Function
+def movingAverage(da, points):
+    """
+    Trailing moving average of DA over FDPTS points (fewer at the start of the series).
+
+    da: Array of Data Amplitude values, 1-D for one node or 2-D (nodes x samples) for a fleet
+    points: Number of data points to average, a scalar or one value per node
+    @returns: Array of averaged values (FD) with the shape of da
+    """
+    da2 = np.atleast_2d(np.asarray(da, dtype=np.float64))
+    points = np.maximum(np.broadcast_to(np.asarray(points, dtype=np.int64), (da2.shape[0],)), 1)
+    csum = np.zeros((da2.shape[0], da2.shape[1] + 1))
+    np.cumsum(da2, axis=1, out=csum[:, 1:])
+    index = np.arange(1, da2.shape[1] + 1)
+    start = np.maximum(index[None, :] - points[:, None], 0)
+    fd = (csum[:, 1:] - np.take_along_axis(csum, start, axis=1)) / (index[None, :] - start)
+    return fd.reshape(np.shape(da))
+
+# signatures Function
+def signatures(fd, dc, fd0, fdnm, fdnv, ffpfail):
+    """
+    Compute the FFP, DPS, FFS & FFIN signatures from Feature Data.
+
+    fd: Array of Feature Data values
+    dc: FD DC value (FDC or the FDCPTS average)
+    fd0: FD Nominal Value (FDNOM)
+    fdnm: Percent Noise Margin (FDNM)
+    fdnv: Degradation Power n (FDNV)
+    ffpfail: Functional Failure Margin - percent above nominal (FFPFAIL)
+    @returns: ffp, dps, ffs, ffin
+    """
+    fd, dc, fd0 = np.broadcast_arrays(fd, dc, fd0)
+    ffp = np.divide(fd - dc, fd0, out=np.zeros(fd.shape), where=fd0 != 0) - fdnm/100.0
+    dps = np.where(ffp > 0, np.maximum(ffp, 0.0)**(1.0/fdnv), 0.0)
+    dpsfail = (ffpfail/100.0)**(1.0/fdnv)
+    ffs = 100.0*dps/dpsfail
+    ffin = ffs.copy()
+    return ffp, dps, ffs, ffin
+
+# forwardFill Function
+def forwardFill(values, mask, initial):
+    """
+    Carry the last value where mask is True forward along each row.
+
+    values: 2-D array (nodes x samples)
+    mask: Boolean 2-D array of the samples whose value is carried forward
+    initial: Value per node used before the first masked sample
+    @returns: 2-D array of the carried values
+    """
+    index = np.where(mask, np.arange(values.shape[1])[None, :], -1)
+    np.maximum.accumulate(index, axis=1, out=index)
+    carried = np.take_along_axis(values, np.maximum(index, 0), axis=1)
+    return np.where(index >= 0, carried, np.asarray(initial, dtype=np.float64)[:, None])
+
+# newPrognosticState Function
+def newPrognosticState(m):
+    """
+    @returns: Prognostic state of m nodes that have not processed any samples (see prognoseFleet)
+    """
+    state = {key: np.full(m, np.nan) for key in ['ANCHOR', 'STT', 'STX', 'FULLRUL', 'PRIOR', 'RUL', 'PH', 'BD', 'EOL']}
+    state['PREV'] = np.zeros(m, dtype=bool)
+    state['RUNN'] = np.zeros(m, dtype=np.int64)
+    return state
+
+# prognoseFleet Function
+def prognoseFleet(dt, ffin, valid, pittff, piffsmod, state=None):
+    """
+    Compute the BD, EOL, RUL & PH columns from FFIN (see the module docstring).
+
+    dt: 2-D array of Data Time values (nodes x samples)
+    ffin: 2-D array of FFIN values
+    valid: Boolean 2-D array of the real (not padded) samples; padding must follow the last valid sample
+    pittff: Prior Time To Functional Failure per node (PITTFF)
+    piffsmod: FFS curve model per node (PIFFSMOD)
+    state: State carried from the previous samples of the nodes (None = new nodes)
+    @returns: flag, rul, ph, bd, eol (2-D arrays), state after the last valid sample
+    """
+    m, n = dt.shape
+    state = newPrognosticState(m) if state is None else state
+    if n == 0:
+        # No new samples: nothing to report & nothing to carry forward
+        return tuple(np.zeros((m, 0)) for _ in range(5)) + (state,)
+    rows = np.arange(m)
+    index = np.arange(n)[None, :]
+    pittff = np.broadcast_to(np.asarray(pittff, dtype=np.float64), (m,))
+    piffsmod = np.broadcast_to(np.asarray(piffsmod), (m,))
+    degraded = (ffin > 0) & valid
+    # Runs of degradation: start index in this chunk, -1 for a run continued from the state
+    previous = np.concatenate((state['PREV'][:, None], degraded[:, :-1]), axis=1)
+    start = np.where(degraded & ~previous, index, -1)
+    np.maximum.accumulate(start, axis=1, out=start)
+    continued = start < 0
+    anchor = np.where(continued, state['ANCHOR'][:, None], np.take_along_axis(dt, np.maximum(start, 0), axis=1))
+    run = np.where(continued, state['RUNN'][:, None] + index, index - start)
+    # Least-squares fit of x = tau/T through the origin over each run
+    tau = np.where(degraded, dt - anchor, 0.0)
+    x = np.zeros((m, n))
+    for model in np.unique(piffsmod):
+        group = piffsmod == model
+        x[group] = ffsModelInverse(ffin[group]/100.0, int(model))
+    x = np.where(degraded, x, 0.0)
+    sums = []
+    for values, initial in [(tau*tau, state['STT']), (tau*x, state['STX'])]:
+        csum = np.zeros((m, n + 1))
+        np.cumsum(values, axis=1, out=csum[:, 1:])
+        sums.append(np.where(continued, np.nan_to_num(initial)[:, None] + csum[:, 1:],
+                             csum[:, 1:] - np.take_along_axis(csum, np.maximum(start, 0), axis=1)))
+    stt, stx = sums
+    fitted = degraded & (stx > 0)
+    fit_rul = np.maximum(np.where(fitted, stt/np.where(fitted, stx, 1.0), 0.0) - tau, 0.0)
+    weight = np.clip(run/MIN_FIT_POINTS, 0.0, 1.0)
+    full = fitted & (weight >= 1.0)
+    # Prior RUL of a run: the last fully fitted RUL before it (PITTFF for the first run)
+    last_full = forwardFill(fit_rul, full, state['FULLRUL'])
+    before_start = np.take_along_axis(last_full, np.maximum(start - 1, 0), axis=1)
+    prior = np.where(continued, state['PRIOR'][:, None], np.where(start > 0, before_start, state['FULLRUL'][:, None]))
+    prior = np.where(np.isnan(prior), pittff[:, None], prior)
+    run_rul = np.where(fitted, (1.0 - weight)*prior + weight*fit_rul, prior)
+    # Beginning of Degradation, with RUL & PH held while FFIN is back at 0
+    seen = ~np.isnan(state['BD'])
+    ibd = np.argmax(degraded, axis=1)
+    tbd = np.where(seen, state['BD'], np.where(degraded.any(axis=1), dt[rows, ibd], np.nan))
+    after = (dt >= tbd[:, None]) & valid
+    held_rul = forwardFill(run_rul, degraded, state['RUL'])
+    held_ph = forwardFill(run_rul + tau, degraded, state['PH'])
+    rul = np.where(after, held_rul, pittff[:, None])
+    ph = np.where(after, held_ph, pittff[:, None])
+    eol = np.where(after, dt + rul, np.nan)
+    bd = np.where(after, tbd[:, None], np.nan)
+    flag = after.astype(np.float64)
+    # Functional Failure
+    failed = (ffin >= 100.0) & valid
+    ieol = np.argmax(failed, axis=1)
+    teol = np.where(~np.isnan(state['EOL']), state['EOL'], np.where(failed.any(axis=1), dt[rows, ieol], np.nan))
+    ended = (dt >= teol[:, None]) & valid
+    eol = np.where(ended, teol[:, None], eol)
+    rul = np.where(ended, 0.0, rul)
+    ph = np.where(ended, (teol - tbd)[:, None], ph)
+    flag[ended] = 2
+    # State after the last valid sample of every node
+    last = valid.sum(axis=1) - 1
+    has = last >= 0
+    pick = lambda array: np.take_along_axis(array, np.maximum(last, 0)[:, None], axis=1)[:, 0]
+    state = {'PREV': np.where(has, pick(degraded), state['PREV']),
+             'ANCHOR': np.where(has, pick(anchor), state['ANCHOR']),
+             'RUNN': np.where(has, pick(run) + 1, state['RUNN']),
+             'STT': np.where(has, pick(stt), state['STT']),
+             'STX': np.where(has, pick(stx), state['STX']),
+             'FULLRUL': np.where(has, pick(last_full), state['FULLRUL']),
+             'PRIOR': np.where(has, pick(prior), state['PRIOR']),
+             'RUL': np.where(has, pick(held_rul), state['RUL']),
+             'PH': np.where(has, pick(held_ph), state['PH']),
+             'BD': tbd, 'EOL': teol}
+    return flag, rul, ph, bd, eol, state
+
+# packFleet Function
+def packFleet(dts, das):
+    """
+    Pack many nodes' input series into padded 2-D arrays (nodes x samples).
+
+    dts: List of Data Time arrays, one per node
+    das: List of Data Amplitude arrays, one per node
+    @returns: dt, da (padded with NaN), lengths
+    """
+    lengths = np.array([len(dt) for dt in dts], dtype=np.int64)
+    if len(lengths) != len(das) or any(len(da) != n for da, n in zip(das, lengths)):
+        raise ValueError("DT and DA must have the same length for every node.")
+    width = int(lengths.max()) if len(lengths) else 0
+    valid = np.arange(width)[None, :] < lengths[:, None]
+    dt = np.full((len(lengths), width), np.nan)
+    da = np.full((len(lengths), width), np.nan)
+    if width:
+        dt[valid] = np.concatenate(dts)
+        da[valid] = np.concatenate(das)
+    return dt, da, lengths
+
+# unpackFleet Function
+def unpackFleet(array, lengths):
+    """
+    Split a padded 2-D fleet array back into one 1-D array per node.
+
+    array: Padded 2-D array (nodes x samples)
+    lengths: Number of valid samples per node
+    @returns: List of 1-D arrays (views into array)
+    """
+    return [row[:n] for row, n in zip(array, lengths)]
+
+# fleetParams Function
+def fleetParams(node_params):
+    """
+    Convert a list of NDEF parameter tuples into per-node parameter vectors.
+
+    node_params: List of (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, ...) tuples
+    @returns: Dictionary of NDEF field name to a NumPy vector with one value per node
+    """
+    table = np.array([[float(p) for p in params[:9]] for params in node_params], dtype=np.float64).reshape(-1, 9)
+    fields = ['FDC', 'FDZ', 'FDNM', 'FDCPTS', 'FDPTS', 'FDNV', 'FFPFAIL', 'PITTFF', 'PIFFSMOD']
+    vectors = {field: table[:, i] for i, field in enumerate(fields)}
+    for field in ['FDCPTS', 'FDPTS', 'PIFFSMOD']:
+        vectors[field] = vectors[field].astype(np.int64)
+    return vectors
+
+# runFleetARULE Function
+def runFleetARULE(dt, da, lengths, params):
+    """
+    Run the ARULE node model on a whole fleet at once as vectorised 2-D array passes.
+
+    dt: Padded 2-D array of Data Time values (nodes x samples, see packFleet)
+    da: Padded 2-D array of Data Amplitude values (nodes x samples, see packFleet)
+    lengths: Number of valid samples per node
+    params: Dictionary of per-node NDEF parameter vectors (see fleetParams)
+    @returns: FLAG, DT, DA, RUL, PH, SOH, BD, EOL, FDNOM, FD, FFP, DPS, FFS, FFIN, RC0, RS0, RS0 as 2-D arrays (NaN padded)
+    """
+    dt = np.asarray(dt, dtype=np.float64)
+    da = np.asarray(da, dtype=np.float64)
+    m, n = dt.shape
+    col = lambda field: np.asarray(params[field])[:, None]
+    fdc, fdz, fdnm, fdnv, ffpfail, pittff = [col(field) for field in ['FDC', 'FDZ', 'FDNM', 'FDNV', 'FFPFAIL', 'PITTFF']]
+    fdcpts, fdpts, piffsmod = [np.asarray(params[field]) for field in ['FDCPTS', 'FDPTS', 'PIFFSMOD']]
+    if np.any(fdnv <= 0) or np.any(ffpfail <= 0):
+        raise ValueError("FDNV and FFPFAIL must be positive.")
+    if np.any((piffsmod < 1) | (piffsmod > 5)):
+        raise ValueError("PIFFSMOD must be 1-5.")
+    index = np.arange(n)[None, :]
+    valid = index < np.asarray(lengths)[:, None]
+    da0 = np.where(valid, da, 0.0)
+    # Feature Data & Nominal Value, DC being the running FD average while calibrating
+    fd = movingAverage(da0, fdpts)
+    ncal = np.maximum(fdcpts, 1)[:, None]
+    csum = np.cumsum(fd, axis=1)
+    calibrated = np.take_along_axis(csum, np.minimum(index, ncal - 1), axis=1) / np.minimum(index + 1, ncal)
+    dc = np.where(fdcpts[:, None] > 0, calibrated, fdc)
+    fd0 = np.where(fdz != 0, fdz, dc)
+    fdnom = np.broadcast_to(fd0, (m, n)).copy()
+    # Signatures
+    ffp, dps, ffs, ffin = signatures(fd, dc, fd0, fdnm, fdnv, ffpfail)
+    soh = 100.0 - np.clip(ffin, 0.0, 100.0)
+    # BD, EOL, RUL & PH
+    flag, rul, ph, bd, eol, _ = prognoseFleet(dt, ffin, valid, pittff[:, 0], piffsmod)
+    rc0 = np.zeros((m, n))
+    rs0 = np.zeros((m, n))
+    outputs = [flag, dt, da, rul, ph, soh, bd, eol, fdnom, fd, ffp, dps, ffs, ffin, rc0, rs0]
+    for output in outputs:
+        output[~valid] = np.nan
+    return tuple(outputs) + (rs0,)
+
+# runARULE Function
+def runARULE(dt, da, node_params):
+    """
+    Run the ARULE node model on one input series entirely in-process.
+
+    dt: Array of Data Time values
+    da: Array of Data Amplitude values
+    node_params: Tuple of (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF)
+    @returns: FLAG, DT, DA, RUL, PH, SOH, BD, EOL, FDNOM, FD, FFP, DPS, FFS, FFIN, RC0, RS0, RS0 as arrays
+    """
+    dt2, da2, lengths = packFleet([np.asarray(dt, dtype=np.float64)], [np.asarray(da, dtype=np.float64)])
+    outputs = runFleetARULE(dt2, da2, lengths, fleetParams([node_params]))
+    return tuple(output[0] for output in outputs)
+
+# readARULEInput Function
+def readARULEInput(infile, intype, directory=os.path.join('ARULE', 'DATA', 'DINP')):
+    """
+    Read a two-column DINP input file (tab separated .txt or comma separated .csv).
+
+    infile: Input Filename (without extension)
+    intype: Input File Type (.csv/.txt)
+    directory: Directory holding the input files
+    @returns: dt, da (validated, see inputData.loadInput)
+    """
+    return readInput(infile, intype, directory)
+
+# writeARULEOutput Function
+def writeARULEOutput(filepath, outputs):
+    """
+    Write native engine results in the DOUT layout read by readARULEOutput.
+
+    filepath: Path to the ARULE .csv output file
+    outputs: Tuple returned by runARULE
+    @returns: None
+    """
+    table = np.column_stack(outputs[:len(ARULE_COLUMNS)])
+    np.savetxt(filepath, table, fmt='%.10g', delimiter=',', header=','.join(ARULE_COLUMNS), comments='')
+    return None
+
+# runSystemARULE Function
+def runSystemARULE(sdefname, ndefparams, directory='ARULE'):
+    """
+    Run all nodes of a system with the native engine and write the DOUT files UD_ARULE would write.
+
+    sdefname: Name of the SDEF
+    ndefparams: A list of the contents in the NDEF for all nodes (readDEFcontents lists or parseDEF NDEFRecords)
+    directory: Path to the ARULE directory
+    @returns: Dictionary of NDFNAME to the tuple returned by runARULE
+    """
+    results = {}
+    input_folder = os.path.join(directory, 'DATA', 'DINP')
+    output_folder = os.path.join(directory, 'DATA', 'DOUT')
+    os.makedirs(output_folder, exist_ok=True)
+    node_params = [params.nodeParams() if hasattr(params, 'nodeParams') else params[2:] for params in ndefparams]
+    inputs = [readARULEInput(p[9], p[10], input_folder) for p in node_params]
+    dt, da, lengths = packFleet([i[0] for i in inputs], [i[1] for i in inputs])
+    outputs = runFleetARULE(dt, da, lengths, fleetParams(node_params))
+    for k, params in enumerate(ndefparams):
+        ndefid, ndefname = (params.NDNUMID, params.NDFNAME) if hasattr(params, 'NDFNAME') else (params[0], params[1])
+        infile, outtype = node_params[k][9], node_params[k][11]
+        node_outputs = tuple(output[k, :lengths[k]] for output in outputs)
+        output_filename = f'ND_{ndefid}_DW_{sdefname}_{infile}_OUT{outtype}'
+        writeARULEOutput(os.path.join(output_folder, output_filename), node_outputs)
+        results[ndefname] = node_outputs
+    return results
@@ -0,0 +1,181 @@
+# ========================================================================
+"""        STRUCTURE-OF-ARRAYS NODE PARAMETER REGISTRY FOR FLEETS      """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import numpy as np
+from createDEF import writeDEFs
+
+### Column Types of the Registry (NDEF fields plus the SDEF NDNUMID/NDFNAME)
+# Integer fields are int32, wide enough that out-of-range values reach validate() instead of overflowing
+NUMERIC_COLUMNS = {
+    'NDNUMID': np.int32, 'FDC': np.float64, 'FDZ': np.float64, 'FDNM': np.float64, 'FDCPTS': np.int32,
+    'FDPTS': np.int32, 'FDNV': np.float64, 'FFPFAIL': np.float64, 'PITTFF': np.float64,
+    'PIFFSMOD': np.int32, 'ENDDEF': np.int32,
+}
+STRING_COLUMNS = ['NDFNAME', 'INFILE', 'INTYPE', 'OUTTYPE']
+NDEF_ORDER = ['FDC', 'FDZ', 'FDNM', 'FDCPTS', 'FDPTS', 'FDNV', 'FFPFAIL', 'PITTFF', 'PIFFSMOD', 'INFILE', 'INTYPE', 'OUTTYPE', 'ENDDEF']
+
+### CLASSES
+# NodeRegistry Class
+class NodeRegistry:
+    """
+    Registry of node parameters stored as one typed NumPy column per NDEF field.
+
+    String fields are interned: each is stored as an int32 code into a table of the
+    distinct strings, so per-node memory stays at a few tens of bytes.
+    """
+    def __init__(self, columns, strings):
+        self.columns = columns
+        self.strings = strings
+        self.size = len(columns['NDNUMID'])
+        self.id_order = np.argsort(columns['NDNUMID'], kind='stable')
+        self.name_index = None
+
+    @classmethod
+    def fromNodeParams(cls, ndefnames, node_params, ndnumids=None):
+        """
+        Build a registry from DEMOS-style node names & 13-field node_params tuples.
+
+        ndefnames: List of NDFNAMEs, one per node
+        node_params: List of (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF)
+        ndnumids: List of NDNUMIDs (None = 1..N)
+        @returns: NodeRegistry
+        """
+        if len(ndefnames) != len(node_params):
+            raise ValueError("ndefnames and node_params must have the same length.")
+        fields = list(zip(*node_params)) if len(node_params) else [()] * len(NDEF_ORDER)
+        values = dict(zip(NDEF_ORDER, fields))
+        values['NDFNAME'] = ndefnames
+        values['NDNUMID'] = np.arange(1, len(ndefnames) + 1) if ndnumids is None else ndnumids
+        return cls.fromColumns(values)
+
+    @classmethod
+    def fromRecords(cls, records):
+        """
+        Build a registry from parseDEF NDEFRecords (e.g. readDEFrecords).
+
+        records: List of NDEFRecord
+        @returns: NodeRegistry
+        """
+        names = list(NUMERIC_COLUMNS) + STRING_COLUMNS
+        return cls.fromColumns({name: [getattr(record, name) for record in records] for name in names})
+
+    @classmethod
+    def fromColumns(cls, values):
+        """
+        Build a registry from a dictionary of field name to a sequence of values.
+
+        values: Dictionary with every NUMERIC_COLUMNS & STRING_COLUMNS field
+        @returns: NodeRegistry (raises ValueError for non-integer values of an integer field)
+        """
+        columns = {}
+        for name, dtype in NUMERIC_COLUMNS.items():
+            column = np.asarray(values[name], dtype=np.float64)
+            if np.issubdtype(dtype, np.integer):
+                # Checked before the cast, which would truncate 2.5 or wrap values beyond int32
+                limits = np.iinfo(dtype)
+                bad = np.flatnonzero(~((column == np.round(column)) & (column >= limits.min) & (column <= limits.max)))
+                if len(bad):
+                    raise ValueError(f"{name} must be an integer, not {column[bad[:5]].tolist()} (nodes {bad[:5].tolist()}).")
+            columns[name] = column.astype(dtype)
+        strings = {}
+        for name in STRING_COLUMNS:
+            strings[name], columns[name] = np.unique(np.asarray(values[name], dtype=str), return_inverse=True)
+            columns[name] = columns[name].astype(np.int32).ravel()
+        return cls(columns, strings)
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """
+        @returns: The column of a field as a NumPy array (string fields decoded from their codes)
+        """
+        if name in STRING_COLUMNS:
+            return self.strings[name][self.columns[name]]
+        return self.columns[name]
+
+    def nbytes(self):
+        """
+        @returns: Memory used by the registry columns & string tables in bytes
+        """
+        return sum(array.nbytes for array in self.columns.values()) + sum(table.nbytes for table in self.strings.values())
+
+    def validate(self):
+        """
+        Check every node at once against the limits documented in createNDEF.
+
+        @returns: Dictionary of rule description to the indexes of the nodes breaking it (empty when valid)
+        """
+        c = self.columns
+        sorted_ids = c['NDNUMID'][self.id_order]
+        duplicate_ids = sorted_ids[1:][np.diff(sorted_ids) == 0]
+        rules = {
+            'FDCPTS must be 0-25': (c['FDCPTS'] < 0) | (c['FDCPTS'] > 25),
+            'FDPTS must be 1-5': (c['FDPTS'] < 1) | (c['FDPTS'] > 5),
+            'PIFFSMOD must be 1-5': (c['PIFFSMOD'] < 1) | (c['PIFFSMOD'] > 5),
+            'FDNV must be positive': ~(c['FDNV'] > 0),
+            'FFPFAIL must be positive': ~(c['FFPFAIL'] > 0),
+            'FDNM must not be negative': ~(c['FDNM'] >= 0),
+            'INTYPE/OUTTYPE must be .csv or .txt': ~np.isin(self.column('INTYPE'), ['.csv', '.txt']) | ~np.isin(self.column('OUTTYPE'), ['.csv', '.txt']),
+            'NDNUMID must be unique': np.isin(c['NDNUMID'], duplicate_ids),
+        }
+        return {rule: np.flatnonzero(bad) for rule, bad in rules.items() if bad.any()}
+
+    def indexOfId(self, ndnumids):
+        """
+        Look up nodes by NDNUMID with a binary search over the sorted ids.
+
+        ndnumids: One NDNUMID or an array of them
+        @returns: Node index (or array of indexes), -1 where the NDNUMID is unknown
+        """
+        ids = self.columns['NDNUMID'][self.id_order]
+        wanted = np.asarray(ndnumids)
+        position = np.clip(np.searchsorted(ids, wanted), 0, max(self.size - 1, 0))
+        found = (ids[position] == wanted) if self.size else np.zeros(wanted.shape, dtype=bool)
+        return np.where(found, self.id_order[position] if self.size else -1, -1)
+
+    def indexOfName(self, ndfname):
+        """
+        Look up a node by NDFNAME.
+
+        ndfname: Name of the NDEF
+        @returns: Node index, -1 if the name is unknown
+        """
+        if self.name_index is None:
+            self.name_index = dict(zip(self.strings['NDFNAME'][self.columns['NDFNAME']], range(self.size)))
+        return self.name_index.get(ndfname, -1)
+
+    def nodeParams(self, index):
+        """
+        @returns: The DEMOS-style 13-field node_params tuple of one node
+        """
+        return tuple(self.strings[name][self.columns[name][index]].item() if name in STRING_COLUMNS
+                     else self.columns[name][index].item() for name in NDEF_ORDER)
+
+    def fleetParams(self):
+        """
+        @returns: Dictionary of per-node parameter vectors for nativeARULE.runFleetARULE
+        """
+        names = ['FDC', 'FDZ', 'FDNM', 'FDCPTS', 'FDPTS', 'FDNV', 'FFPFAIL', 'PITTFF', 'PIFFSMOD']
+        return {name: self.columns[name].astype(np.int64 if name in ('FDCPTS', 'FDPTS', 'PIFFSMOD') else np.float64)
+                for name in names}
+
+    def writeDEFs(self, sdefname, directory='ARULE', max_workers=None):
+        """
+        Export the registry as one SDEF listing every node plus one NDEF per node.
+
+        Only definitions whose content changed are rewritten (see createDEF.writeDEFs).
+
+        sdefname: Name of the SDEF
+        directory: Path to the ARULE directory
+        max_workers: Number of I/O threads (None = write from the calling thread)
+        @returns: Number of files written, number of files skipped as unchanged
+        """
+        names = self.column('NDFNAME').tolist()
+        ids = self.columns['NDNUMID'].tolist()
+        system_node_list = [(ndnumid, name, -9) for ndnumid, name in zip(ids, names)]
+        ndefs = [(names[i], self.nodeParams(i)) for i in range(self.size)]
+        return writeDEFs(system_node_list, sdefname, ndefs, os.path.join(directory, 'DEFS'), max_workers)
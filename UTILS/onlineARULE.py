@@ -0,0 +1,200 @@
+# ========================================================================
+"""       INCREMENTAL (ONLINE) RUL UPDATES WITH CPT CHECKPOINTS        """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Per-node state of the native engine is kept in ARULE/DATA/CPT so that newly appended
+samples can be processed without re-reading the history. Feeding a series in chunks
+gives the same rows as runARULE on the whole series: the FD window, the FDCPTS baseline
+& the prognostic state of nativeARULE.prognoseFleet are carried between calls. A
+checkpoint records the node parameters it was computed with; updateNodeARULE rebuilds a
+node from its DINP history when they changed or when the DOUT file it appends to is gone.
+"""
+### Import Libraries
+import os
+import numpy as np
+from metrics import report
+from nativeARULE import ARULE_COLUMNS, movingAverage, newPrognosticState, prognoseFleet, readARULEInput, signatures
+
+### FUNCTIONS
+# paramsVector Function
+def paramsVector(node_params):
+    """
+    @returns: The model fields (FDC ... PIFFSMOD) of node_params as a float array, as stored in a checkpoint
+    """
+    return np.array([float(p) for p in node_params[:9]], dtype=np.float64)
+
+# sameParams Function
+def sameParams(state, node_params):
+    """
+    @returns: False if the state was computed with other node parameters (True for checkpoints that do not record them)
+    """
+    return state.get('PARAMS') is None or np.array_equal(np.asarray(state['PARAMS']), paramsVector(node_params))
+
+# newNodeState Function
+def newNodeState():
+    """
+    Create the empty state of a node that has not processed any samples yet.
+
+    @returns: Dictionary of node state (see updateARULE)
+    """
+    state = {'NSEEN': 0, 'LASTDT': -np.inf, 'CALSUM': 0.0, 'CALCOUNT': 0, 'WINDOW': np.zeros(0)}
+    state.update({key: value[0].item() for key, value in newPrognosticState(1).items()})
+    return state
+
+# updateARULE Function
+def updateARULE(state, dt, da, node_params):
+    """
+    Process newly appended samples of one node, in time proportional to the new data.
+
+    state: Node state returned by a previous call, loadCheckpoint or newNodeState (None = new node)
+    dt: Array of new Data Time values (must be later than the last processed sample)
+    da: Array of new Data Amplitude values
+    node_params: Tuple of (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF)
+    @returns: (FLAG, DT, DA, RUL, PH, SOH, BD, EOL, FDNOM, FD, FFP, DPS, FFS, FFIN, RC0, RS0, RS0) for the new rows, new state
+    """
+    fdc, fdz, fdnm, fdcpts, fdpts, fdnv, ffpfail, pittff, piffsmod = [float(p) for p in node_params[:9]]
+    fdcpts, fdpts, piffsmod = int(fdcpts), max(int(fdpts), 1), int(piffsmod)
+    if state is not None and not sameParams(state, node_params):
+        raise ValueError("The node state was computed with other node parameters, start from a new state.")
+    # Checkpoints written by older versions lack some keys
+    state = {**newNodeState(), **({} if state is None else state)}
+    state['PARAMS'] = paramsVector(node_params)
+    dt = np.asarray(dt, dtype=np.float64)
+    da = np.asarray(da, dtype=np.float64)
+    n = len(dt)
+    if len(da) != n:
+        raise ValueError("DT and DA must have the same length.")
+    if n and (dt[0] <= state['LASTDT'] or np.any(np.diff(dt) <= 0)):
+        raise ValueError("New DT values must be increasing and later than the last processed sample.")
+    # Feature Data, continuing the FDPTS window of the previous samples
+    window = np.asarray(state['WINDOW'], dtype=np.float64)
+    extended = np.concatenate((window, da))
+    fd = movingAverage(extended, fdpts)[len(window):]
+    state['WINDOW'] = extended[len(extended) - min(fdpts - 1, len(extended)):]
+    # DC baseline, the running FD average over the first FDCPTS samples
+    sample = state['NSEEN'] + np.arange(n)
+    calibrating = sample < fdcpts
+    if fdcpts > 0:
+        calsum = state['CALSUM'] + np.cumsum(np.where(calibrating, fd, 0.0))
+        calcount = state['CALCOUNT'] + np.cumsum(calibrating)
+        dc = calsum / np.maximum(calcount, 1)
+        if n:
+            state['CALSUM'], state['CALCOUNT'] = calsum[-1].item(), int(calcount[-1])
+    else:
+        dc = np.full(n, fdc)
+    fd0 = np.full(n, fdz) if fdz != 0 else dc
+    fdnom = np.array(fd0, dtype=np.float64)
+    ffp, dps, ffs, ffin = signatures(fd, dc, fd0, fdnm, fdnv, ffpfail)
+    soh = 100.0 - np.clip(ffin, 0.0, 100.0)
+    # BD, EOL, RUL & PH, continuing the prognostic state
+    prognostic = {key: np.atleast_1d(state[key]) for key in newPrognosticState(1)}
+    flag, rul, ph, bd, eol, prognostic = prognoseFleet(dt[None, :], ffin[None, :], np.ones((1, n), dtype=bool),
+                                                       pittff, np.array([piffsmod]), prognostic)
+    state.update({key: value[0].item() for key, value in prognostic.items()})
+    state['NSEEN'] += n
+    if n:
+        state['LASTDT'] = dt[-1].item()
+    rc0 = np.zeros(n)
+    rs0 = np.zeros(n)
+    return (flag[0], dt, da, rul[0], ph[0], soh, bd[0], eol[0], fdnom, fd, ffp, dps, ffs, ffin, rc0, rs0, rs0), state
+
+# checkpointPath Function
+def checkpointPath(sdefname, ndefname, directory=os.path.join('ARULE', 'DATA', 'CPT')):
+    """
+    Path of the checkpoint file of a node.
+
+    sdefname: Name of the SDEF
+    ndefname: Name of the NDEF
+    directory: Checkpoint directory
+    @returns: Path to the .npz checkpoint file
+    """
+    return os.path.join(directory, f'{sdefname}_{ndefname}_CPT.npz')
+
+# saveCheckpoint Function
+def saveCheckpoint(state, sdefname, ndefname, directory=os.path.join('ARULE', 'DATA', 'CPT')):
+    """
+    Persist the state of a node in the CPT directory.
+
+    state: Node state returned by updateARULE
+    sdefname: Name of the SDEF
+    ndefname: Name of the NDEF
+    directory: Checkpoint directory
+    @returns: Path to the .npz checkpoint file
+    """
+    os.makedirs(directory, exist_ok=True)
+    filepath = checkpointPath(sdefname, ndefname, directory)
+    temppath = f'{filepath}.tmp.npz'
+    np.savez(temppath, **{key: np.asarray(value) for key, value in state.items()})
+    os.replace(temppath, filepath)
+    return filepath
+
+# loadCheckpoint Function
+def loadCheckpoint(sdefname, ndefname, directory=os.path.join('ARULE', 'DATA', 'CPT')):
+    """
+    Load the state of a node from the CPT directory.
+
+    sdefname: Name of the SDEF
+    ndefname: Name of the NDEF
+    directory: Checkpoint directory
+    @returns: Node state, or None if the node has no checkpoint yet
+    """
+    filepath = checkpointPath(sdefname, ndefname, directory)
+    if not os.path.exists(filepath):
+        return None
+    with np.load(filepath) as data:
+        state = {key: data[key] for key in data.files}
+    for key, value in state.items():
+        if value.ndim == 0:
+            state[key] = value.item()
+    return state
+
+# updateNodeARULE Function
+def updateNodeARULE(sdefname, ndefname, ndefid, dt, da, node_params, directory='ARULE'):
+    """
+    Load a node's checkpoint, process the new samples, append them to its DOUT file & save the checkpoint.
+
+    Without a usable checkpoint (none yet, other node parameters or a missing DOUT file)
+    the node is rebuilt from the rows of its DINP file before the new samples.
+
+    sdefname: Name of the SDEF
+    ndefname: Name of the NDEF
+    ndefid: NDNUMID of the node
+    dt: Array of new Data Time values
+    da: Array of new Data Amplitude values
+    node_params: Tuple of (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF)
+    directory: Path to the ARULE directory
+    @returns: Tuple of the rows of the new samples (see updateARULE)
+    """
+    cpt_folder = os.path.join(directory, 'DATA', 'CPT')
+    output_folder = os.path.join(directory, 'DATA', 'DOUT')
+    infile, intype, outtype = node_params[9], node_params[10], node_params[11]
+    output_filepath = os.path.join(output_folder, f'ND_{ndefid}_DW_{sdefname}_{infile}_OUT{outtype}')
+    dt = np.asarray(dt, dtype=np.float64)
+    da = np.asarray(da, dtype=np.float64)
+    new_rows = len(dt)
+    state = loadCheckpoint(sdefname, ndefname, cpt_folder)
+    stale = None
+    if state is not None and not os.path.exists(output_filepath):
+        stale = 'its DOUT file is missing'
+    elif state is not None and not sameParams(state, node_params):
+        stale = 'the node parameters changed'
+    if state is None or stale is not None:
+        if stale is not None:
+            report(f'Checkpoint of {ndefname} not used ({stale}), rebuilding from {infile}{intype} ...', 'yellow')
+        state = None
+        input_filepath = os.path.join(directory, 'DATA', 'DINP', f'{infile}{intype}')
+        if os.path.exists(input_filepath):
+            history_dt, history_da = readARULEInput(infile, intype, os.path.dirname(input_filepath))
+            before = history_dt < dt[0] if new_rows else np.ones(len(history_dt), dtype=bool)
+            dt = np.concatenate((history_dt[before], dt))
+            da = np.concatenate((history_da[before], da))
+    outputs, state = updateARULE(state, dt, da, node_params)
+    os.makedirs(output_folder, exist_ok=True)
+    new_file = state['NSEEN'] == len(dt) or not os.path.exists(output_filepath)
+    with open(output_filepath, 'w' if new_file else 'a') as file:
+        table = np.column_stack(outputs[:len(ARULE_COLUMNS)])
+        np.savetxt(file, table, fmt='%.10g', delimiter=',',
+                   header=','.join(ARULE_COLUMNS) if new_file else '', comments='')
+    saveCheckpoint(state, sdefname, ndefname, cpt_folder)
+    return tuple(output[len(output) - new_rows:] for output in outputs)
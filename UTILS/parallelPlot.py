@@ -0,0 +1,87 @@
+# ========================================================================
+"""       PROCESS-POOL PARALLEL PLOT RENDERING FOR ARULE OUTPUTS       """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+### Directory Structure
+ARULE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+### FUNCTIONS
+# initPlotWorker Function
+def initPlotWorker(root):
+    """
+    Prepare a plot worker process: force the non-interactive Agg backend & work from root.
+
+    root: Directory that holds the ARULE/ tree & PLOTS/ directory
+    @returns: None
+    """
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    os.chdir(root)
+    return None
+
+# plotJob Function
+def plotJob(sdefname, ndefparams, force=False):
+    """
+    Render the plots of a list of nodes of one system inside a worker process.
+
+    sdefname: Name of the SDEF
+    ndefparams: A list of the contents in the NDEF for the nodes to plot
+    force: Re-render plots that are up to date (see plotARULEOutput)
+    @returns: List of summary dictionaries (sdefname, ndefname, file, seconds, error), one per node
+    """
+    import matplotlib.pyplot as plt
+    from ARULE4PythonPlot import ARULEFigure, plotARULEOutput
+    # One styled figure for all nodes, each node plotted & timed on its own so a failure stays with its node
+    template = None
+    summaries = []
+    try:
+        for params in ndefparams:
+            ndefname = params.NDFNAME if hasattr(params, 'NDFNAME') else params[1]
+            error = ''
+            start = time.perf_counter()
+            try:
+                if template is None:
+                    template = ARULEFigure()
+                plotARULEOutput(sdefname, [params], show=False, force=force, template=template)
+            except Exception as exc:
+                error = f'{type(exc).__name__}: {exc}'
+            summaries.append({'sdefname': sdefname, 'ndefname': ndefname,
+                              'file': os.path.abspath(os.path.join('PLOTS', f'{ndefname}_ARULEOut.png')) if not error else None,
+                              'seconds': time.perf_counter() - start, 'error': error})
+    finally:
+        if template is not None:
+            plt.close(template.figure)
+    return summaries
+
+# plotARULEOutputParallel Function
+def plotARULEOutputParallel(systems, max_workers=None, per_system=False, root=ARULE_ROOT, force=False):
+    """
+    Render ARULE output plots for many nodes or systems across worker processes.
+
+    Every worker uses the headless Agg backend, reads its own DOUT files and writes its
+    PNGs to PLOTS/, so PNG rasterisation scales with the number of cores.
+
+    systems: List of (sdefname, ndefparams) pairs, e.g. [(sdefname, readDEFcontents(sdefname)), ...]
+    max_workers: Number of worker processes (None = number of CPU cores)
+    per_system: Send whole systems to a worker instead of single nodes (True/False)
+    root: Directory that holds the ARULE/ tree & PLOTS/ directory
+    force: Re-render plots that are up to date with their DOUT file & options (True/False)
+    @returns: List of summary dictionaries (sdefname, ndefname, file, seconds, error), one per node
+    """
+    if per_system:
+        jobs = [(sdefname, list(ndefparams)) for sdefname, ndefparams in systems]
+    else:
+        jobs = [(sdefname, [params]) for sdefname, ndefparams in systems for params in ndefparams]
+    os.makedirs(os.path.join(root, 'PLOTS'), exist_ok=True)
+    summary = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=initPlotWorker, initargs=(root,)) as executor:
+        futures = [executor.submit(plotJob, sdefname, ndefparams, force) for sdefname, ndefparams in jobs]
+        for future in as_completed(futures):
+            summary.extend(future.result())
+    return summary
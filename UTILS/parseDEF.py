@@ -0,0 +1,176 @@
+# ========================================================================
+"""       SINGLE-PASS SDEF/NDEF PARSER WITH AN MTIME PARSE CACHE       """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import copy
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+### Field Types of the NDEF Keys (as written by createNDEF)
+NDEF_FIELDS = {
+    'FDC': float, 'FDZ': float, 'FDNM': float, 'FDCPTS': int, 'FDPTS': int, 'FDNV': float,
+    'FFPFAIL': float, 'PITTFF': float, 'PIFFSMOD': int, 'INFILE': str, 'INTYPE': str,
+    'OUTTYPE': str, 'ENDDEF': int,
+}
+# Parsed definitions by (path, parser), least recently used first
+PARSE_CACHE = OrderedDict()
+PARSE_CACHE_SIZE = 4096
+PARSE_LOCK = threading.Lock()
+
+### CLASSES
+# NDEFRecord Class
+@dataclass(slots=True)
+class NDEFRecord:
+    """
+    Keyed, typed contents of one NDEF together with its NDNUMID & NDFNAME from the SDEF.
+    """
+    NDNUMID: int
+    NDFNAME: str
+    FDC: float
+    FDZ: float
+    FDNM: float
+    FDCPTS: int
+    FDPTS: int
+    FDNV: float
+    FFPFAIL: float
+    PITTFF: float
+    PIFFSMOD: int
+    INFILE: str
+    INTYPE: str
+    OUTTYPE: str
+    ENDDEF: int
+
+    def nodeParams(self):
+        """
+        @returns: The (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF) tuple used by createNDEF
+        """
+        return tuple(getattr(self, field) for field in NDEF_FIELDS)
+
+# SDEFRecord Class
+@dataclass(slots=True, frozen=True)
+class SDEFRecord:
+    """
+    Contents of one SDEF: the (NDNUMID, NDFNAME) pairs of its nodes in file order.
+    """
+    SDEFNAME: str
+    NODES: tuple
+    ENDDEF: int
+
+### FUNCTIONS
+# tokenizeDEF Function
+def tokenizeDEF(text):
+    """
+    Split definition text into (KEY, value) statements in one pass, dropping % comments.
+
+    text: Contents of an SDEF or NDEF file
+    @returns: List of (KEY, value) string pairs in file order
+    """
+    statements = []
+    for line in text.splitlines():
+        line = line.split('%', 1)[0]
+        for statement in line.split(';'):
+            key, equals, value = statement.partition('=')
+            if equals:
+                statements.append((key.strip(), value.strip().strip("'")))
+    return statements
+
+# cachedParse Function
+def cachedParse(filepath, parser):
+    """
+    Parse a definition file, reusing the previous result while its inode, mtime & size are unchanged.
+
+    The cache keeps the PARSE_CACHE_SIZE most recently used files. Parsers return flat
+    dictionaries or frozen records, so a shallow copy keeps callers from changing the cache.
+
+    filepath: Path to the definition file
+    parser: Callable mapping (filepath, text) to a parsed record
+    @returns: Copy of the parsed record
+    """
+    stat = os.stat(filepath)
+    key = (os.path.abspath(filepath), parser)
+    # The inode catches a file replaced (os.replace) within the mtime resolution at the same size
+    stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with PARSE_LOCK:
+        cached = PARSE_CACHE.get(key)
+        if cached is not None and cached[0] == stamp:
+            PARSE_CACHE.move_to_end(key)
+            return copy.copy(cached[1])
+    with open(filepath, 'r') as file:
+        record = parser(filepath, file.read())
+    with PARSE_LOCK:
+        PARSE_CACHE[key] = (stamp, record)
+        PARSE_CACHE.move_to_end(key)
+        while len(PARSE_CACHE) > PARSE_CACHE_SIZE:
+            PARSE_CACHE.popitem(last=False)
+    return copy.copy(record)
+
+# parseSDEFText Function
+def parseSDEFText(filepath, text):
+    """
+    Parse SDEF text into an SDEFRecord, pairing each NDFNAME with the NDNUMID before it.
+
+    filepath: Path to the SDEF file (its name is the SDEF name)
+    text: Contents of the SDEF file
+    @returns: SDEFRecord
+    """
+    nodes = []
+    ndnumid = None
+    enddef = None
+    for key, value in tokenizeDEF(text):
+        if key == 'NDNUMID':
+            ndnumid = int(value)
+        elif key == 'NDFNAME':
+            if ndnumid is None:
+                raise ValueError(f"NDFNAME '{value}' without a preceding NDNUMID in {filepath}.")
+            nodes.append((ndnumid, value))
+            ndnumid = None
+        elif key == 'ENDDEF':
+            enddef = int(value)
+    return SDEFRecord(os.path.splitext(os.path.basename(filepath))[0], tuple(nodes), enddef)
+
+# parseNDEFText Function
+def parseNDEFText(filepath, text):
+    """
+    Parse NDEF text into a dictionary of typed NDEF fields.
+
+    filepath: Path to the NDEF file
+    text: Contents of the NDEF file
+    @returns: Dictionary of NDEF key to typed value
+    """
+    fields = {}
+    for key, value in tokenizeDEF(text):
+        if key in NDEF_FIELDS:
+            fields[key] = NDEF_FIELDS[key](float(value)) if NDEF_FIELDS[key] is int else NDEF_FIELDS[key](value)
+    missing = [key for key in NDEF_FIELDS if key not in fields]
+    if missing:
+        raise ValueError(f"{filepath} is missing NDEF fields {missing}.")
+    return fields
+
+# readSDEF Function
+def readSDEF(sdefname, directory='ARULE'):
+    """
+    Read an SDEF through the parse cache.
+
+    sdefname: Name of the SDEF
+    directory: Path to the ARULE directory
+    @returns: SDEFRecord
+    """
+    return cachedParse(os.path.join(directory, 'DEFS', 'SDEF', f'{sdefname}.txt'), parseSDEFText)
+
+# readDEFrecords Function
+def readDEFrecords(sdefname, directory='ARULE'):
+    """
+    Read the SDEF and all its NDEFs into keyed records (the typed counterpart of readDEFcontents).
+
+    sdefname: Name of the SDEF
+    directory: Path to the ARULE directory
+    @returns: List of NDEFRecord, one per node in SDEF order
+    """
+    records = []
+    for ndnumid, ndfname in readSDEF(sdefname, directory).NODES:
+        ndefpath = os.path.join(directory, 'DEFS', 'NDEF', f'{ndfname}.txt')
+        records.append(NDEFRecord(ndnumid, ndfname, **cachedParse(ndefpath, parseNDEFText)))
+    return records
@@ -0,0 +1,55 @@
+# ========================================================================
+"""        SKIP-IF-FRESH RENDER CACHE FOR ARULE OUTPUT PLOTS           """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Every rendered {ndefname}_ARULEOut.png carries a fingerprint of its source DOUT
+file contents and of the plotting options in a PNG text chunk. A plot whose stored
+fingerprint matches the current one is up to date and does not need rendering again.
+"""
+### Import Libraries
+import hashlib
+import json
+import os
+from runCache import hashFile
+
+### Plot Cache Settings (bump PLOT_VERSION when the figure style changes)
+PLOT_VERSION = 1
+FINGERPRINT_KEY = 'ARULEFingerprint'
+
+### FUNCTIONS
+# plotFingerprint Function
+def plotFingerprint(doutpath, options):
+    """
+    Fingerprint of a plot: the contents of its DOUT file plus the plotting options.
+
+    doutpath: Path to the ARULE .csv output file
+    options: Dictionary of the plotting options that change the image (JSON serialisable)
+    @returns: Hex digest string
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'version': PLOT_VERSION, 'options': options}, sort_keys=True).encode())
+    hashFile(doutpath, digest)
+    return digest.hexdigest()
+
+# readPlotFingerprint Function
+def readPlotFingerprint(pngpath):
+    """
+    Fingerprint stored in a rendered plot (only the PNG header chunks are read).
+
+    pngpath: Path to the PNG
+    @returns: Fingerprint string, or None if the PNG is missing or has no fingerprint
+    """
+    from PIL import Image
+    try:
+        with Image.open(pngpath) as image:
+            return image.info.get(FINGERPRINT_KEY)
+    except (OSError, ValueError):
+        return None
+
+# isPlotFresh Function
+def isPlotFresh(pngpath, fingerprint):
+    """
+    @returns: True if the PNG exists and was rendered from the same DOUT contents & options
+    """
+    return os.path.exists(pngpath) and readPlotFingerprint(pngpath) == fingerprint
@@ -0,0 +1,250 @@
+# ========================================================================
+"""     CONSTANT-MEMORY STREAMING REDUCTION OF LARGE DINP INPUT FILES   """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+Long sensor histories are reduced chunk by chunk before a run, so memory stays at one
+chunk however long the input is. Each chunk goes through, in order:
+  outlier rejection  drop samples further than outlier_factor * scale from the median of
+                     the previous `window` raw samples, scale being the larger of FDNM %
+                     of the median (FDNM is the noise margin) & the robust spread of the
+                     window (1.4826 * MAD), so series near 0 & ramps are not rejected
+  decimation         keep every `decimate`-th sample
+  block averaging    average non-overlapping blocks of `block` samples (DT & DA)
+The state carried between chunks (median history, decimation phase, partial block,
+last time) makes the result identical to processing the whole file at once.
+reduceNodeParams rescales FDPTS/FDCPTS so the run smooths & calibrates over the
+same stretch of raw samples as before the reduction. From the repository root:
+    python UTILS/preprocessInput.py SP4000_1 .txt --block 5 --fdnm 5 --outlier-factor 3
+"""
+### Import Libraries
+import argparse
+import itertools
+import math
+import os
+import numpy as np
+from inputData import DINP_DIRECTORY, sniffInput, validateInput
+
+### CLASSES
+# InputReducer Class
+class InputReducer:
+    """
+    Streaming outlier rejection, decimation & block averaging of a DT/DA series.
+    """
+    def __init__(self, decimate=1, block=1, fdnm=0.0, outlier_factor=None, window=9):
+        if decimate < 1 or block < 1 or window < 1:
+            raise ValueError("decimate, block and window must be at least 1.")
+        self.decimate = int(decimate)
+        self.block = int(block)
+        self.outlier_factor = outlier_factor
+        self.noise_margin = max(fdnm, 0.0) / 100.0
+        self.window = int(window)
+        self.history = np.empty(0)
+        self.phase = 0
+        self.partial_dt = np.empty(0)
+        self.partial_da = np.empty(0)
+        self.last_dt = None
+        self.rows_in = 0
+        self.rejected = 0
+        self.rows_out = 0
+
+    def rejectOutliers(self, da):
+        """
+        @returns: Boolean mask of the samples kept by the outlier rejection
+        """
+        if self.outlier_factor is None:
+            return np.ones(len(da), dtype=bool)
+        values = np.concatenate((self.history, da))
+        keep = np.ones(len(da), dtype=bool)
+        if len(values) > self.window:
+            # Median of the `window` raw samples before each sample (earlier chunks included)
+            windows = np.lib.stride_tricks.sliding_window_view(values[:-1], self.window)
+            offset = len(values) - self.window - len(da)
+            tested = slice(max(0, -offset), len(da))
+            windows = windows[max(0, offset):]
+            reference = np.median(windows, axis=1)
+            # 1.4826 * MAD estimates the standard deviation of normal noise
+            spread = 1.4826 * np.median(np.abs(windows - reference[:, None]), axis=1)
+            scale = np.maximum(self.noise_margin * np.abs(reference), spread)
+            keep[tested] = np.abs(da[tested] - reference) <= self.outlier_factor * scale
+        self.history = values[-self.window:]
+        return keep
+
+    def process(self, dt, da):
+        """
+        Reduce one chunk.
+
+        dt, da: Time & amplitude of the chunk
+        @returns: Reduced dt, da (blocks completed by this chunk)
+        """
+        dt = np.asarray(dt, dtype=np.float64)
+        da = np.asarray(da, dtype=np.float64)
+        if self.last_dt is not None and len(dt):
+            validateInput(np.concatenate(([self.last_dt], dt)), np.concatenate(([0.0], da)))
+        elif len(dt):
+            validateInput(dt, da)
+        self.rows_in += len(dt)
+        if len(dt):
+            self.last_dt = dt[-1]
+        keep = self.rejectOutliers(da)
+        self.rejected += int(np.count_nonzero(~keep))
+        dt, da = dt[keep], da[keep]
+        # Decimation continues the phase of the previous chunk
+        start = (-self.phase) % self.decimate
+        self.phase = (self.phase + len(dt)) % self.decimate
+        dt, da = dt[start::self.decimate], da[start::self.decimate]
+        if self.block > 1:
+            dt = np.concatenate((self.partial_dt, dt))
+            da = np.concatenate((self.partial_da, da))
+            full = len(dt) - len(dt) % self.block
+            self.partial_dt, self.partial_da = dt[full:], da[full:]
+            dt = dt[:full].reshape(-1, self.block).mean(axis=1)
+            da = da[:full].reshape(-1, self.block).mean(axis=1)
+        self.rows_out += len(dt)
+        return dt, da
+
+    def finish(self):
+        """
+        Flush the last, partial block.
+
+        @returns: Reduced dt, da of the remaining samples (empty if none)
+        """
+        if self.block > 1 and len(self.partial_dt):
+            dt, da = np.array([self.partial_dt.mean()]), np.array([self.partial_da.mean()])
+            self.partial_dt, self.partial_da = np.empty(0), np.empty(0)
+            self.rows_out += 1
+            return dt, da
+        return np.empty(0), np.empty(0)
+
+### FUNCTIONS
+# iterInputChunks Function
+def iterInputChunks(filepath, chunk_rows=500000):
+    """
+    Read a DINP file (text or .npy) in chunks of rows.
+
+    filepath: Path to the input file
+    chunk_rows: Number of rows per chunk
+    @returns: Generator of (dt, da) chunks
+    """
+    if filepath.endswith('.npy'):
+        data = np.load(filepath, mmap_mode='r')
+        for start in range(0, len(data), chunk_rows):
+            chunk = np.asarray(data[start:start+chunk_rows], dtype=np.float64)
+            yield chunk[:, 0], chunk[:, 1]
+        return
+    delimiter, header = sniffInput(filepath)
+    with open(filepath, 'r') as file:
+        if header:
+            file.readline()
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+            if not lines:
+                return
+            chunk = np.loadtxt(lines, delimiter=delimiter, ndmin=2, dtype=np.float64)
+            if len(chunk):
+                yield chunk[:, 0], chunk[:, 1]
+
+# writeChunk Function
+def writeChunk(file, dt, da, delimiter=','):
+    """
+    Append reduced DT/DA rows to an open DINP file.
+    """
+    if len(dt):
+        np.savetxt(file, np.column_stack((dt, da)), delimiter=delimiter, fmt='%.10g')
+
+# reduceNodeParams Function
+def reduceNodeParams(node_params, infile, decimate=1, block=1):
+    """
+    Node parameters for a reduced input file.
+
+    FDPTS & FDCPTS count samples, so they are divided by the reduction factor to keep
+    smoothing & calibration over the same raw samples (FDPTS at least 1).
+
+    node_params: (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF)
+    infile: Name of the reduced input file (without extension)
+    decimate, block: Reduction settings passed to preprocessInput
+    @returns: Updated node_params tuple
+    """
+    params = list(node_params)
+    factor = decimate * block
+    params[3] = math.ceil(params[3] / factor) if params[3] else 0
+    params[4] = max(1, round(params[4] / factor))
+    params[9] = infile
+    return tuple(params)
+
+# preprocessInput Function
+def preprocessInput(infile, intype, directory=DINP_DIRECTORY, decimate=1, block=1, fdnm=0.0, outlier_factor=None,
+                    window=9, chunk_rows=500000, outfile=None):
+    """
+    Stream a DINP file through an InputReducer and write the reduced DINP file.
+
+    infile: Input Filename (without extension)
+    intype: Input File Type (.csv/.txt, or .npy for a binary (rows x 2) array)
+    directory: Directory holding the input files
+    decimate: Keep every decimate-th sample
+    block: Average non-overlapping blocks of this many samples (e.g. FDPTS)
+    fdnm: FDNM noise margin [%] of the node, the relative scale of the outlier rejection
+    outlier_factor: Reject samples further than outlier_factor * scale from the running median (None = off)
+    window: Number of previous samples in the running median
+    chunk_rows: Number of rows read at a time (sets the peak memory)
+    outfile: Name of the reduced file without extension (None = {infile}_R{decimate * block})
+    @returns: Name of the reduced file (without extension), dictionary of rows_in, rejected & rows_out
+    """
+    if outfile is None:
+        outfile = f'{infile}_R{decimate * block}'
+    outtype = '.csv' if intype in ('.csv', '.npy') else intype
+    source = os.path.join(directory, f'{infile}{intype}')
+    target = os.path.join(directory, f'{outfile}{outtype}')
+    if os.path.abspath(source) == os.path.abspath(target):
+        raise ValueError("The reduced file would overwrite its source, choose another outfile.")
+    reducer = InputReducer(decimate, block, fdnm, outlier_factor, window)
+    delimiter = ',' if outtype == '.csv' else '\t'
+    temppath = f'{target}.tmp{os.getpid()}'
+    try:
+        with open(temppath, 'w') as file:
+            for dt, da in iterInputChunks(source, chunk_rows):
+                writeChunk(file, *reducer.process(dt, da), delimiter)
+            writeChunk(file, *reducer.finish(), delimiter)
+        os.replace(temppath, target)
+    finally:
+        if os.path.exists(temppath):
+            os.remove(temppath)
+    return outfile, {'rows_in': reducer.rows_in, 'rejected': reducer.rejected, 'rows_out': reducer.rows_out}
+
+# preprocessNode Function
+def preprocessNode(node_params, directory=DINP_DIRECTORY, decimate=1, block=None, outlier_factor=None, **options):
+    """
+    Reduce the input file of a node and return the node parameters that run on it.
+
+    node_params: (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF)
+    directory: Directory holding the input files
+    decimate: Keep every decimate-th sample
+    block: Block averaging length (None = FDPTS of the node)
+    outlier_factor: Outlier rejection threshold in multiples of the scale (FDNM % of the median or 1.4826 * MAD, None = off)
+    options: Further keyword arguments of preprocessInput (window, chunk_rows, outfile)
+    @returns: Updated node_params tuple, dictionary of rows_in, rejected & rows_out
+    """
+    block = node_params[4] if block is None else block
+    outfile, stats = preprocessInput(node_params[9], node_params[10], directory, decimate, block, node_params[2],
+                                     outlier_factor, **options)
+    reduced = reduceNodeParams(node_params, outfile, decimate, block)
+    if node_params[10] == '.npy':
+        reduced = reduced[:10] + ('.csv',) + reduced[11:]
+    return reduced, stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming reduction of a DINP input file.')
+    parser.add_argument('infile', help='input filename without extension')
+    parser.add_argument('intype', help='input file type (.csv/.txt/.npy)')
+    parser.add_argument('--directory', default=DINP_DIRECTORY)
+    parser.add_argument('--decimate', type=int, default=1, help='keep every n-th sample')
+    parser.add_argument('--block', type=int, default=1, help='block averaging length (e.g. FDPTS)')
+    parser.add_argument('--fdnm', type=float, default=0.0, help='FDNM noise margin [%%] of the node')
+    parser.add_argument('--outlier-factor', type=float, default=None, help='outlier threshold in multiples of the noise scale')
+    parser.add_argument('--window', type=int, default=9, help='samples in the running median')
+    parser.add_argument('--chunk-rows', type=int, default=500000, help='rows read at a time')
+    parser.add_argument('--outfile', default=None, help='reduced filename without extension')
+    args = parser.parse_args()
+    outfile, stats = preprocessInput(args.infile, args.intype, args.directory, args.decimate, args.block, args.fdnm,
+                                     args.outlier_factor, args.window, args.chunk_rows, args.outfile)
+    print(f"{outfile}: {stats['rows_in']} -> {stats['rows_out']} rows ({stats['rejected']} outliers rejected)")
@@ -0,0 +1,102 @@
+# ========================================================================
+"""           CONTENT-HASH RUN CACHE FOR UD_ARULE RUNS                 """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import hashlib
+import os
+import re
+import shutil
+
+### FUNCTIONS
+# hashFile Function
+def hashFile(filepath, digest):
+    """
+    Feed the contents of a file into a hash object in 1 MB blocks.
+
+    filepath: Path to the file
+    digest: hashlib hash object to update
+    @returns: None
+    """
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return None
+
+# computeRunKey Function
+def computeRunKey(sdefname, args, directory='ARULE', exe=None):
+    """
+    Compute the cache key of a UD_ARULE run from everything that determines its outputs.
+
+    The key covers the SDEF text, the text of every NDEF it lists, the contents of every
+    input file those NDEFs reference and the exe command arguments (plus the size and
+    modification time of the exe itself, so a new UD_ARULE version invalidates the cache).
+
+    sdefname: Name of the SDEF
+    args: Command arguments after the exe path, without the trailing directory argument
+    directory: Path to the ARULE directory holding DEFS/ and DATA/DINP/
+    exe: Path to the UD_ARULE executable (None = not part of the key)
+    @returns: Hexadecimal SHA-256 run key
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([str(arg) for arg in args]).encode())
+    if exe is not None and os.path.exists(exe):
+        stat = os.stat(exe)
+        digest.update(f'{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    sdefpath = os.path.join(directory, 'DEFS', 'SDEF', f'{sdefname}.txt')
+    hashFile(sdefpath, digest)
+    with open(sdefpath, 'r') as sdeffile:
+        ndefnames = re.findall(r"NDFNAME\s*=\s*'([^']+)", sdeffile.read())
+    for ndefname in ndefnames:
+        ndefpath = os.path.join(directory, 'DEFS', 'NDEF', f'{ndefname}.txt')
+        hashFile(ndefpath, digest)
+        with open(ndefpath, 'r') as ndeffile:
+            ndeftext = ndeffile.read()
+        infile = re.search(r"INFILE\s*=\s*([\w.-]+);", ndeftext).group(1)
+        intype = re.search(r"INTYPE\s*=\s*([\w.-]+);", ndeftext).group(1)
+        hashFile(os.path.join(directory, 'DATA', 'DINP', f'{infile}{intype}'), digest)
+    return digest.hexdigest()
+
+# storeRun Function
+def storeRun(key, directory='ARULE', cache_dir=os.path.join('ARULE', 'DATA', 'CACHE')):
+    """
+    Store the DOUT & LOG files of a finished run in the run cache.
+
+    key: Run key (see computeRunKey)
+    directory: Path to the ARULE directory the run wrote its DOUT/ & LOG/ files to
+    cache_dir: Run cache directory
+    @returns: Path to the cache entry
+    """
+    entry = os.path.join(cache_dir, key)
+    staging = f'{entry}.tmp{os.getpid()}'
+    for subdir in ['DOUT', 'LOG']:
+        shutil.copytree(os.path.join(directory, 'DATA', subdir), os.path.join(staging, subdir), dirs_exist_ok=True)
+    # Publish the entry in one step so concurrent readers never see a partial entry
+    try:
+        os.rename(staging, entry)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    return entry
+
+# restoreRun Function
+def restoreRun(key, directory='ARULE', cache_dir=os.path.join('ARULE', 'DATA', 'CACHE')):
+    """
+    Restore the cached DOUT & LOG files of a run, if the run cache holds its key.
+
+    key: Run key (see computeRunKey)
+    directory: Path to the ARULE directory to restore DOUT/ & LOG/ files into
+    cache_dir: Run cache directory
+    @returns: List of restored file paths, or None on a cache miss
+    """
+    entry = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry):
+        return None
+    restored = []
+    for subdir in ['DOUT', 'LOG']:
+        target_dir = os.path.join(directory, 'DATA', subdir)
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in os.listdir(os.path.join(entry, subdir)):
+            target = os.path.join(target_dir, filename)
+            shutil.copy2(os.path.join(entry, subdir, filename), target)
+            restored.append(target)
+    return restored
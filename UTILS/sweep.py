@@ -0,0 +1,201 @@
+# ========================================================================
+"""       PARALLEL NDEF PARAMETER SWEEPS & SENSITIVITY STUDIES         """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+A sweep varies NDEF fields of a base node & collects the final RUL/SOH/BD/EOL of every
+variant in one table. DEMO2 as a sweep (the three nodes are paired, not crossed):
+    base = (24.000, 0.000, 5.000, 10, 5, 1.265, 67.000, 220.000, 2, 'SP4000_1', '.txt', '.csv', -9)
+    table = runSweep(base, {'FDNV': [1.265, 1.285, 1.275], 'FFPFAIL': [67, 73, 70]}, mode='zip')
+and a 10k-point grid is one call, e.g. explored first with the native engine
+    runSweep(base, {'FDNV': np.linspace(1.1, 1.5, 100), 'FFPFAIL': np.linspace(50, 90, 100)}, engine='native')
+Engines:
+  native  nativeARULE fleet engine: the points are split into chunks run as vectorised
+          fleets across a process pool (one chunk per task, sized to keep memory bounded)
+  exe     UD_ARULE: the points become systems of nodes_per_system nodes each, run through
+          batchRunner.runBatch (max_workers concurrent exe runs, optional composite SDEFs)
+Native sweep results are NOT exe-equivalent: nativeARULE approximates UD_ARULE (BD/EOL
+within a sample or two of the PLOTS/ references, RUL/PH less closely), so use it to
+explore trends & narrow a range, and confirm the points that matter with the exe (the default).
+"""
+### Import Libraries
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from batchRunner import ARULE_ROOT, runBatch
+from metrics import report
+from parseDEF import NDEF_FIELDS
+
+### Sweep Settings
+OUTCOME_COLUMNS = ('RUL', 'SOH', 'BD', 'EOL')
+# Upper bound on nodes x samples of one native fleet chunk (about 17 float64 outputs each)
+MAX_FLEET_CELLS = 500000
+INPUT_CACHE = {}
+
+### FUNCTIONS
+# expandGrid Function
+def expandGrid(base, grid, mode='grid'):
+    """
+    Expand sweep ranges into NDEF parameter tuples.
+
+    base: Base node parameters, (FDC, FDZ, FDNM, FDCPTS, FDPTS, FDNV, FFPFAIL, PITTFF, PIFFSMOD, INFILE, INTYPE, OUTTYPE, ENDDEF) or a parseDEF NDEFRecord
+    grid: Dictionary of NDEF field name to the values it takes, e.g. {'FDNV': np.linspace(1.1, 1.5, 100)}
+    mode: 'grid' (every combination of the values) or 'zip' (the i-th value of every field together)
+    @returns: List of dictionaries of the swept field values, list of node_params tuples (same order)
+    """
+    base = base.nodeParams() if hasattr(base, 'nodeParams') else tuple(base)
+    fields = list(NDEF_FIELDS)
+    unknown = [field for field in grid if field not in NDEF_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown NDEF fields {unknown}, expected some of {fields}.")
+    names = list(grid)
+    values = [[NDEF_FIELDS[name](value) for value in np.atleast_1d(grid[name]).tolist()] for name in names]
+    if mode == 'grid':
+        combinations = itertools.product(*values)
+    elif mode == 'zip':
+        if len({len(column) for column in values}) > 1:
+            raise ValueError("mode='zip' needs the same number of values for every field.")
+        combinations = zip(*values)
+    else:
+        raise ValueError(f"Unknown mode '{mode}', expected 'grid' or 'zip'.")
+    points, node_params = [], []
+    for combination in combinations:
+        point = dict(zip(names, combination))
+        points.append(point)
+        node_params.append(tuple(point.get(field, value) for field, value in zip(fields, base)))
+    return points, node_params
+
+# loadSweepInput Function
+def loadSweepInput(infile, intype, directory):
+    """
+    @returns: dt, da of an input file, read once per process
+    """
+    from inputData import readInput
+    key = (os.path.abspath(directory), infile, intype)
+    if key not in INPUT_CACHE:
+        INPUT_CACHE[key] = readInput(infile, intype, directory)
+    return INPUT_CACHE[key]
+
+# runNativeChunk Function
+def runNativeChunk(node_params, directory):
+    """
+    Run one chunk of sweep points as a native fleet (runs in the sweep process pool).
+
+    node_params: List of node_params tuples
+    directory: Directory holding the input files
+    @returns: Dictionary of OUTCOME_COLUMNS to the last value of every node
+    """
+    from nativeARULE import ARULE_COLUMNS, fleetParams, packFleet, runFleetARULE
+    inputs = [loadSweepInput(params[9], params[10], directory) for params in node_params]
+    dt, da, lengths = packFleet([i[0] for i in inputs], [i[1] for i in inputs])
+    outputs = runFleetARULE(dt, da, lengths, fleetParams(node_params))
+    rows = np.arange(len(node_params))
+    return {column: outputs[ARULE_COLUMNS.index(column)][rows, lengths - 1] for column in OUTCOME_COLUMNS}
+
+# sweepNative Function
+def sweepNative(node_params, max_workers=None, chunk_size=None, root=ARULE_ROOT):
+    """
+    Run sweep points with the native fleet engine across a process pool.
+    The outcomes approximate UD_ARULE and are not exe-equivalent (see the module docstring).
+
+    node_params: List of node_params tuples (see expandGrid)
+    max_workers: Number of worker processes (None = number of CPU cores)
+    chunk_size: Points per fleet (None = enough chunks for every worker, within MAX_FLEET_CELLS)
+    root: Directory that holds the ARULE/ tree
+    @returns: Dictionary of OUTCOME_COLUMNS to arrays with one value per point
+    """
+    directory = os.path.join(root, 'ARULE', 'DATA', 'DINP')
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        samples = max(len(loadSweepInput(infile, intype, directory)[0])
+                      for infile, intype in {(params[9], params[10]) for params in node_params})
+        chunk_size = math.ceil(len(node_params) / (4 * max_workers))
+        chunk_size = max(1, min(chunk_size, MAX_FLEET_CELLS // max(samples, 1)))
+    outcomes = {column: np.full(len(node_params), np.nan) for column in OUTCOME_COLUMNS}
+    report(f'Sweeping {len(node_params)} points in fleets of {chunk_size} on {max_workers} processes ...', 'green')
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(runNativeChunk, node_params[first:first+chunk_size], directory): first
+                   for first in range(0, len(node_params), chunk_size)}
+        for future in as_completed(futures):
+            first = futures[future]
+            for column, values in future.result().items():
+                outcomes[column][first:first+len(values)] = values
+    return outcomes
+
+# sweepExe Function
+def sweepExe(node_params, name='SWEEP', nodes_per_system=100, max_workers=None, root=ARULE_ROOT, exe=None,
+             scratch_dir=None, composite_size=None):
+    """
+    Run sweep points with UD_ARULE, nodes_per_system nodes per system, through batchRunner.runBatch.
+
+    node_params: List of node_params tuples (see expandGrid)
+    name: Prefix of the sweep system names ({name}{k}, nodes P{point})
+    nodes_per_system: Maximum number of nodes in one SDEF
+    max_workers: Maximum number of concurrent UD_ARULE runs (None = number of CPU cores)
+    root: Directory that holds the shared ARULE/ tree, UD_ARULE.exe & configs.ini
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in root)
+    scratch_dir: Directory in which the workspaces are created (None = system temp directory)
+    composite_size: Merge up to this many systems into one UD_ARULE call (None = one call per system)
+    @returns: Dictionary of OUTCOME_COLUMNS, SYSNAME, NDFNAME, RC & ERROR to arrays/lists with one value per point
+             (NaN outcomes, RC -1 & an ERROR for a point whose DOUT file is missing or unreadable)
+    """
+    from ARULE4PythonUtils import readARULEColumns
+    systems = []
+    for k, first in enumerate(range(0, len(node_params), nodes_per_system)):
+        chunk = node_params[first:first+nodes_per_system]
+        systems.append((f'{name}{k+1}', [f'P{first+i}' for i in range(len(chunk))], chunk))
+    results = runBatch(systems, max_workers, root, exe, scratch_dir, composite_size=composite_size)
+    outcomes = {column: np.full(len(node_params), np.nan) for column in OUTCOME_COLUMNS}
+    outcomes.update({'SYSNAME': [], 'NDFNAME': [], 'RC': [], 'ERROR': []})
+    point = 0
+    for (sysname, nodenames, chunk), result in zip(systems, results):
+        for i, (node, params) in enumerate(zip(nodenames, chunk)):
+            outcomes['SYSNAME'].append(sysname)
+            outcomes['NDFNAME'].append(f'{sysname}_{node}')
+            outcomes['RC'].append(result['returncode'])
+            outcomes['ERROR'].append(result['error'])
+            if result['returncode'] == 0:
+                filepath = os.path.join(root, 'ARULE', 'DATA', 'DOUT', f'ND_{i+1}_DW_{sysname}_{params[9]}_OUT{params[11]}')
+                try:
+                    columns = readARULEColumns(filepath, OUTCOME_COLUMNS)
+                except (OSError, ValueError, KeyError) as exc:
+                    # e.g. UD_ARULE returned 0 without writing this node: fail the point, not the table
+                    outcomes['RC'][-1], outcomes['ERROR'][-1] = -1, f'{type(exc).__name__}: {exc}'
+                else:
+                    for column in OUTCOME_COLUMNS:
+                        outcomes[column][point] = columns[column][-1]
+            point += 1
+    return outcomes
+
+# runSweep Function
+def runSweep(base, grid, mode='grid', engine='exe', max_workers=None, root=ARULE_ROOT, **options):
+    """
+    Expand, run & tabulate a parameter sweep in one call.
+
+    base: Base node parameters (node_params tuple or parseDEF NDEFRecord)
+    grid: Dictionary of NDEF field name to the values it takes (see expandGrid)
+    mode: 'grid' (every combination) or 'zip' (paired values, as in DEMO2)
+    engine: 'exe' (UD_ARULE, see sweepExe) or 'native' (approximate nativeARULE fleets, not exe-equivalent, see sweepNative)
+    max_workers: Number of worker processes / concurrent UD_ARULE runs (None = number of CPU cores)
+    root: Directory that holds the ARULE/ tree
+    options: Further keyword arguments of sweepNative (chunk_size) or sweepExe (name, nodes_per_system, exe, ...)
+    @returns: pandas DataFrame with one row per point: POINT, the swept fields, RUL, SOH, BD & EOL (plus SYSNAME, NDFNAME, RC & ERROR for the exe)
+    """
+    import pandas as pd
+    points, node_params = expandGrid(base, grid, mode)
+    start = time.perf_counter()
+    if engine == 'native':
+        outcomes = sweepNative(node_params, max_workers, root=root, **options)
+    elif engine == 'exe':
+        outcomes = sweepExe(node_params, max_workers=max_workers, root=root, **options)
+    else:
+        raise ValueError(f"Unknown engine '{engine}', expected 'native' or 'exe'.")
+    table = pd.DataFrame(points)
+    table.insert(0, 'POINT', np.arange(len(points)))
+    for column, values in outcomes.items():
+        table[column] = values
+    report(f'Sweep of {len(points)} points completed in {time.perf_counter() - start:.2f} s!', 'green')
+    return table
@@ -0,0 +1,189 @@
+# ========================================================================
+"""       LIVE TAILING READER FOR ARULE DOUT FILES DURING A RUN        """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+### Import Libraries
+import asyncio
+import io
+import os
+import subprocess
+import time
+import numpy as np
+
+### CLASSES
+# DOUTTail Class
+class DOUTTail:
+    """
+    Incremental reader of a DOUT .csv file that UD_ARULE is still appending to.
+
+    Each poll() reads only the bytes added since the previous poll and parses the
+    complete rows among them; a trailing partial row is kept for the next poll.
+    Left-over outputs of an earlier run are ignored until the new run rewrites them:
+    with skip_existing, the file as it is when the tail is created (same inode, size &
+    modification time), and with `since` (a time.time() value), files last modified
+    before it. A new inode or a shrinking file means the file was rewritten.
+    """
+    def __init__(self, filepath, columns=('DT', 'RUL', 'SOH'), since=None, skip_existing=False):
+        self.filepath = filepath
+        self.since = since
+        self.skip = fileIdentity(filepath) if skip_existing else None
+        self.inode = None
+        self.columns = [column.upper() for column in columns]
+        self.offset = 0
+        self.partial = b''
+        self.usecols = None
+        self.rows = 0
+
+    def poll(self, final=False):
+        """
+        Parse the rows appended since the previous poll.
+
+        final: The writer has finished, so a last row without a newline is complete (True/False)
+        @returns: Dictionary of column name to array of the new rows, or None if there are none
+        """
+        try:
+            with open(self.filepath, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                if self.skip is not None:
+                    if statIdentity(stat) == self.skip:
+                        return None
+                    self.skip = None
+                if self.since is not None and stat.st_mtime < self.since:
+                    return None
+                size = stat.st_size
+                inode = (stat.st_dev, stat.st_ino)
+                if self.inode is not None and (inode != self.inode or size < self.offset):
+                    # The file was rewritten by a new run: start over
+                    self.offset, self.partial, self.usecols, self.rows = 0, b'', None, 0
+                self.inode = inode
+                file.seek(self.offset)
+                data = file.read(size - self.offset)
+        except FileNotFoundError:
+            return None
+        self.offset += len(data)
+        data = self.partial + data
+        if final:
+            lines = data if data.endswith(b'\n') or not data else data + b'\n'
+            self.partial = b''
+        else:
+            end = data.rfind(b'\n') + 1
+            lines, self.partial = data[:end], data[end:]
+        if self.usecols is None:
+            if not lines:
+                return None
+            header, lines = lines.split(b'\n', 1)
+            names = [name.strip() for name in header.decode().split(',')]
+            self.usecols = [names.index(column) for column in self.columns]
+        if not lines.strip():
+            return None
+        table = np.loadtxt(io.BytesIO(lines), delimiter=',', usecols=self.usecols, ndmin=2)
+        self.rows += len(table)
+        return {column: table[:, i] for i, column in enumerate(self.columns)}
+
+### FUNCTIONS
+# statIdentity Function
+def statIdentity(stat):
+    """
+    @returns: (device, inode, size, mtime_ns) of an os.stat result
+    """
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+# fileIdentity Function
+def fileIdentity(filepath):
+    """
+    @returns: statIdentity of a file, or None if it does not exist
+    """
+    try:
+        return statIdentity(os.stat(filepath))
+    except FileNotFoundError:
+        return None
+
+# tailARULEOutput Function
+def tailARULEOutput(filepath, columns=('DT', 'RUL', 'SOH'), poll_interval=0.5, stop=None, callback=None, since=None,
+                    skip_existing=False):
+    """
+    Yield batches of new DOUT rows while UD_ARULE is writing the file.
+
+    filepath: Path to the ARULE .csv output file
+    columns: Names of the columns to stream
+    poll_interval: Seconds between polls when no new rows are available
+    stop: Callable returning True once the writer has finished (None = tail forever)
+    callback: Optional callable invoked with every batch
+    since: Ignore the file while it was last modified before this time.time() value (None = no check)
+    skip_existing: Ignore the file as it is now until it is rewritten, e.g. before starting a new run (True/False)
+    @returns: Generator of dictionaries of column name to array of new rows
+    """
+    tail = DOUTTail(filepath, columns, since, skip_existing)
+    while True:
+        finished = stop is not None and stop()
+        batch = tail.poll(final=finished)
+        if batch is not None:
+            if callback is not None:
+                callback(batch)
+            yield batch
+        elif finished:
+            return
+        else:
+            time.sleep(poll_interval)
+
+# atailARULEOutput Function
+async def atailARULEOutput(filepath, columns=('DT', 'RUL', 'SOH'), poll_interval=0.5, stop=None, since=None,
+                           skip_existing=False):
+    """
+    Async iterator version of tailARULEOutput for dashboards & alerting loops.
+
+    filepath: Path to the ARULE .csv output file
+    columns: Names of the columns to stream
+    poll_interval: Seconds between polls when no new rows are available
+    stop: Callable returning True once the writer has finished (None = tail forever)
+    since: Ignore the file while it was last modified before this time.time() value (None = no check)
+    skip_existing: Ignore the file as it is now until it is rewritten, e.g. before starting a new run (True/False)
+    @returns: Async generator of dictionaries of column name to array of new rows
+    """
+    tail = DOUTTail(filepath, columns, since, skip_existing)
+    while True:
+        finished = stop is not None and stop()
+        batch = tail.poll(final=finished)
+        if batch is not None:
+            yield batch
+        elif finished:
+            return
+        else:
+            await asyncio.sleep(poll_interval)
+
+# runAndTail Function
+def runAndTail(command, filepaths, callback, columns=('DT', 'RUL', 'SOH'), poll_interval=0.5, cwd=None):
+    """
+    Run UD_ARULE and stream the rows of its node output files while it is running.
+
+    command: UD_ARULE command list, as passed to subprocess.run in the DEMOS scripts
+    filepaths: Paths to the DOUT files to tail (e.g. one per node of the SDEF)
+    callback: Callable invoked as callback(filepath, batch) for every batch of new rows
+    columns: Names of the columns to stream
+    poll_interval: Seconds between polls
+    cwd: Working directory of the exe
+    @returns: Return code of UD_ARULE
+    """
+    # Outputs left over from an earlier run are ignored until they are rewritten
+    tails = [DOUTTail(filepath, columns, skip_existing=True) for filepath in filepaths]
+    process = subprocess.Popen(command, cwd=cwd)
+    try:
+        while True:
+            finished = process.poll() is not None
+            for tail in tails:
+                batch = tail.poll()
+                if batch is not None:
+                    callback(tail.filepath, batch)
+            if finished:
+                # Final pass after exit so rows written just before exit are not lost
+                for tail in tails:
+                    batch = tail.poll(final=True)
+                    if batch is not None:
+                        callback(tail.filepath, batch)
+                return process.returncode
+            time.sleep(poll_interval)
+    finally:
+        # A failing callback (or Ctrl+C) must not leave UD_ARULE running
+        if process.poll() is None:
+            process.kill()
+            process.wait()
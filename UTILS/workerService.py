@@ -0,0 +1,457 @@
+# ========================================================================
+"""     PERSISTENT LOCAL ARULE JOB SERVICE WITH A WARM WORKER POOL     """
+"""        © 2024 Ridgetop Group, Inc., All Rights Reserved            """
+# ========================================================================
+"""
+A long-lived localhost HTTP service that keeps a pool of worker processes with numpy,
+pandas, matplotlib (Agg) & the ARULE utilities already imported, so a job only pays
+for its own work. Start it with
+    python UTILS/workerService.py --port 8765 --workers 4 --token <secret>
+and use the client helpers (submitJob, jobStatus, waitJob) or the JSON API. Every request
+carries the shared token in an X-ARULE-Token header (--token or ARULE_SERVICE_TOKEN; a
+random one is printed at start-up when neither is set) & POSTs are application/json:
+    POST /jobs      {"system": [sysname, nodenames, node_params], "engine": "exe" | "native",
+                     "priority": 0, "plot": false}          -> {"id": ...}
+    GET  /jobs/<id> -> {"id", "state": queued | running | done | failed, "result", "error", timings}
+    GET  /jobs      -> list of job states
+    GET  /health    -> {"workers", "queued", "running"}
+Jobs with a lower priority number run first, and jobs of the same system one after the
+other; input data are referenced by the INFILE & INTYPE of each node in ARULE/DATA/DINP
+of the service root. System, node & file names are restricted to NAME_RE as they become
+file names. Finished jobs are dropped after JOB_TTL seconds, and beyond
+MAX_FINISHED_JOBS, oldest first.
+"""
+### Import Libraries
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import re
+import secrets
+import shutil
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from hmac import compare_digest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+### Service Settings
+ARULE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+SUMMARY_COLUMNS = ('RUL', 'SOH', 'BD', 'EOL')
+TOKEN_HEADER = 'X-ARULE-Token'
+# Names that end up in DEF, DINP & DOUT file names (no separators, dots or '..')
+NAME_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+JOB_TTL = 3600.0
+MAX_FINISHED_JOBS = 1000
+
+### WORKER FUNCTIONS
+# initServiceWorker Function
+def initServiceWorker(root):
+    """
+    Warm up a service worker: headless backend, working directory & every library a job uses.
+
+    root: Directory that holds the ARULE/ tree & PLOTS/ directory
+    @returns: None
+    """
+    from parallelPlot import initPlotWorker
+    from metrics import configure
+    initPlotWorker(root)
+    # Workers live as long as the service: do not accumulate stage records in them
+    configure(enabled=False)
+    import pandas
+    import matplotlib.pyplot
+    import ARULE4PythonPlot
+    import batchRunner
+    import nativeARULE
+    return None
+
+# warmUp Function
+def warmUp():
+    """
+    No-op task used to start the workers (and run their initializer) before the first job.
+    """
+    return os.getpid()
+
+# runJob Function
+def runJob(system, engine='exe', plot=False, exe=None):
+    """
+    Run one job inside a warm service worker (working directory = service root).
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    engine: 'exe' (UD_ARULE through batchRunner.runSystem) or 'native' (nativeARULE fleet engine)
+    plot: Render the node plots to PLOTS/ (True/False)
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in the service root)
+    @returns: JSON-serialisable result with returncode, outputs, the last RUL/SOH/BD/EOL per node & plots
+    """
+    from batchRunner import collectWorkspace, makeWorkspace, runSystem
+    from ARULE4PythonUtils import readARULEColumns
+    root = os.getcwd()
+    sysname, nodenames, node_params = system
+    ndefparams = [[i+1, f'{sysname}_{node}', *params] for i, (node, params) in enumerate(zip(nodenames, node_params))]
+    if engine == 'native':
+        from nativeARULE import runSystemARULE
+        # Same isolation as the exe: run in a scratch workspace & copy the outputs back
+        workspace = makeWorkspace(system, root)
+        try:
+            runSystemARULE(sysname, ndefparams, os.path.join(workspace, 'ARULE'))
+            collectWorkspace(workspace, root)
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+        result = {'returncode': 0, 'error': ''}
+    elif engine == 'exe':
+        run = runSystem(system, root, exe)
+        result = {'returncode': run['returncode'], 'error': run['error']}
+    else:
+        raise ValueError(f"Unknown engine '{engine}', expected 'exe' or 'native'.")
+    result['nodes'] = {}
+    if result['returncode'] == 0:
+        for params in ndefparams:
+            filepath = os.path.join(root, 'ARULE', 'DATA', 'DOUT', f'ND_{params[0]}_DW_{sysname}_{params[11]}_OUT{params[13]}')
+            columns = readARULEColumns(filepath, SUMMARY_COLUMNS, cache=True)
+            result['nodes'][params[1]] = {column: None if math.isnan(value) else value
+                                          for column, value in zip(SUMMARY_COLUMNS, columns.block[:, -1].tolist())}
+        if plot:
+            from parallelPlot import plotJob
+            result['plots'] = plotJob(sysname, ndefparams)
+    return result
+
+# validateSystem Function
+def validateSystem(system):
+    """
+    Check the shape of a submitted system & that its names are safe to use in file names.
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    @returns: None (raises ValueError on an invalid system)
+    """
+    sysname, nodenames, node_params = system
+    if len(nodenames) != len(node_params) or any(len(params) != 13 for params in node_params):
+        raise ValueError("A system needs one 13-field node_params entry per node name.")
+    names = [sysname, *nodenames, *[params[9] for params in node_params]]
+    types = [params[k] for params in node_params for k in (10, 11)]
+    invalid = [name for name in names if not isinstance(name, str) or not NAME_RE.match(name)]
+    invalid += [filetype for filetype in types
+                if not isinstance(filetype, str) or not filetype.startswith('.') or not NAME_RE.match(filetype[1:])]
+    if invalid:
+        raise ValueError(f"Invalid names {invalid}: use letters, digits, '_' & '-' (file types '.' + those).")
+    return None
+
+### CLASSES
+# ARULEService Class
+class ARULEService:
+    """
+    Priority job queue in front of a warm ProcessPoolExecutor.
+
+    A dispatcher thread hands the highest-priority queued job to the pool whenever a
+    worker is free, so priorities still apply while the pool is busy. Jobs of a system
+    share its DEF, DOUT & LOG files in the root, so a job whose system is already running
+    is parked until that run finishes.
+    """
+    def __init__(self, root=ARULE_ROOT, max_workers=None, exe=None):
+        self.root = root
+        self.exe = exe
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = self.startPool()
+        self.queue = queue.PriorityQueue()
+        self.jobs = {}
+        self.running = set()
+        self.parked = {}
+        self.lock = threading.Lock()
+        self.restart_lock = threading.Lock()
+        self.slots = threading.Semaphore(self.max_workers)
+        self.counter = itertools.count(1)
+        self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def startPool(self):
+        """
+        Start a pool of warm workers.
+
+        @returns: ProcessPoolExecutor
+        """
+        # Spawned, not forked, as workers may be (re)started while the HTTP & dispatcher threads run
+        executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=initServiceWorker, initargs=(self.root,))
+        for future in [executor.submit(warmUp) for _ in range(self.max_workers)]:
+            future.result()
+        return executor
+
+    def restartPool(self, broken):
+        """
+        Replace a broken pool (e.g. a worker was killed), once however many jobs noticed it.
+        """
+        with self.restart_lock:
+            if self.executor is not broken:
+                return None
+            broken.shutdown(wait=False, cancel_futures=True)
+            executor = self.startPool()
+            with self.lock:
+                self.executor = executor
+        return None
+
+    def submit(self, system, engine='exe', priority=0, plot=False):
+        """
+        Queue a job.
+
+        @returns: Job id
+        """
+        if engine not in ('exe', 'native'):
+            raise ValueError(f"Unknown engine '{engine}', expected 'exe' or 'native'.")
+        validateSystem(system)
+        sequence = next(self.counter)
+        job_id = f'{sequence:06d}-{system[0]}'
+        with self.lock:
+            self.evictJobs()
+            self.jobs[job_id] = {'id': job_id, 'sysname': system[0], 'engine': engine, 'priority': priority,
+                                 'state': 'queued', 'submitted': time.time(), 'started': None, 'finished': None,
+                                 'result': None, 'error': ''}
+        self.queue.put((priority, sequence, job_id, (tuple(system), engine, plot)))
+        return job_id
+
+    def dispatch(self):
+        """
+        Dispatcher thread: start queued jobs in priority order as workers become free.
+        """
+        while True:
+            self.slots.acquire()
+            item = self.queue.get()
+            priority, sequence, job_id, (system, engine, plot) = item
+            with self.lock:
+                if system[0] in self.running:
+                    # Requeued by releaseSystem once the running job of this system finishes
+                    self.parked.setdefault(system[0], []).append(item)
+                    self.slots.release()
+                    continue
+                self.running.add(system[0])
+                self.jobs[job_id].update(state='running', started=time.time())
+                executor = self.executor
+            try:
+                future = executor.submit(runJob, system, engine, plot, self.exe)
+            except Exception as exc:
+                # BrokenProcessPool: fail this job instead of the dispatcher & bring up new workers
+                with self.lock:
+                    self.jobs[job_id].update(state='failed', finished=time.time(), error=f'{type(exc).__name__}: {exc}')
+                self.releaseSystem(system[0])
+                self.slots.release()
+                self.restartPool(executor)
+                continue
+            future.add_done_callback(lambda future, job_id=job_id, executor=executor: self.finish(job_id, future, executor))
+
+    def finish(self, job_id, future, executor):
+        """
+        Record the outcome of a job and free its worker slot.
+        """
+        broken = False
+        with self.lock:
+            job = self.jobs[job_id]
+            sysname = job['sysname']
+            job['finished'] = time.time()
+            try:
+                job['result'] = future.result()
+                job['state'] = 'done' if job['result']['returncode'] == 0 else 'failed'
+                job['error'] = job['result']['error']
+            except Exception as exc:
+                job['state'], job['error'] = 'failed', f'{type(exc).__name__}: {exc}'
+                broken = isinstance(exc, BrokenProcessPool)
+        self.releaseSystem(sysname)
+        self.slots.release()
+        if broken:
+            # Restarted from a thread of its own, done callbacks must not block on the new pool
+            threading.Thread(target=self.restartPool, args=(executor,), daemon=True).start()
+
+    def releaseSystem(self, sysname):
+        """
+        Mark a system as no longer running and requeue its parked jobs in their original order.
+        """
+        with self.lock:
+            self.running.discard(sysname)
+            parked = self.parked.pop(sysname, [])
+        for item in parked:
+            self.queue.put(item)
+
+    def evictJobs(self):
+        """
+        Drop finished jobs older than JOB_TTL and the oldest beyond MAX_FINISHED_JOBS (call with the lock held).
+        """
+        now = time.time()
+        finished = sorted((job['finished'], job_id) for job_id, job in self.jobs.items() if job['finished'] is not None)
+        expired = [job_id for finished_at, job_id in finished if now - finished_at > JOB_TTL]
+        expired += [job_id for finished_at, job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]]
+        for job_id in set(expired):
+            del self.jobs[job_id]
+
+    def status(self, job_id=None):
+        """
+        @returns: Copy of one job record, or of all job records without their results (job_id=None)
+        """
+        with self.lock:
+            self.evictJobs()
+            if job_id is not None:
+                return dict(self.jobs[job_id]) if job_id in self.jobs else None
+            return [{key: value for key, value in job.items() if key != 'result'} for job in self.jobs.values()]
+
+    def health(self):
+        """
+        @returns: Number of workers, queued & running jobs
+        """
+        with self.lock:
+            states = [job['state'] for job in self.jobs.values()]
+        return {'workers': self.max_workers, 'queued': states.count('queued'), 'running': states.count('running')}
+
+# ServiceHandler Class
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the ARULE service (see the module docstring).
+    """
+    def reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorised(self):
+        """
+        @returns: True if the request carries the service token (replies 401 otherwise)
+        """
+        if compare_digest(self.headers.get(TOKEN_HEADER, '').encode(), self.server.token.encode()):
+            return True
+        self.reply(401, {'error': f'missing or wrong {TOKEN_HEADER}'})
+        return False
+
+    def do_GET(self):
+        if not self.authorised():
+            return None
+        service = self.server.service
+        if self.path == '/health':
+            return self.reply(200, service.health())
+        if self.path == '/jobs':
+            return self.reply(200, service.status())
+        if self.path.startswith('/jobs/'):
+            job = service.status(self.path[len('/jobs/'):])
+            return self.reply(200, job) if job is not None else self.reply(404, {'error': 'unknown job'})
+        return self.reply(404, {'error': 'unknown path'})
+
+    def do_POST(self):
+        if not self.authorised():
+            return None
+        if self.path != '/jobs':
+            return self.reply(404, {'error': 'unknown path'})
+        if self.headers.get('Content-Type', '').split(';')[0].strip().lower() != 'application/json':
+            return self.reply(415, {'error': 'Content-Type must be application/json'})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            job_id = self.server.service.submit(request['system'], request.get('engine', 'exe'),
+                                                int(request.get('priority', 0)), bool(request.get('plot', False)))
+        except (KeyError, ValueError, TypeError, IndexError) as exc:
+            return self.reply(400, {'error': f'{type(exc).__name__}: {exc}'})
+        return self.reply(202, {'id': job_id})
+
+    def log_message(self, format, *args):
+        # Job submissions are frequent; keep the service console quiet
+        return None
+
+### SERVICE & CLIENT FUNCTIONS
+# serve Function
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, root=ARULE_ROOT, max_workers=None, exe=None, token=None):
+    """
+    Start the service and block until interrupted.
+
+    host: Interface to bind (keep the default localhost unless the port is otherwise protected)
+    port: TCP port
+    root: Directory that holds the ARULE/ tree, UD_ARULE.exe & PLOTS/
+    max_workers: Number of warm worker processes (None = number of CPU cores)
+    exe: Path to the UD_ARULE executable (None = UD_ARULE.exe in root)
+    token: Shared token the clients must send (None = ARULE_SERVICE_TOKEN, else a random token that is printed)
+    @returns: None
+    """
+    token = token or os.environ.get('ARULE_SERVICE_TOKEN') or secrets.token_urlsafe(24)
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.token = token
+    server.service = ARULEService(root, max_workers, exe)
+    # Stop on SIGTERM as on Ctrl+C, so the warm workers are shut down with the service
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"##### ARULEinPython: ARULE service on http://{host}:{port} with {server.service.max_workers} warm workers")
+    if token != os.environ.get('ARULE_SERVICE_TOKEN'):
+        print(f"##### ARULEinPython: clients must send {TOKEN_HEADER}: {token} (or set ARULE_SERVICE_TOKEN)")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        server.service.executor.shutdown(wait=False, cancel_futures=True)
+    return None
+
+# requestJSON Function
+def requestJSON(path, payload=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=30, token=None):
+    """
+    Send a GET (payload None) or POST request to the service.
+
+    token: Shared service token (None = ARULE_SERVICE_TOKEN)
+    @returns: Decoded JSON reply
+    """
+    data = json.dumps(payload).encode() if payload is not None else None
+    headers = {'Content-Type': 'application/json', TOKEN_HEADER: token or os.environ.get('ARULE_SERVICE_TOKEN', '')}
+    request = urllib.request.Request(f'http://{host}:{port}{path}', data=data, headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+# submitJob Function
+def submitJob(system, engine='exe', priority=0, plot=False, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+    """
+    Submit a job to a running service.
+
+    system: Tuple of (sysname, nodenames, node_params) as used in the DEMOS scripts
+    engine: 'exe' or 'native'
+    priority: Lower numbers run first
+    plot: Render the node plots (True/False)
+    token: Shared service token (None = ARULE_SERVICE_TOKEN)
+    @returns: Job id (the result handle for jobStatus/waitJob)
+    """
+    payload = {'system': system, 'engine': engine, 'priority': priority, 'plot': plot}
+    return requestJSON('/jobs', payload, host, port, token=token)['id']
+
+# jobStatus Function
+def jobStatus(job_id, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+    """
+    @returns: Job record (state, result, error & timestamps)
+    """
+    return requestJSON(f'/jobs/{job_id}', None, host, port, token=token)
+
+# waitJob Function
+def waitJob(job_id, timeout=None, poll_interval=0.05, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+    """
+    Wait until a job is done or failed.
+
+    timeout: Seconds to wait (None = forever)
+    @returns: Final job record
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = jobStatus(job_id, host, port, token)
+        if job['state'] in ('done', 'failed'):
+            return job
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"Job {job_id} still {job['state']} after {timeout} s.")
+        time.sleep(poll_interval)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Persistent local ARULE job service.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--root', default=ARULE_ROOT, help='directory holding ARULE/, UD_ARULE.exe & PLOTS/')
+    parser.add_argument('--workers', type=int, default=None, help='warm worker processes')
+    parser.add_argument('--exe', default=None, help='path to UD_ARULE (default: UD_ARULE.exe in root)')
+    parser.add_argument('--token', default=None, help='shared client token (default: ARULE_SERVICE_TOKEN or random)')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.root, args.workers, args.exe, args.token)